@@ -7,7 +7,7 @@ class App(tk.Tk):
     def __init__(self):
         tk.Tk.__init__(self)
         self.title("Prší")
-        self.network_client = None
+        self.session = None
 
         # Create a container frame to hold the different pages
         self.container = tk.Frame(self)
@@ -50,11 +50,11 @@ class App(tk.Tk):
         self.geometry(f"+{x}+{y}")
 
     def on_closing(self):
-        if self.network_client:
-            self.network_client.close()
+        if self.session:
+            self.session.close()
         self.destroy()
 
-    def create_and_add_card_game_gui(self, player_name):
+    def create_and_add_card_game_gui(self, session):
         """This method will create and add CardGameGUI to the frames dynamically."""
         # Remove any existing CardGameGUI frame
         if "CardGameGUI" in self.frames:
@@ -62,7 +62,7 @@ class App(tk.Tk):
             del self.frames["CardGameGUI"]
 
         # Create new CardGameGUI frame
-        card_game_frame = CardGameGUI(self.container, self, player_name)
+        card_game_frame = CardGameGUI(self.container, self, session)
         self.frames["CardGameGUI"] = card_game_frame
         card_game_frame.grid(row=0, column=0, sticky="nsew")
         self.show_frame("CardGameGUI")
@@ -0,0 +1,265 @@
+"""asyncio implementation of the game client.
+
+Runs entirely on an event loop, so many headless sessions (load tests, bots) can
+share one thread instead of starting receive and heartbeat threads per player.
+There is no reconnection: when heartbeats go unanswered or the transport reports
+an error, the client queues an "unknown" message and ends the message stream.
+"""
+import asyncio
+from collections import Counter
+from codec import BINARY, JSON
+from keepalive import KeepaliveScheduler
+from network_client import LOST_HEARTBEATS_BEFORE_RECONNECT
+from protocol import ProtocolState
+
+# Marks the end of the message stream for the async iterator
+_END_OF_STREAM = object()
+
+
+class _ClientDatagramProtocol(asyncio.DatagramProtocol):
+    """Forwards transport events to the owning AsyncNetworkClient."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def datagram_received(self, data, addr):
+        self.client._handle_datagram(data)
+
+    def error_received(self, exc):
+        self.client._handle_error(exc)
+
+    def connection_lost(self, exc):
+        self.client._finish()
+
+
+class AsyncNetworkClient(ProtocolState):
+    """UDP game client built on asyncio.DatagramProtocol.
+
+    Server messages are consumed with ``async for message in client``. The
+    iteration ends when the game is over, the name is taken or the client is closed.
+    """
+
+    def __init__(self, heartbeat_interval: float = 5.0, delta: bool = True, codec: str = BINARY):
+        """Initialize a disconnected client.
+
+        Args:
+            heartbeat_interval: Seconds between heartbeats on an idle, healthy link
+                (see KeepaliveScheduler).
+            delta: Ask the server for state_delta messages instead of full states.
+            codec: Wire codec to ask for (see codec.py); JSON is used until the server agrees.
+        """
+        super().__init__(delta, codec)
+        self.transport = None
+        self.server_address = None
+        self.heartbeat_interval = heartbeat_interval
+        self.keepalive = KeepaliveScheduler(interval=heartbeat_interval)
+        self.messages: asyncio.Queue = asyncio.Queue()
+        self._heartbeat_task = None
+        self._connect_waiter = None
+        self.sent = Counter()  # Datagrams sent per message type
+
+    async def connect(self, ip, port, player_name, timeout: float = 5.0) -> dict:
+        """Connect to the server and wait for its answer.
+
+        Args:
+            ip: Server address.
+            port: Server port.
+            player_name: Name to register with.
+            timeout: Seconds to wait for the server to answer.
+
+        Returns:
+            dict: The connect_ack (or game_state_update on reconnection) message.
+
+        Raises:
+            ConnectionError: If the name is taken or the server refused the connection.
+            asyncio.TimeoutError: If the server did not answer in time.
+        """
+        if self.transport:
+            await self.close()
+
+        loop = asyncio.get_running_loop()
+        self.server_address = (ip, int(port))
+        self.player_name = player_name
+        self.running = True
+        self.connected = False
+        self.disconnected = False
+        self.waiting_for_player = False
+        self.state_version = None
+        self.send_codec = JSON
+        self.reassembler.clear()
+        self.messages = asyncio.Queue()
+        self._connect_waiter = loop.create_future()
+        self.keepalive.reset()
+
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: _ClientDatagramProtocol(self), remote_addr=self.server_address)
+
+        self.send_message({
+            "type": "connect",
+            "name": player_name,
+            "delta": self.delta,
+            "codec": self.codec
+        })
+
+        try:
+            reply = await asyncio.wait_for(self._connect_waiter, timeout)
+        except (asyncio.TimeoutError, ConnectionError):
+            await self.close()
+            raise
+        finally:
+            self._connect_waiter = None
+
+        if reply["type"] not in ["connect_ack", "game_state_update"]:
+            await self.close()
+            raise ConnectionError(reply.get("message", "Failed to connect to server"))
+
+        self._heartbeat_task = loop.create_task(self._send_heartbeat())
+        return reply
+
+    async def _send_heartbeat(self):
+        while self.running:
+            if self.connected:
+                heartbeat_message = self.keepalive.heartbeat(self.player_name)
+                if heartbeat_message:
+                    self.send_message(heartbeat_message)
+                if self.keepalive.consecutive_lost >= LOST_HEARTBEATS_BEFORE_RECONNECT:
+                    self._connection_lost("Connection lost: the server stopped answering.")
+                    return
+                await asyncio.sleep(self.keepalive.next_timeout())
+            else:
+                await asyncio.sleep(self.keepalive.interval())
+
+    def send_message(self, message) -> bool:
+        """Validate and send a message to the server.
+
+        Returns:
+            bool: True if the message was handed to the transport.
+        """
+        if not self.transport or self.transport.is_closing():
+            return False
+
+        # Validate message for current state
+        is_valid, error_msg = self._validate_message_for_state(message)
+        if not is_valid:
+            self.messages.put_nowait({"type": "unknown", "message": error_msg})
+            return False
+
+        for datagram in self.fragmenter.split(self._encode(message)):
+            self.transport.sendto(datagram)
+        self.sent[message.get("type")] += 1
+        self.keepalive.note_sent()
+        return True
+
+    async def play_card(self, card: str) -> bool:
+        """Play a card, given as its display string (e.g. "10♥")."""
+        if self.waiting_for_player:
+            return False
+        return self.send_message({
+            "type": "play_card",
+            "card": card,
+            "player_name": self.player_name
+        })
+
+    async def draw_card(self) -> bool:
+        """Draw a card from the deck."""
+        if self.waiting_for_player:
+            return False
+        return self.send_message({
+            "type": "draw_card",
+            "player_name": self.player_name
+        })
+
+    def _handle_datagram(self, data):
+        """Decode, validate and dispatch a single datagram received from the server."""
+        data = self._reassemble(data)
+        if data is None:
+            return  # A fragment of a message that is not complete yet
+        message, error_msg = self._decode_message(data)
+        if message is None:
+            self._handle_invalid_message(error_msg)
+            return
+        if message["type"] == "state_delta" and not self._accept_delta(message):
+            return
+
+        if not self._apply_server_message(message):
+            self._handle_invalid_message(message.get("message", "Server error"))
+            return
+        if message["type"] == "heartbeat_ack":
+            self.keepalive.ack(message.get("ts"))
+            self._check_version(message.get("version"))
+            return
+
+        self.messages.put_nowait(message)
+
+        if self._connect_waiter and not self._connect_waiter.done():
+            if message["type"] in ["connect_ack", "game_state_update", "name_taken", "error"]:
+                self._connect_waiter.set_result(message)
+
+        if not self.running:
+            # game_over or name_taken ended the session
+            self._finish()
+
+    def _handle_invalid_message(self, error_message):
+        """Report an invalid message and drop the connection."""
+        self.messages.put_nowait({
+            "type": "unknown",
+            "message": "Disconnected due to invalid message"
+        })
+        self.running = False
+        self._finish()
+
+    def _handle_error(self, exc):
+        """Transport level error (e.g. ICMP port unreachable): the server is gone."""
+        if self._connect_waiter and not self._connect_waiter.done():
+            # connect() raises and closes the client
+            self._connect_waiter.set_exception(ConnectionError(str(exc)))
+            return
+        self._connection_lost(f"Connection lost: {exc}")
+
+    def _connection_lost(self, reason: str):
+        """Tell the consumer that the server is unreachable and end the message stream."""
+        if not self.transport:
+            return
+        self.connected = False
+        self.running = False
+        self.messages.put_nowait({"type": "unknown", "message": reason})
+        self._finish()
+
+    def _finish(self):
+        """Stop the heartbeat, close the transport and end the message stream."""
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        if self.transport:
+            transport, self.transport = self.transport, None
+            transport.close()
+            self.messages.put_nowait(_END_OF_STREAM)
+        if self._connect_waiter and not self._connect_waiter.done():
+            self._connect_waiter.set_exception(ConnectionError("Connection closed"))
+
+    async def close(self):
+        """Send a disconnect message (if connected) and release the transport."""
+        if self.transport and self.connected and self.player_name:
+            self.send_message({
+                "type": "disconnect",
+                "name": self.player_name
+            })
+        self.running = False
+        self._finish()
+
+        # Reset all client state
+        self.connected = False
+        self.waiting_for_player = False
+        self.game_started = False
+        self.game_state = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        message = await self.messages.get()
+        if message is _END_OF_STREAM:
+            # Keep the marker so later iterations end immediately as well
+            self.messages.put_nowait(_END_OF_STREAM)
+            raise StopAsyncIteration
+        return message
@@ -0,0 +1,416 @@
+"""Micro benchmarks of the client's hot paths.
+
+Covers the card model (Card, Deck, Player), decoding and validating server datagrams
+in both wire codecs the way the receive loop does, fragmenting and reassembling
+large messages, parsing game states and state deltas in GameSession,
+update_game_state and hand diffing/rendering in create_hand_buttons, and the whole
+path from a session message to the widgets for full states and for deltas. The UI
+benchmarks run CardGameGUI against stub widgets (see _StubWidget), so they need
+neither a display nor a Tk mainloop and measure the Python side of rendering.
+
+Each benchmark is timed with timeit (best of --repeat runs) and reported in
+nanoseconds per operation. Results can be saved as JSON and compared with a stored
+baseline; the run fails when a benchmark got slower than the baseline by more than
+--threshold.
+
+Usage:
+    python benchmark.py --save baseline.json
+    python benchmark.py --baseline baseline.json --threshold 0.25 --output run.json
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import timeit
+
+from card import Card, RANKS, SUITS, mask_from_cards
+from codec import BINARY, encode
+from deck import Deck
+from framing import Fragmenter, Reassembler
+from game_session import GameSession, GameState, PLAYING
+from game_ui import CardGameGUI
+from network_client import NetworkClient
+from player import Player
+from protocol import ProtocolState
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark. The decorated function returns the callable to time."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def _game_state_datagram(top_card_as_string: bool = False) -> bytes:
+    """A game_state_update in the server's wire format, as alice receives it."""
+    rng = random.Random(1)
+    cards = [{"value": rank, "suit": suit} for rank in RANKS for suit in SUITS]
+    rng.shuffle(cards)
+    top = cards[0]
+    message = {
+        "type": "game_state_update",
+        "players": ["alice", "bob"],
+        "current_player": "alice",
+        "deck_size": 17,
+        "discard_pile": 3,
+        "top_card": str(top) if top_card_as_string else top,
+        "alice": cards[1:8],
+        "hand_sizes": {"alice": 7, "bob": 7},
+        "version": 42,
+    }
+    return json.dumps(message, ensure_ascii=False).encode()
+
+
+def _binary_datagram(datagram: bytes) -> bytes:
+    """The same message in the binary codec."""
+    return encode(json.loads(datagram), BINARY)
+
+
+def _state_deltas() -> list[dict]:
+    """Two state_delta messages that undo each other: alice plays a card, then takes it back."""
+    state = json.loads(_game_state_datagram())
+    card, top = state["alice"][0], state["top_card"]
+    return [
+        {"type": "state_delta", "version": 43, "base": 42, "current_player": "bob", "top_card": card,
+         "discard_pile": 4, "removed": {"alice": [card]}, "hand_sizes": {"alice": 6}},
+        {"type": "state_delta", "version": 44, "base": 43, "current_player": "alice", "top_card": top,
+         "discard_pile": 3, "added": {"alice": [card]}, "hand_sizes": {"alice": 7}},
+    ]
+
+
+# Card / Deck / Player
+
+@benchmark("card.construct")
+def _card_construct():
+    return lambda: Card("10", "♥")
+
+
+@benchmark("card.from_dict")
+def _card_from_dict():
+    card = {"value": "Q", "suit": "♠"}
+    return lambda: Card.from_dict(card)
+
+
+@benchmark("card.parse_dict_string")
+def _card_parse_dict_string():
+    text = str({"value": "Q", "suit": "♠"})
+    return lambda: Card.parse(text)
+
+
+@benchmark("card.hash_set")
+def _card_hash_set():
+    cards = [Card(rank, suit) for rank in RANKS for suit in SUITS]
+    return lambda: len(set(cards))
+
+
+@benchmark("deck.shuffle_deal_draw")
+def _deck_shuffle_deal_draw():
+    def run():
+        deck = Deck(seed=7)
+        deck.shuffle()
+        deck.deal(5)
+        deck.deal(5)
+        while deck.draw_card() is not None:
+            pass
+    return run
+
+
+@benchmark("player.legal_moves")
+def _player_legal_moves():
+    player = Player("alice")
+    player.hand_mask = mask_from_cards(Card(rank, suit) for rank in RANKS[:4] for suit in SUITS[:2])
+    top = Card("9", "♣")
+    return lambda: player.legal_moves(top, "♥")
+
+
+@benchmark("player.draw_play")
+def _player_draw_play():
+    player = Player("alice")
+    card = Card("8", "♦")
+    top = Card("8", "♠")
+
+    def run():
+        player.draw_card(card)
+        player.play_card(card, top, None)
+    return run
+
+
+# Protocol
+
+@benchmark("protocol.decode_validate")
+def _protocol_decode_validate():
+    state = ProtocolState()
+    state.game_started = True
+    data = _game_state_datagram()
+    return lambda: state._decode_message(data)
+
+
+@benchmark("protocol.decode_validate_binary")
+def _protocol_decode_validate_binary():
+    state = ProtocolState()
+    state.game_started = True
+    data = _binary_datagram(_game_state_datagram())
+    return lambda: state._decode_message(data)
+
+
+@benchmark("framing.split_reassemble")
+def _framing_split_reassemble():
+    fragmenter = Fragmenter()
+    reassembler = Reassembler()
+    data = _game_state_datagram() * 12  # About 5 KB, five fragments
+
+    def run():
+        for fragment in fragmenter.split(data):
+            reassembler.add(fragment)
+    return run
+
+
+@benchmark("network.handle_datagram")
+def _network_handle_datagram():
+    client = NetworkClient(metrics=False)
+    client.running = True
+    data = _game_state_datagram()
+
+    def run():
+        client._handle_datagram(data)
+        client.message_queue.get_nowait()
+    return run
+
+
+@benchmark("network.handle_datagram_binary")
+def _network_handle_datagram_binary():
+    client = NetworkClient(metrics=False)
+    client.running = True
+    data = _binary_datagram(_game_state_datagram())
+
+    def run():
+        client._handle_datagram(data)
+        client.message_queue.get_nowait()
+    return run
+
+
+@benchmark("session.handle_state")
+def _session_handle_state():
+    session = GameSession("alice", NetworkClient(metrics=False))
+    message = json.loads(_game_state_datagram())
+    return lambda: session.handle_message(message)
+
+
+@benchmark("session.handle_state_string_top_card")
+def _session_handle_state_string_top_card():
+    session = GameSession("alice", NetworkClient(metrics=False))
+    message = json.loads(_game_state_datagram(top_card_as_string=True))
+    return lambda: session.handle_message(message)
+
+
+@benchmark("session.handle_state_binary")
+def _session_handle_state_binary():
+    session = GameSession("alice", NetworkClient(metrics=False))
+    message, _ = ProtocolState()._decode_message(_binary_datagram(_game_state_datagram()))
+    return lambda: session.handle_message(message)
+
+
+@benchmark("session.apply_delta")
+def _session_apply_delta():
+    session = GameSession("alice", NetworkClient(metrics=False))
+    session.handle_message(json.loads(_game_state_datagram()))
+    first, second = _state_deltas()
+
+    def run():
+        session.confirmed.version = 42  # The pair leaves the state as it was, only the version moved on
+        session.handle_message(first)
+        session.handle_message(second)
+    return run
+
+
+@benchmark("session.legal_cards")
+def _session_legal_cards():
+    session = GameSession("alice", NetworkClient(metrics=False))
+    session.handle_message(json.loads(_game_state_datagram()))
+    return session.legal_cards
+
+
+# UI
+
+class _StubWidget:
+    """Accepts the widget calls CardGameGUI makes and does nothing."""
+
+    def config(self, **kwargs):
+        pass
+
+    configure = config
+
+    def grid(self, **kwargs):
+        pass
+
+    def grid_remove(self):
+        pass
+
+    def destroy(self):
+        pass
+
+
+def _stub_gui() -> CardGameGUI:
+    """CardGameGUI with stub widgets instead of a Tk frame."""
+    gui = CardGameGUI.__new__(CardGameGUI)
+    gui.controller = None
+    gui.session = GameSession("alice", NetworkClient(metrics=False))
+    gui.session.phase = PLAYING
+    gui.player = gui.session.player
+    gui.suit_buttons = []
+    gui.card_buttons = {}
+    gui.card_positions = {}
+    gui.button_pool = []
+    gui.is_active = True
+    gui.subscriptions = []
+    gui.deck_info_label = _StubWidget()
+    gui.discard_info_label = _StubWidget()
+    gui.discard_pile_button = _StubWidget()
+    gui.label_current_player = _StubWidget()
+    gui.opponent_info_label = _StubWidget()
+    gui._create_card_button = _StubWidget
+    return gui
+
+
+def _subscribe(gui: CardGameGUI):
+    gui.subscriptions = [("state", gui.update_game_state), ("hand", gui.update_hand)]
+    for event, callback in gui.subscriptions:
+        gui.session.on(event, callback)
+
+
+@benchmark("ui.update_game_state")
+def _ui_update_game_state():
+    gui = _stub_gui()
+    state = GameState.from_message(json.loads(_game_state_datagram()), "alice")
+    return lambda: gui.update_game_state(state)
+
+
+@benchmark("ui.session_full_states")
+def _ui_session_full_states():
+    gui = _stub_gui()
+    _subscribe(gui)
+    messages = [json.loads(_game_state_datagram()), json.loads(_game_state_datagram())]
+    messages[1]["alice"] = messages[1]["alice"][1:]  # Every state changes the hand
+
+    def run():
+        gui.session.handle_message(messages[0])
+        gui.session.handle_message(messages[1])
+    return run
+
+
+@benchmark("ui.session_deltas")
+def _ui_session_deltas():
+    gui = _stub_gui()
+    _subscribe(gui)
+    gui.session.handle_message(json.loads(_game_state_datagram()))
+    first, second = _state_deltas()
+
+    def run():
+        gui.session.confirmed.version = 42  # The pair leaves the state as it was, only the version moved on
+        gui.session.handle_message(first)
+        gui.session.handle_message(second)
+    return run
+
+
+@benchmark("ui.create_hand_buttons_diff")
+def _ui_create_hand_buttons_diff():
+    gui = _stub_gui()
+    cards = [Card(rank, suit) for rank in RANKS for suit in SUITS]
+    hand = cards[:10]
+    drawn = hand + [cards[20]]
+
+    def run():
+        gui.create_hand_buttons(drawn)
+        gui.create_hand_buttons(hand)
+    return run
+
+
+@benchmark("ui.create_hand_buttons_full")
+def _ui_create_hand_buttons_full():
+    gui = _stub_gui()
+    cards = [Card(rank, suit) for rank in RANKS for suit in SUITS]
+    first, second = cards[:10], cards[10:20]
+
+    def run():
+        gui.create_hand_buttons(first)
+        gui.create_hand_buttons(second)
+    return run
+
+
+def run_benchmarks(names=None, repeat: int = 5) -> dict:
+    """Time the selected benchmarks.
+
+    Returns:
+        dict: name -> {"ns_per_op", "loops"}.
+    """
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if names and not any(name.startswith(prefix) for prefix in names):
+            continue
+        timer = timeit.Timer(setup())
+        loops, _ = timer.autorange()
+        best = min(timer.repeat(repeat, loops))
+        results[name] = {"ns_per_op": best / loops * 1e9, "loops": loops}
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Names of the benchmarks that are slower than the baseline by more than threshold."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference and result["ns_per_op"] > reference["ns_per_op"] * (1.0 + threshold):
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the client's model, codec and UI update paths.")
+    parser.add_argument("names", nargs="*", help="only run benchmarks starting with these prefixes")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per benchmark, the best one counts")
+    parser.add_argument("--output", default=None, help="write the results as JSON to this file")
+    parser.add_argument("--save", default=None, help="write the results as a new baseline to this file")
+    parser.add_argument("--baseline", default=None, help="compare with the baseline in this file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 = 25 %%")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.names, repeat=args.repeat)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["benchmarks"]
+    regressions = compare(results, baseline, args.threshold)
+
+    print(f"{'benchmark':<40}{'ns/op':>12}{'baseline':>12}{'change':>9}")
+    for name, result in results.items():
+        line = f"{name:<40}{result['ns_per_op']:>12.1f}"
+        reference = baseline.get(name)
+        if reference:
+            change = result["ns_per_op"] / reference["ns_per_op"] - 1.0
+            line += f"{reference['ns_per_op']:>12.1f}{change:>+9.1%}"
+            if name in regressions:
+                line += "  REGRESSION"
+        print(line)
+
+    document = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "benchmarks": results,
+    }
+    for path in (args.output, args.save):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(document, f, indent=2)
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
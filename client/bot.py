@@ -0,0 +1,332 @@
+"""Bot player that picks its moves with Monte Carlo Tree Search.
+
+The bot plays through a GameSession over a regular NetworkClient, so it can fill a
+lobby that would otherwise wait for a second human. Each decision runs a time-bounded search:
+every iteration samples the opponent's hidden hand and the deck order from the cards
+the bot cannot see, walks down the tree with UCB and finishes the game with a random
+playout. Tree nodes live in a transposition table keyed on the information set of
+the player to move (what that player can see) with LRU eviction, so statistics are
+shared between samples that differ only in hidden cards and reused by the next move.
+
+Moves follow the server's rules: a card must match the suit or rank of the top card
+(queens are not wild, unlike in Player.play_card), a 7 makes the opponent take two
+cards and a 7 or an A skips the opponent.
+
+Usage:
+    python bot.py --ip 127.0.0.1 --port 8080 --name bot --move-time-ms 50
+"""
+import argparse
+import math
+import random
+import time
+from collections import OrderedDict
+
+from card import Card, CARD_COUNT, MATCH_MASKS, cards_from_mask
+from game_session import FINISHED, GameSession, GameState
+
+DRAW = CARD_COUNT  # Action id for drawing a card; other actions are card codes
+SEVEN_RANK = 0  # Rank index of '7' (code >> 2)
+ACE_RANK = 7  # Rank index of 'A'
+STALEMATE = -1
+ALL_CARDS = (1 << CARD_COUNT) - 1
+
+
+class _Game:
+    """Minimal two-player game used inside the search; hands are card masks."""
+    __slots__ = ("hands", "top", "deck", "discard", "to_move", "winner", "rng")
+
+    def __init__(self, hands, top, deck, discard, to_move, rng):
+        self.hands = hands
+        self.top = top
+        self.deck = deck  # Card codes, the next card to draw is at the end
+        self.discard = discard  # Card codes below the top card
+        self.to_move = to_move
+        self.winner = None
+        self.rng = rng
+
+    def key(self) -> int:
+        """Information set of the player on turn.
+
+        Packs that player's hand, the top card, the player on turn, the number of cards
+        in the opponent's hand and the deck size. The opponent's cards and the deck
+        order are hidden, so samples that differ only in those share a node.
+        """
+        player = self.to_move
+        return (self.hands[player] | self.top << 32 | player << 37
+                | self.hands[1 - player].bit_count() << 38 | len(self.deck) << 44)
+
+    def actions(self) -> list[int]:
+        """Playable card codes for the player on turn, plus drawing."""
+        legal = self.hands[self.to_move] & MATCH_MASKS[self.top]
+        actions = [card.code for card in cards_from_mask(legal)]
+        actions.append(DRAW)
+        return actions
+
+    def apply(self, action: int):
+        """Play a card or draw, following the server's turn rules."""
+        player = self.to_move
+        opponent = 1 - player
+        if action == DRAW:
+            if not self.deck:
+                if not self.discard:
+                    self.winner = STALEMATE
+                    return
+                # Refill the deck from the discard pile, the top card stays
+                self.deck, self.discard = self.discard, []
+                self.rng.shuffle(self.deck)
+            self.hands[player] |= 1 << self.deck.pop()
+            self.to_move = opponent
+            return
+
+        self.hands[player] &= ~(1 << action)
+        self.discard.append(self.top)
+        self.top = action
+        if not self.hands[player]:
+            self.winner = player
+            return
+        rank = action >> 2
+        if rank == SEVEN_RANK:
+            for _ in range(2):
+                if self.deck:
+                    self.hands[opponent] |= 1 << self.deck.pop()
+        elif rank != ACE_RANK:
+            self.to_move = opponent
+
+    def playout(self, max_plies: int):
+        """Finish the game with random legal cards, drawing only without one."""
+        rng = self.rng
+        for _ in range(max_plies):
+            if self.winner is not None:
+                return
+            legal = self.hands[self.to_move] & MATCH_MASKS[self.top]
+            if legal:
+                self.apply(rng.choice(cards_from_mask(legal)).code)
+            else:
+                self.apply(DRAW)
+        self.winner = STALEMATE
+
+
+class MctsSearch:
+    """Time-bounded determinized MCTS with an LRU transposition table."""
+
+    def __init__(self, move_time_ms: float = 50.0, table_size: int = 200_000,
+                 exploration: float = 0.7, max_iterations: int = 1_000_000,
+                 playout_plies: int = 200, seed: int | None = None):
+        """Configure the search.
+
+        Args:
+            move_time_ms: Time budget of a single decision in milliseconds.
+            table_size: Maximum number of nodes kept in the transposition table.
+            exploration: UCB exploration constant.
+            max_iterations: Upper bound of iterations per decision.
+            playout_plies: Plies after which a random playout counts as a stalemate.
+            seed: Seed for sampling and playouts.
+        """
+        self.move_time_ms = move_time_ms
+        self.table_size = table_size
+        self.exploration = exploration
+        self.max_iterations = max_iterations
+        self.playout_plies = playout_plies
+        self.rng = random.Random(seed)
+        # State key -> [visits, {action: [visits, reward]}]
+        self.table: OrderedDict[int, list] = OrderedDict()
+        self.last_search = {}
+        self.totals = {"searches": 0, "iterations": 0, "table_hits": 0,
+                       "table_misses": 0, "evictions": 0, "time_ms": 0.0}
+
+    def choose(self, hand: list[Card], top: Card, opponent_cards: int, deck_size: int,
+               excluded=()) -> int | None:
+        """Pick the best action for the player on turn.
+
+        Args:
+            hand: The bot's cards.
+            top: Top card of the discard pile.
+            opponent_cards: Number of cards in the opponent's hand.
+            deck_size: Cards left in the deck.
+            excluded: Actions that must not be chosen (e.g. moves the server refused).
+
+        Returns:
+            int | None: A card code from the hand, DRAW, or None if every action is excluded.
+        """
+        start = time.perf_counter()
+        deadline = start + self.move_time_ms / 1000.0
+        hand_mask = 0
+        for card in hand:
+            hand_mask |= card.mask
+        unseen = [card.code for card in cards_from_mask(ALL_CARDS & ~hand_mask & ~top.mask)]
+        opponent_cards = min(opponent_cards, len(unseen))
+        deck_size = min(deck_size, len(unseen) - opponent_cards)
+
+        root: dict[int, list] = {}
+        root_actions = [a for a in _Game([hand_mask, 0], top.code, [], [], 0, self.rng).actions()
+                        if a not in excluded]
+        if len(root_actions) <= 1:
+            return root_actions[0] if root_actions else None
+
+        iterations = hits = misses = evictions = 0
+        while iterations < self.max_iterations and time.perf_counter() < deadline:
+            iterations += 1
+
+            # Sample the hidden information: opponent hand, deck order and the rest of the pile
+            self.rng.shuffle(unseen)
+            opponent = 0
+            for code in unseen[:opponent_cards]:
+                opponent |= 1 << code
+            deck = unseen[opponent_cards:opponent_cards + deck_size]
+            discard = unseen[opponent_cards + deck_size:]
+            game = _Game([hand_mask, opponent], top.code, deck, discard, 0, self.rng)
+
+            # The root is shared by all samples, deeper nodes by equal information sets
+            action = self._select(root, root_actions, iterations)
+            path = [(root, action, 0)]
+            game.apply(action)
+            while game.winner is None:
+                key = game.key()
+                node = self.table.get(key)
+                if node is None:
+                    misses += 1
+                    self.table[key] = [0, {}]
+                    if len(self.table) > self.table_size:
+                        self.table.popitem(last=False)
+                        evictions += 1
+                    break
+                hits += 1
+                self.table.move_to_end(key)
+                player = game.to_move
+                node[0] += 1
+                action = self._select(node[1], game.actions(), node[0])
+                path.append((node[1], action, player))
+                game.apply(action)
+
+            game.playout(self.playout_plies)
+            for stats, action, player in path:
+                entry = stats.setdefault(action, [0, 0.0])
+                entry[0] += 1
+                if game.winner == player:
+                    entry[1] += 1.0
+                elif game.winner == STALEMATE:
+                    entry[1] += 0.5
+
+        best = max(root_actions, key=lambda a: root.get(a, (0, 0.0))[0])
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        self.last_search = {
+            "iterations": iterations,
+            "time_ms": elapsed_ms,
+            "table_size": len(self.table),
+            "table_hits": hits,
+            "table_misses": misses,
+            "evictions": evictions,
+            "action": "draw" if best == DRAW else str(Card.from_code(best)),
+            "root": {("draw" if a == DRAW else str(Card.from_code(a))): {"visits": n, "value": w / n if n else 0.0}
+                     for a, (n, w) in root.items()},
+        }
+        self.totals["searches"] += 1
+        self.totals["iterations"] += iterations
+        self.totals["table_hits"] += hits
+        self.totals["table_misses"] += misses
+        self.totals["evictions"] += evictions
+        self.totals["time_ms"] += elapsed_ms
+        return best
+
+    def _select(self, stats: dict, actions: list[int], visits: int) -> int:
+        """UCB1 over the actions available in this sample; untried actions go first."""
+        untried = [a for a in actions if a not in stats]
+        if untried:
+            return self.rng.choice(untried)
+        log_visits = math.log(max(visits, 1))
+        best, best_score = actions[0], -1.0
+        for action in actions:
+            n, w = stats[action]
+            score = w / n + self.exploration * math.sqrt(log_visits / n)
+            if score > best_score:
+                best, best_score = action, score
+        return best
+
+    def get_stats(self) -> dict:
+        """Search statistics: totals over all decisions and details of the last one."""
+        stats = dict(self.totals)
+        stats["table_size"] = len(self.table)
+        stats["mean_iterations"] = stats["iterations"] / stats["searches"] if stats["searches"] else 0.0
+        stats["last_search"] = self.last_search
+        return stats
+
+
+class BotPlayer:
+    """Plays a whole game through a GameSession, one MCTS decision per turn."""
+
+    def __init__(self, name: str, move_time_ms: float = 50.0, table_size: int = 200_000,
+                 seed: int | None = None):
+        self.name = name
+        # Without predicted moves every state comes from the server, so an error always
+        # answers the pending move
+        self.session = GameSession(name, predict=False)
+        self.client = self.session.client
+        self.search = MctsSearch(move_time_ms=move_time_ms, table_size=table_size, seed=seed)
+        self.rejected = set()  # Cards the server refused in the current position
+        self.pending = None  # Card code (or DRAW) of the move waiting for the server
+        self.session.on("state", self._on_state)
+        self.session.on("server_error", self._on_server_error)
+        self.session.on("game_over", lambda text, winner: print(f"{self.name}: {text}"))
+        self.session.on("closed", lambda reason: print(f"{self.name}: {reason}"))
+
+    def run(self, ip: str, port: int):
+        """Connect and play until the game is over or the connection is lost."""
+        # Wait for the server's answer for as long as the client keeps running
+        self.session.connect_timeout = None
+        self.session.connect(ip, port)
+        while self.session.phase != FINISHED:
+            # One message at a time, so a refusal is matched with the move it answers
+            if not self.session.poll(timeout=0.5, max_messages=1) and not self.client.running:
+                break
+        self.session.close()
+
+    def _on_state(self, state: GameState):
+        self.rejected.clear()
+        self.pending = None
+        self._take_turn(state)
+
+    def _on_server_error(self, text: str):
+        if self.pending is None:
+            return
+        # The position moved on before the move arrived (e.g. a lost state), try something else
+        print(f"{self.name}: {text}")
+        self.rejected.add(self.pending)
+        self.pending = None
+        self._take_turn(self.session.state)
+
+    def _take_turn(self, state: GameState):
+        """Choose and send a move if it is the bot's turn."""
+        if not self.session.is_my_turn or state.top_card is None:
+            return
+        opponent_cards = sum(size for player, size in state.hand_sizes.items() if player != self.name)
+
+        action = self.search.choose(list(state.hand), state.top_card, opponent_cards, state.deck_size,
+                                    excluded=self.rejected)
+        self.pending = action
+        if action is None:
+            return
+        if action == DRAW:
+            self.session.draw_card()
+        else:
+            self.session.play_card(Card.from_code(action))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an MCTS bot player.")
+    parser.add_argument("--ip", default="127.0.0.1", help="server address")
+    parser.add_argument("--port", type=int, default=8080, help="server port")
+    parser.add_argument("--name", default="bot", help="player name")
+    parser.add_argument("--move-time-ms", type=float, default=50.0, help="time budget per move")
+    parser.add_argument("--table-size", type=int, default=200_000, help="transposition table capacity")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    args = parser.parse_args()
+
+    bot = BotPlayer(args.name, move_time_ms=args.move_time_ms, table_size=args.table_size, seed=args.seed)
+    bot.run(args.ip, args.port)
+    stats = bot.search.get_stats()
+    print(f"{stats['searches']} decisions, {stats['mean_iterations']:.0f} iterations per decision, "
+          f"{stats['table_size']} nodes in the table")
+
+
+if __name__ == "__main__":
+    main()
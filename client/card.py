@@ -1,17 +1,180 @@
 """Class representing sole card."""
+import ast
+
+RANKS: tuple[str, ...] = ('7', '8', '9', '10', 'J', 'Q', 'K', 'A')
+SUITS: tuple[str, ...] = ('♥', '♦', '♣', '♠')
+CARD_COUNT: int = len(RANKS) * len(SUITS)
+
+# Upper bound for the cache of parsed card strings, so odd input can't grow it forever
+_MAX_STRING_CACHE = 256
 
 
 class Card:
-    def __init__(self, rank, suit):
-        """Represents a playing card with a rank and a suit.
+    """Represents a playing card with a rank and a suit.
+
+    Prší uses only 32 distinct cards, so every card is an interned flyweight:
+    ``Card('10', '♥')`` always returns the same object. Each card is identified by
+    a compact code ``rank_index * 4 + suit_index`` in the range 0-31, which is also
+    its hash, so cards compare and hash as cheaply as integers. As the same objects
+    are shared by every hand and deck, cards are immutable.
+
+    Attributes:
+        code: The 0-31 integer encoding of the card.
+        mask: ``1 << code``, the card's bit in a hand bitmask.
+        rank: The rank of the card (e.g., '7', '8', 'K', 'A').
+        suit: The suit of the card (e.g., '♥', '♦', '♣', '♠').
+    """
+    __slots__ = ("code", "mask", "rank", "suit")
+
+    def __new__(cls, rank: str, suit: str):
+        """Return the interned card for a rank and a suit.
+
+        Raises:
+            ValueError: If the rank or suit is not part of the deck.
+        """
+        card = _BY_RANK_SUIT.get((rank, suit))
+        if card is None:
+            raise ValueError(f"Unknown card: {rank}{suit}")
+        return card
+
+    @staticmethod
+    def from_code(code: int) -> "Card":
+        """Return the card with the given 0-31 code."""
+        return _BY_CODE[code]
+
+    @staticmethod
+    def from_dict(card: dict) -> "Card":
+        """Return the card described by the server's ``{"value", "suit"}`` object.
 
-        Attributes:
-            rank: The rank of the card (e.g., '7', '8', 'K', 'A').
-            suit: The suit of the card (e.g., 'Hearts', 'Diamonds', 'Clubs', 'Spades').
+        Raises:
+            ValueError: If the object does not describe a card.
         """
-        self.rank: str = rank
-        self.suit: str = suit
+        found = _BY_RANK_SUIT.get((card.get("value"), card.get("suit")))
+        if found is None:
+            raise ValueError(f"Unknown card: {card}")
+        return found
+
+    @staticmethod
+    def from_string(text: str) -> "Card":
+        """Return the card for its display string (e.g. "10♥").
+
+        Raises:
+            ValueError: If the string does not describe a card.
+        """
+        found = _BY_STRING.get(text)
+        if found is None:
+            raise ValueError(f"Unknown card: {text}")
+        return found
+
+    @staticmethod
+    def parse(value) -> "Card | None":
+        """Return the card for any representation the server sends, or None.
+
+        Accepts a Card, a ``{"value", "suit"}`` dict, a display string like "10♥" or
+        the string form of such a dict. Known strings are resolved with a single
+        dictionary lookup; others are parsed once and remembered if they are a card.
+        """
+        if isinstance(value, Card):
+            return value
+        if isinstance(value, dict):
+            return _BY_RANK_SUIT.get((value.get("value"), value.get("suit")))
+        if isinstance(value, str):
+            found = _BY_STRING.get(value)
+            if found is None:
+                try:
+                    parsed = ast.literal_eval(value)
+                except (ValueError, SyntaxError):
+                    return None
+                if isinstance(parsed, dict):
+                    found = _BY_RANK_SUIT.get((parsed.get("value"), parsed.get("suit")))
+                    if found is not None and len(_BY_STRING) < _MAX_STRING_CACHE:
+                        _BY_STRING[value] = found
+            return found
+        return None
+
+    def to_dict(self) -> dict:
+        """Return the card in the server's ``{"value", "suit"}`` format."""
+        return {"value": self.rank, "suit": self.suit}
+
+    def __hash__(self):
+        return self.code
+
+    def __eq__(self, other):
+        if isinstance(other, Card):
+            return self.code == other.code
+        return NotImplemented
+
+    def __lt__(self, other):
+        if isinstance(other, Card):
+            return self.code < other.code
+        return NotImplemented
+
+    def __reduce__(self):
+        """Unpickle to the interned instance."""
+        return Card.from_code, (self.code,)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Card is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Card is immutable")
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return f"Card({self.rank!r}, {self.suit!r})"
 
     def __str__(self):
         """pretty print a card"""
         return self.rank + self.suit
+
+
+def _build_card_table() -> list[Card]:
+    """Create the 32 interned cards, ordered by code."""
+    table = []
+    for rank in RANKS:
+        for suit in SUITS:
+            card = object.__new__(Card)
+            code = len(table)
+            object.__setattr__(card, "code", code)
+            object.__setattr__(card, "mask", 1 << code)
+            object.__setattr__(card, "rank", rank)
+            object.__setattr__(card, "suit", suit)
+            table.append(card)
+    return table
+
+
+_BY_CODE: list[Card] = _build_card_table()
+_BY_RANK_SUIT: dict[tuple[str, str], Card] = {(card.rank, card.suit): card for card in _BY_CODE}
+_BY_STRING: dict[str, Card] = {str(card): card for card in _BY_CODE}
+
+
+def cards_from_mask(mask: int) -> tuple[Card, ...]:
+    """Return the cards whose bits are set in a hand bitmask, ordered by code."""
+    cards = []
+    while mask:
+        low_bit = mask & -mask
+        cards.append(_BY_CODE[low_bit.bit_length() - 1])
+        mask ^= low_bit
+    return tuple(cards)
+
+
+def mask_from_cards(cards) -> int:
+    """Return the hand bitmask of an iterable of cards."""
+    mask = 0
+    for card in cards:
+        mask |= card.mask
+    return mask
+
+
+# Precomputed bitmasks over card codes: every card of a suit, every card of a rank,
+# and for each possible top card of the discard pile the cards that may be played on it
+SUIT_MASKS: dict[str, int] = {suit: mask_from_cards(c for c in _BY_CODE if c.suit == suit) for suit in SUITS}
+RANK_MASKS: dict[str, int] = {rank: mask_from_cards(c for c in _BY_CODE if c.rank == rank) for rank in RANKS}
+LEGAL_MASKS: tuple[int, ...] = tuple(SUIT_MASKS[c.suit] | RANK_MASKS[c.rank] | RANK_MASKS['Q'] for c in _BY_CODE)
+# The server is stricter than Player.play_card: only the suit or rank of the top card, no wild queens
+MATCH_MASKS: tuple[int, ...] = tuple(SUIT_MASKS[c.suit] | RANK_MASKS[c.rank] for c in _BY_CODE)
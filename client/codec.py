@@ -0,0 +1,321 @@
+"""Wire codecs of the game protocol: JSON and a compact fixed-layout binary format.
+
+The client asks for the binary codec in its connect message ("codec": "binary").
+A server that supports it confirms with "codec": "binary" in the connect_ack, or
+by answering in binary, and from then on both sides send binary for every message
+type listed in LAYOUTS. The connect handshake itself, other message types and
+messages a layout cannot represent stay JSON, which is also all an older server or
+client speaks. Receivers tell the two apart by the first byte: a JSON object
+starts with "{", a binary message with its type id.
+
+Binary message (little endian):
+    u8      type id, see LAYOUTS
+    flags   presence flags, one byte per 8 fields of the layout, bit i set if field i
+            follows
+    fields  the present fields in layout order
+
+Field kinds:
+    u8, u32, u64, i32  integers
+    card    u8 card code 0-31 (see Card)
+    name    u8 length + UTF-8
+    text    u16 length + UTF-8
+    names   u8 count + names
+    hands   for every name in "players": u8 count + card codes, or NO_HAND if that
+            player's hand is not in the message
+    hand_map  u8 count + (name, u8 count + card codes) per player
+    sizes   u8 count + (name, u8 number) per player
+
+Binary messages decode to the same dicts as JSON ones, except that cards are Card
+objects instead of {"value", "suit"} objects or display strings.
+"""
+import json
+import struct
+
+from card import CARD_COUNT, Card
+
+JSON = "json"
+BINARY = "binary"
+
+_CARDS: tuple[Card, ...] = tuple(Card.from_code(code) for code in range(CARD_COUNT))
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+_I32 = struct.Struct("<i")
+# Count of a hand that is not included in the message (the opponent's, for a player)
+NO_HAND = 0xFF
+
+
+# Readers take the datagram, the offset of the field and the message decoded so far,
+# and return the value and the offset after the field.
+
+def _read_u8(data, pos, message):
+    return data[pos], pos + 1
+
+
+def _read_struct(layout: struct.Struct):
+    size = layout.size
+    unpack_from = layout.unpack_from
+
+    def read(data, pos, message):
+        return unpack_from(data, pos)[0], pos + size
+    return read
+
+
+def _read_card(data, pos, message):
+    return _CARDS[data[pos]], pos + 1
+
+
+def _read_name(data, pos, message):
+    end = pos + 1 + data[pos]
+    if end > len(data):
+        raise ValueError("Truncated string")
+    return str(data[pos + 1:end], "utf-8"), end
+
+
+def _read_text(data, pos, message):
+    start = pos + 2
+    end = start + _U16.unpack_from(data, pos)[0]
+    if end > len(data):
+        raise ValueError("Truncated string")
+    return str(data[start:end], "utf-8"), end
+
+
+def _read_cards(data, pos):
+    end = pos + 1 + data[pos]
+    if end > len(data):
+        raise ValueError("Truncated card list")
+    return [_CARDS[code] for code in data[pos + 1:end]], end
+
+
+def _read_names(data, pos, message):
+    names = []
+    count = data[pos]
+    pos += 1
+    for _ in range(count):
+        name, pos = _read_name(data, pos, message)
+        names.append(name)
+    return names, pos
+
+
+def _read_sizes(data, pos, message):
+    sizes = {}
+    count = data[pos]
+    pos += 1
+    for _ in range(count):
+        name, pos = _read_name(data, pos, message)
+        sizes[name] = data[pos]
+        pos += 1
+    return sizes, pos
+
+
+def _read_hand_map(data, pos, message):
+    hands = {}
+    count = data[pos]
+    pos += 1
+    for _ in range(count):
+        name, pos = _read_name(data, pos, message)
+        hands[name], pos = _read_cards(data, pos)
+    return hands, pos
+
+
+# Writers append the field to a bytearray.
+
+def _write_u8(out, value, message):
+    out.append(value)
+
+
+def _write_struct(layout: struct.Struct):
+    pack = layout.pack
+
+    def write(out, value, message):
+        out += pack(value)
+    return write
+
+
+def _write_card(out, value, message):
+    out.append(_card_code(value))
+
+
+def _write_name(out, value, message):
+    encoded = value.encode("utf-8")
+    out.append(len(encoded))
+    out += encoded
+
+
+def _write_text(out, value, message):
+    encoded = value.encode("utf-8")
+    out += _U16.pack(len(encoded))
+    out += encoded
+
+
+def _write_cards(out, cards):
+    out.append(len(cards))
+    out += bytes(_card_code(card) for card in cards)
+
+
+def _write_names(out, value, message):
+    out.append(len(value))
+    for name in value:
+        _write_name(out, name, message)
+
+
+def _write_sizes(out, value, message):
+    out.append(len(value))
+    for name, size in value.items():
+        _write_name(out, name, message)
+        out.append(size)
+
+
+def _write_hand_map(out, value, message):
+    out.append(len(value))
+    for name, cards in value.items():
+        _write_name(out, name, message)
+        _write_cards(out, cards)
+
+
+def _card_code(value) -> int:
+    card = Card.parse(value)
+    if card is None:
+        raise ValueError(f"Unknown card: {value}")
+    return card.code
+
+
+# The hands of a game_state_update are stored under the player names, in "players" order
+
+def _read_hands(data, pos, message):
+    for name in message.get("players", ()):
+        if data[pos] == NO_HAND:
+            pos += 1
+        else:
+            message[name], pos = _read_cards(data, pos)
+    return None, pos
+
+
+def _write_hands(out, value, message):
+    for name in message["players"]:
+        cards = message.get(name)
+        if cards is None:
+            out.append(NO_HAND)
+        elif len(cards) >= NO_HAND:
+            raise ValueError("Too many cards")
+        else:
+            _write_cards(out, cards)
+
+
+def _has_hands(message) -> bool:
+    return any(name in message for name in message.get("players") or ())
+
+
+_KINDS = {
+    "u8": (_read_u8, _write_u8),
+    "u32": (_read_struct(_U32), _write_struct(_U32)),
+    "u64": (_read_struct(_U64), _write_struct(_U64)),
+    "i32": (_read_struct(_I32), _write_struct(_I32)),
+    "card": (_read_card, _write_card),
+    "name": (_read_name, _write_name),
+    "text": (_read_text, _write_text),
+    "names": (_read_names, _write_names),
+    "hands": (_read_hands, _write_hands),
+    "hand_map": (_read_hand_map, _write_hand_map),
+    "sizes": (_read_sizes, _write_sizes),
+}
+
+# Message type -> (type id, fields)
+LAYOUTS: dict[str, tuple[int, tuple[tuple[str, str], ...]]] = {
+    # Client to server
+    "heartbeat": (1, (("name", "name"), ("ts", "u64"), ("rtt", "u32"))),
+    "play_card": (2, (("card", "card"), ("player_name", "name"), ("seq", "u32"))),
+    "draw_card": (3, (("player_name", "name"), ("seq", "u32"))),
+    "disconnect": (4, (("name", "name"),)),
+    "resume": (5, (("name", "name"), ("version", "i32"))),
+    "snapshot_request": (6, (("name", "name"),)),
+    # Server to client
+    "game_state_update": (16, (("players", "names"), ("current_player", "name"), ("deck_size", "u8"),
+                               ("discard_pile", "u8"), ("top_card", "card"), ("hands", "hands"),
+                               ("hand_sizes", "sizes"), ("version", "u32"))),
+    "state_delta": (17, (("version", "u32"), ("base", "u32"), ("current_player", "name"), ("deck_size", "u8"),
+                         ("discard_pile", "u8"), ("top_card", "card"), ("removed", "hand_map"),
+                         ("added", "hand_map"), ("hand_sizes", "sizes"))),
+    "error": (18, (("message", "text"), ("version", "u32"))),
+    "ack": (19, (("seq", "u32"),)),
+    "heartbeat_ack": (20, (("ts", "u64"), ("version", "u32"))),
+    "resume_ack": (21, (("version", "u32"),)),
+    "resume_rejected": (22, (("message", "text"),)),
+    "player_disconnected": (23, (("player", "name"), ("message", "text"))),
+    "player_reconnected": (24, (("player", "name"), ("message", "text"))),
+    "player_played_card": (25, (("player_name", "name"), ("message", "text"))),
+    "player_drawn_card": (26, (("player_name", "name"), ("message", "text"))),
+    "game_over": (27, (("winner", "name"), ("message", "text"))),
+}
+
+
+def _compile(fields):
+    flag_bytes = (len(fields) + 7) // 8
+    return flag_bytes, tuple((1 << index, name, *_KINDS[kind]) for index, (name, kind) in enumerate(fields))
+
+
+_ENCODERS = {message_type: (type_id, *_compile(fields)) for message_type, (type_id, fields) in LAYOUTS.items()}
+_DECODERS = {type_id: (message_type, *_compile(fields)) for message_type, (type_id, fields) in LAYOUTS.items()}
+
+
+def is_binary(data) -> bool:
+    """True if a datagram is a binary message rather than JSON."""
+    return bool(data) and data[0] != 0x7B  # "{"
+
+
+def encode(message: dict, codec: str = JSON) -> bytes:
+    """Encode a message; binary only if the codec is BINARY and the message fits a layout."""
+    if codec == BINARY:
+        encoder = _ENCODERS.get(message.get("type"))
+        if encoder is not None:
+            try:
+                return _encode_binary(message, *encoder)
+            except (ValueError, TypeError, KeyError, struct.error):
+                pass  # Out of range or unexpected values are left to JSON
+    return json.dumps(message, ensure_ascii=False).encode()
+
+
+def _encode_binary(message: dict, type_id: int, flag_bytes: int, fields) -> bytes:
+    out = bytearray(1 + flag_bytes)
+    out[0] = type_id
+    flags = 0
+    for bit, name, _, write in fields:
+        if name == "hands":
+            if not _has_hands(message):
+                continue
+            value = None
+        else:
+            value = message.get(name)
+            if value is None:
+                continue
+        flags |= bit
+        write(out, value, message)
+    out[1:1 + flag_bytes] = flags.to_bytes(flag_bytes, "little")
+    return bytes(out)
+
+
+def decode(data) -> dict:
+    """Decode a JSON or binary datagram, given as bytes or a memoryview.
+
+    Raises:
+        ValueError: If the datagram is malformed (including invalid JSON and UTF-8).
+    """
+    if not is_binary(data):
+        return json.loads(str(data, "utf-8"))
+    try:
+        message_type, flag_bytes, fields = _DECODERS[data[0]]
+        pos = 1 + flag_bytes
+        if pos > len(data):
+            raise ValueError("Truncated binary message")
+        flags = int.from_bytes(data[1:pos], "little")
+        message = {"type": message_type}
+        for bit, name, read, _ in fields:
+            if flags & bit:
+                value, pos = read(data, pos, message)
+                if value is not None:
+                    message[name] = value
+    except (KeyError, IndexError, struct.error) as e:
+        raise ValueError(f"Malformed binary message: {e!r}") from None
+    if pos != len(data):
+        raise ValueError("Trailing bytes after binary message")
+    return message
@@ -1,47 +1,87 @@
 """Class representing deck of card."""
 
 import random
-from card import Card
+from collections.abc import Callable
+from card import Card, RANKS, SUITS
 
 
 class Deck:
-    def __init__(self):
+    def __init__(self, seed: int | None = None, cards: list[Card] | None = None,
+                 refill_key: Callable[[Card], float] | None = None):
         """Create a deck of playing cards.
 
         A standard deck consists of 32 cards with ranks 7 through Ace across four suits.
+        The top of the deck is the end of ``cards``, so drawing and dealing only pop
+        from the end of the list.
+
+        Args:
+            seed: Seed for the deck's own random generator. Decks created with the same
+                seed shuffle identically, which makes simulations reproducible.
+            cards: Cards of the deck in dealing order (the first card is dealt first);
+                a standard deck if omitted.
+            refill_key: Orders the cards of a refilled deck instead of a shuffle; the
+                card with the lowest key is drawn first.
         """
-        ranks: list[str] = ['7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-        suits: list[str] = ['♥', '♦', '♣', '♠']
-        self.cards: list[Card] = [Card(rank, suit) for rank in ranks for suit in suits]
-        self.discard_pile = []
+        self.rng = random.Random(seed)
+        if cards is None:
+            self.cards: list[Card] = [Card(rank, suit) for rank in RANKS for suit in SUITS]
+        else:
+            self.cards = cards[::-1]
+        self.refill_key = refill_key
+        self.discard_pile: list[Card] = []
 
     def shuffle(self):
         """Shuffle the deck."""
-        random.shuffle(self.cards)
+        self.rng.shuffle(self.cards)
 
     def deal(self, num_cards: int) -> list[Card]:
-        """Deal a number of cards from the deck.
+        """Deal a number of cards from the top of the deck.
 
         Args:
             num_cards: The number of cards to deal.
 
         Returns:
-            list[Card]: A list of dealt cards.
+            list[Card]: A list of dealt cards, the top card first.
         """
-        dealt_cards = self.cards[:num_cards]
-        self.cards = self.cards[num_cards:]
+        if num_cards <= 0:
+            return []
+        dealt_cards = self.cards[:-num_cards - 1:-1]
+        del self.cards[-num_cards:]
         return dealt_cards
 
     def draw_card(self) -> Card | None:
         """Draw a single card from the deck.
 
+        When the deck is empty it is refilled from the discard pile first, like the server does.
+
         Returns:
-            Card | None: The drawn card, or None if the deck is empty.
+            Card | None: The drawn card, or None if neither the deck nor the discard pile has cards left.
         """
+        if not self.cards:
+            self.refill_from_discard()
         if self.cards:
-            return self.cards.pop(0)
+            return self.cards.pop()
         return None
 
+    def refill_from_discard(self) -> int:
+        """Shuffle the discard pile, except its top card, back under the deck.
+
+        The cards are put in refill_key order instead when the deck has one.
+
+        Returns:
+            int: The number of cards moved into the deck.
+        """
+        if len(self.discard_pile) <= 1:
+            return 0
+        refill = self.discard_pile[:-1]
+        if self.refill_key is None:
+            self.rng.shuffle(refill)
+        else:
+            refill.sort(key=self.refill_key, reverse=True)
+        self.cards[:0] = refill
+        del self.discard_pile[:-1]
+        return len(refill)
+
     def add_to_discard(self, card: Card):
         """Add a card to the discard pile.
 
@@ -58,12 +98,16 @@ class Deck:
         """
         return self.discard_pile[-1] if self.discard_pile else None
 
+    def __len__(self):
+        """Return the number of cards left in the deck."""
+        return len(self.cards)
+
     def __str__(self):
         """Return a string representation of the deck and discard pile.
 
         Returns:
-            str: A string detailing the cards in the deck and the discard pile.
+            str: A string detailing the cards in the deck (top first) and the discard pile.
         """
-        deck = [card.rank + " " + card.suit for card in self.cards]
+        deck = [card.rank + " " + card.suit for card in reversed(self.cards)]
         pile = [card.rank + " " + card.suit for card in self.discard_pile]
         return f"Deck: {deck}\nPile: {pile}"
@@ -0,0 +1,149 @@
+"""Fragmentation and reassembly of messages larger than one datagram.
+
+A message that does not fit into MAX_DATAGRAM bytes is split into fragments, each
+sent as its own datagram with a header in front of a slice of the message:
+
+    u8   FRAGMENT_MAGIC (never the first byte of a JSON or binary message)
+    u32  message id, chosen by the sender
+    u8   fragment index
+    u8   fragment count
+
+All integers are little endian. Smaller messages are sent as they are, so peers that
+never fragment interoperate unchanged. The receiver keeps the fragments of
+incomplete messages until the last one arrives, for at most a timeout and within a
+memory cap; UDP may lose any fragment, and a message with a missing fragment is
+dropped like a lost datagram.
+"""
+import itertools
+import random
+import struct
+import time
+
+FRAGMENT_MAGIC = 0xFE
+HEADER = struct.Struct("<BIBB")
+# Largest datagram sent in one piece, below the usual path MTU so IP never fragments it
+MAX_DATAGRAM = 1200
+MAX_FRAGMENTS = 255
+# Any UDP datagram fits, so the kernel never truncates one
+RECEIVE_BUFFER_SIZE = 65536
+
+
+def is_fragment(data) -> bool:
+    """True if a datagram is a fragment rather than a whole message."""
+    return len(data) >= HEADER.size and data[0] == FRAGMENT_MAGIC
+
+
+class Fragmenter:
+    """Splits outgoing messages into datagrams; safe to use from several threads."""
+
+    def __init__(self, max_datagram: int = MAX_DATAGRAM):
+        self.max_datagram = max_datagram
+        self._ids = itertools.count(random.randrange(1 << 32))
+
+    def split(self, data: bytes) -> list[bytes]:
+        """Datagrams to send for a message: the message itself if it fits into one.
+
+        Raises:
+            ValueError: If the message needs more than MAX_FRAGMENTS fragments.
+        """
+        if len(data) <= self.max_datagram:
+            return [data]
+        size = self.max_datagram - HEADER.size
+        count = -(-len(data) // size)
+        if count > MAX_FRAGMENTS:
+            raise ValueError(f"Message of {len(data)} bytes is too large to send")
+        message_id = next(self._ids) & 0xFFFFFFFF
+        return [HEADER.pack(FRAGMENT_MAGIC, message_id, index, count) + data[index * size:(index + 1) * size]
+                for index in range(count)]
+
+
+class _Partial:
+    """Fragments of one message received so far."""
+    __slots__ = ("fragments", "missing", "size", "started")
+
+    def __init__(self, count: int, now: float):
+        self.fragments: list[bytes | None] = [None] * count
+        self.missing = count
+        self.size = 0
+        self.started = now
+
+
+class Reassembler:
+    """Collects fragments until their message is complete.
+
+    Incomplete messages are dropped after timeout seconds, and the oldest ones are
+    evicted when the buffered fragments would exceed max_bytes. Not thread-safe: a
+    client feeds it from its receive thread or event loop only.
+    """
+
+    def __init__(self, timeout: float = 2.0, max_bytes: int = 256 * 1024):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.partials: dict[tuple, _Partial] = {}  # Insertion ordered, so the oldest come first
+        self.buffered = 0
+        self.stats = {"fragments": 0, "reassembled": 0, "expired": 0, "evicted": 0, "invalid": 0}
+
+    def add(self, data, source=None) -> bytes | None:
+        """Store a fragment.
+
+        Args:
+            data: The datagram, header included. It is copied, so it may be a view of a
+                receive buffer that is reused afterwards.
+            source: Sender of the datagram, for receivers with several peers.
+
+        Returns:
+            bytes | None: The whole message once its last fragment arrived, otherwise None.
+        """
+        self.stats["fragments"] += 1
+        if not is_fragment(data):
+            self.stats["invalid"] += 1
+            return None
+        _, message_id, index, count = HEADER.unpack_from(data)
+        now = time.monotonic()
+        self._expire(now)
+
+        key = (source, message_id)
+        partial = self.partials.get(key)
+        if partial is None:
+            if index >= count:
+                self.stats["invalid"] += 1
+                return None
+            partial = self.partials[key] = _Partial(count, now)
+        elif index >= len(partial.fragments) or len(partial.fragments) != count:
+            self.stats["invalid"] += 1
+            return None
+        if partial.fragments[index] is not None:
+            return None  # Duplicate
+
+        payload = bytes(data[HEADER.size:])
+        while self.buffered + len(payload) > self.max_bytes:
+            oldest = next(iter(self.partials))
+            self._discard(oldest)
+            self.stats["evicted"] += 1
+            if oldest == key:
+                return None
+
+        partial.fragments[index] = payload
+        partial.missing -= 1
+        partial.size += len(payload)
+        self.buffered += len(payload)
+        if partial.missing:
+            return None
+        self._discard(key)
+        self.stats["reassembled"] += 1
+        return b"".join(partial.fragments)
+
+    def clear(self):
+        """Drop every incomplete message, e.g. for a new connection."""
+        self.partials.clear()
+        self.buffered = 0
+
+    def _expire(self, now: float):
+        for key, partial in list(self.partials.items()):
+            if now - partial.started <= self.timeout:
+                break
+            self._discard(key)
+            self.stats["expired"] += 1
+
+    def _discard(self, key):
+        self.buffered -= self.partials.pop(key).size
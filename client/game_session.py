@@ -0,0 +1,480 @@
+"""Headless game session: the client's game logic without a user interface.
+
+A GameSession owns one player's connection lifecycle, the parsed game state and the
+legal actions, and notifies observers about changes. It is fed the decoded server
+messages of its client, either by poll(), which drains the queue of a threaded
+NetworkClient, or by handle_message(), e.g. for every message an AsyncNetworkClient
+yields. The Tk UI, the bot and the load generator all drive the game through a
+session, so thousands of them can run in one process without a display.
+
+Observers subscribe with on(event, callback) and are called with:
+
+    phase         (phase)                  the lifecycle phase changed, see the constants below
+    state         (GameState)              a new game state or state delta was applied
+    hand          (hand, removed, added)   the player's hand changed; removed and added
+                                           hold only the cards that changed
+    log           (lines)                  lines for the game log: moves, errors, status changes
+    server_error  (text)                   the server refused a request
+    game_over     (text, winner)           the game ended
+    closed        (reason)                 the connection ended for any other reason
+
+poll() notifies observers once for all the messages it handled, so a UI that polls
+every frame renders only the newest state.
+
+A server that sends state_delta messages (see ProtocolState.delta) only names the
+fields and cards that changed; they are applied to the GameState in place. The
+network client drops deltas that do not continue the current version and asks for
+a full snapshot instead. The session checks the base version once more, since a delta
+can also get lost between the network thread and the session, and asks for a snapshot
+as well. The server never sends the cards of other players, only
+how many they hold (GameState.hand_sizes).
+
+Moves are predicted: a card the server's rules allow is taken out of the hand and put
+on the discard pile as soon as it is played, without waiting a round trip. The
+session keeps the last state the server sent (GameSession.confirmed) and a journal of
+the moves it has not answered yet; GameSession.state is the confirmed state with the
+journal applied. Each server state settles the moves it answers, and observers only
+hear about it if the server disagreed with the prediction. An error rolls every
+prediction back.
+"""
+import queue
+import time
+
+from card import Card, RANK_MASKS, SUIT_MASKS, cards_from_mask, mask_from_cards
+from network_client import NetworkClient
+from player import Player
+
+# Lifecycle phases
+DISCONNECTED = "disconnected"
+CONNECTING = "connecting"
+WAITING = "waiting"  # Connected, waiting for an opponent to fill the lobby
+PLAYING = "playing"
+RECONNECTING = "reconnecting"
+FINISHED = "finished"  # Game over or connection ended, see GameSession.winner
+
+# Server messages that only add a line to the game log
+LOG_MESSAGE_TYPES = ("error", "player_disconnected", "player_reconnected",
+                     "player_played_card", "player_drawn_card", "connection_status")
+
+
+def _card(value) -> Card:
+    """Card of a decoded message: already a Card if it came in binary, else a JSON card object."""
+    if value.__class__ is Card:
+        return value
+    return Card.from_dict(value)
+
+
+def _hand_sizes(message: dict, players) -> dict[str, int]:
+    """Number of cards per player; servers that send every hand leave out hand_sizes."""
+    sizes = message.get("hand_sizes")
+    if sizes is None:
+        return {player: len(message.get(player, ())) for player in players}
+    return {player: int(size) for player, size in sizes.items()}
+
+
+class GameState:
+    """A game state sent by the server, parsed for one player.
+
+    The session updates it in place when a state_delta arrives.
+    """
+    __slots__ = ("version", "players", "current_player", "deck_size", "discard_size",
+                 "top_card", "hand", "hand_mask", "hand_sizes")
+
+    def __init__(self, players: tuple[str, ...], current_player: str, deck_size: int, discard_size: int,
+                 top_card: Card | None, hand: tuple[Card, ...], hand_sizes: dict[str, int],
+                 version: int | None = None):
+        self.version = version
+        self.players = players
+        self.current_player = current_player
+        self.deck_size = deck_size
+        self.discard_size = discard_size
+        self.top_card = top_card
+        self.hand = hand  # In the server's order
+        self.hand_mask = mask_from_cards(hand)
+        self.hand_sizes = hand_sizes  # Player name -> number of cards
+
+    @classmethod
+    def from_message(cls, message: dict, name: str) -> "GameState":
+        """Parse a game_state_update (or a connect_ack that starts the game).
+
+        Raises:
+            ValueError: If a card in the message is unknown.
+        """
+        players = tuple(message.get("players", ()))
+        version = message.get("version")
+        return cls(
+            players=players,
+            current_player=message.get("current_player"),
+            deck_size=int(message.get("deck_size", 0)),
+            discard_size=int(message.get("discard_pile", 0)),
+            top_card=Card.parse(message.get("top_card")),
+            hand=tuple(_card(card) for card in message.get(name, ())),
+            hand_sizes=_hand_sizes(message, players),
+            version=int(version) if version is not None else None,
+        )
+
+    def apply_delta(self, message: dict, name: str):
+        """Apply a state_delta; only the fields and cards it names are touched.
+
+        Raises:
+            ValueError: If a card in the message is unknown.
+        """
+        if "current_player" in message:
+            self.current_player = message["current_player"]
+        if "deck_size" in message:
+            self.deck_size = int(message["deck_size"])
+        if "discard_pile" in message:
+            self.discard_size = int(message["discard_pile"])
+        if "top_card" in message:
+            self.top_card = Card.parse(message["top_card"])
+        for player, cards in message.get("removed", {}).items():
+            self.hand_sizes[player] = self.hand_sizes.get(player, 0) - len(cards)
+            if player == name:
+                mask = mask_from_cards(_card(card) for card in cards)
+                self.hand_mask &= ~mask
+                self.hand = tuple(card for card in self.hand if not card.mask & mask)
+        for player, cards in message.get("added", {}).items():
+            self.hand_sizes[player] = self.hand_sizes.get(player, 0) + len(cards)
+            if player == name:
+                added = tuple(_card(card) for card in cards)
+                self.hand_mask |= mask_from_cards(added)
+                self.hand += added
+        for player, size in message.get("hand_sizes", {}).items():
+            self.hand_sizes[player] = int(size)
+        self.version = message.get("version", self.version)
+
+    def apply_play(self, card: Card, name: str):
+        """Predict how the server applies a card the player plays.
+
+        Follows handle_message in the server: a 7 gives the opponent two cards (as far
+        as the deck reaches) and, like an ace, keeps the turn. The version is left
+        alone, it stays the one of the server state the prediction builds on.
+        """
+        self.hand_mask &= ~card.mask
+        self.hand = tuple(held for held in self.hand if held.mask != card.mask)
+        self.hand_sizes[name] = self.hand_sizes.get(name, 0) - 1
+        self.top_card = card
+        self.discard_size += 1
+        opponent = next((player for player in self.players if player != name), name)
+        if card.rank == "7":
+            drawn = min(2, self.deck_size)
+            self.deck_size -= drawn
+            self.hand_sizes[opponent] = self.hand_sizes.get(opponent, 0) + drawn
+        elif card.rank != "A":
+            self.current_player = opponent
+
+    def copy(self) -> "GameState":
+        """A copy that can be changed without touching this state."""
+        return GameState(self.players, self.current_player, self.deck_size, self.discard_size, self.top_card,
+                         self.hand, dict(self.hand_sizes), self.version)
+
+    def same_view(self, other: "GameState") -> bool:
+        """True if both states show the player the same game, whatever their versions."""
+        return (self.hand_mask == other.hand_mask and self.top_card == other.top_card
+                and self.current_player == other.current_player and self.deck_size == other.deck_size
+                and self.discard_size == other.discard_size and self.hand_sizes == other.hand_sizes)
+
+
+class GameSession:
+    """State machine of one player's game, driven by server messages."""
+    __slots__ = ("name", "client", "player", "phase", "state", "confirmed", "journal", "predict",
+                 "prediction_stats", "winner", "rejoined", "connect_timeout", "_observers", "_connect_started",
+                 "_notified_phase", "_notified_hand_mask", "_state_changed", "_log", "_pending")
+
+    def __init__(self, name: str, client=None, connect_timeout: float = 1.0, predict: bool = True):
+        """Create a disconnected session.
+
+        Args:
+            name: The player's name.
+            client: NetworkClient or AsyncNetworkClient to play through (a new
+                NetworkClient by default).
+            connect_timeout: Seconds poll() waits for the server to accept the connection.
+            predict: Show the player's moves before the server confirms them.
+        """
+        self.name = name
+        self.client = client if client is not None else NetworkClient()
+        self.player = Player(name)
+        self.phase = DISCONNECTED
+        self.state: GameState | None = None  # What the player sees: confirmed plus predicted moves
+        self.confirmed: GameState | None = None  # The last state the server sent
+        # Moves sent since the confirmed state: (card, or None for a draw; version of the state answering it)
+        self.journal: list[tuple[Card | None, int | None]] = []
+        self.predict = predict
+        self.prediction_stats = {"predicted": 0, "confirmed": 0, "rolled_back": 0}
+        self.winner = None
+        self.rejoined = False  # The server put us back into a game we had left
+        self.connect_timeout = connect_timeout
+        self._observers: dict[str, list] = {}
+        self._connect_started = None
+        self._notified_phase = DISCONNECTED
+        self._notified_hand_mask = 0
+        self._state_changed = False
+        self._log: list[str] = []
+        self._pending: list[tuple] = []  # (event, args) waiting for the next notification
+
+    def on(self, event: str, callback):
+        """Call callback whenever event happens (see the module docstring)."""
+        self._observers.setdefault(event, []).append(callback)
+
+    def off(self, event: str, callback):
+        """Stop calling a callback registered with on()."""
+        callbacks = self._observers.get(event)
+        if callbacks and callback in callbacks:
+            callbacks.remove(callback)
+
+    def _emit(self, event: str, *args):
+        # Observers may subscribe or unsubscribe while being notified
+        for callback in tuple(self._observers.get(event, ())):
+            callback(*args)
+
+    # Lifecycle
+
+    def connect(self, ip: str, port: int, **kwargs):
+        """Connect the client; returns what the client's connect() returns.
+
+        For an AsyncNetworkClient that is a coroutine the caller has to await.
+        """
+        self.state = None
+        self.confirmed = None
+        self.journal = []
+        self.winner = None
+        self.rejoined = False
+        self.player.hand_mask = 0
+        self._notified_hand_mask = 0
+        self.phase = CONNECTING
+        self._connect_started = time.monotonic()
+        self._notify()
+        return self.client.connect(ip, port, self.name, **kwargs)
+
+    def close(self):
+        """Close the client; returns what the client's close() returns."""
+        if self.phase != FINISHED:
+            self.phase = DISCONNECTED
+        self._notify()
+        return self.client.close()
+
+    def poll(self, timeout: float = 0.0, max_messages: int | None = None) -> int:
+        """Handle the messages waiting in the client's queue and notify observers once.
+
+        Args:
+            timeout: Seconds to wait for the first message; 0 returns right away.
+            max_messages: Handle at most this many messages.
+
+        Returns:
+            int: Number of messages handled.
+        """
+        message_queue = self.client.message_queue
+        metrics = getattr(self.client, "metrics", None)
+        tokens = []
+        handled = 0
+        while max_messages is None or handled < max_messages:
+            try:
+                if timeout and not handled:
+                    message = message_queue.get(timeout=timeout)
+                else:
+                    message = message_queue.get_nowait()
+            except queue.Empty:
+                break
+            if metrics is not None:
+                tokens.append((message.get("type"), metrics.dispatched(message, message_queue.qsize())))
+            self._apply(message)
+            handled += 1
+
+        if (self.phase == CONNECTING and self.connect_timeout is not None
+                and time.monotonic() - self._connect_started > self.connect_timeout):
+            self._end("Failed to connect to server")
+        self._notify()
+        if metrics is not None:
+            for message_type, token in tokens:
+                metrics.rendered(message_type, token)
+        return handled
+
+    def handle_message(self, message: dict):
+        """Apply a single server message and notify observers right away."""
+        self._apply(message)
+        self._notify()
+
+    def _apply(self, message: dict):
+        """Update the session from a server message; observers are notified later."""
+        message_type = message.get("type")
+        if message_type in ("connect_ack", "game_state_update"):
+            if message_type == "connect_ack" and message.get("waiting_for_player"):
+                self.phase = WAITING
+            elif "current_player" in message:
+                if self.phase == CONNECTING and message_type == "game_state_update":
+                    self.rejoined = True
+                self._apply_state(message)
+        elif message_type == "state_delta":
+            if self.confirmed is not None and message.get("base") == self.confirmed.version:
+                self._apply_state(message)
+            else:
+                # Applied to any other state it would corrupt the hand and the card counts
+                self.client.request_snapshot()
+        elif message_type in LOG_MESSAGE_TYPES:
+            text = message.get("message", "")
+            if message_type == "error":
+                if self.phase == CONNECTING:
+                    self._end(text or "Failed to connect to server")
+                    return
+                self._roll_back()
+                self._pending.append(("server_error", (text,)))
+            self._log.append(text)
+        elif message_type == "game_over":
+            text = message.get("message", "Game over")
+            self._log.append(text)
+            if self.phase != FINISHED:
+                self.winner = message.get("winner")
+                self.phase = FINISHED
+                self._pending.append(("game_over", (text, self.winner)))
+        elif message_type == "name_taken":
+            self._end("The player name is already in use. Please choose another name.")
+        elif message_type == "unknown":
+            self._end(str(message.get("message") or "Connection lost"))
+        else:
+            self._end("Connection lost due to invalid message type")
+
+    def _apply_state(self, message: dict):
+        """Apply a full game state or a state_delta to the confirmed state."""
+        try:
+            if message["type"] == "state_delta":
+                self.confirmed.apply_delta(message, self.name)
+            else:
+                self.confirmed = GameState.from_message(message, self.name)
+        except (AttributeError, TypeError, ValueError):
+            self._end("Connection lost due to invalid game state")
+            return
+        self._reconcile()
+        if self.phase in (CONNECTING, WAITING):
+            self.phase = PLAYING
+
+    def _reconcile(self):
+        """Settle the journal moves the confirmed state answers and predict the rest on top of it."""
+        shown = self.state
+        version = self.confirmed.version
+        pending = [move for move in self.journal
+                   if move[1] is not None and version is not None and move[1] > version]
+        answered = sum(1 for card, _ in self.journal[:len(self.journal) - len(pending)] if card is not None)
+        self.journal = pending
+
+        state = self.confirmed
+        if any(card is not None for card, _ in pending):
+            state = state.copy()
+            for card, _ in pending:
+                if card is not None:
+                    state.apply_play(card, self.name)
+        self.state = state
+        self.player.hand_mask = state.hand_mask
+
+        if answered and shown is not None and state.same_view(shown):
+            # The server agreed, the player already sees this state
+            self.prediction_stats["confirmed"] += answered
+            return
+        if answered:
+            self.prediction_stats["rolled_back"] += answered
+        self._state_changed = True
+
+    def _roll_back(self):
+        """The server refused a move: forget every prediction and show the confirmed state."""
+        if not self.journal:
+            return
+        self.prediction_stats["rolled_back"] += sum(1 for card, _ in self.journal if card is not None)
+        self.journal = []
+        if self.state is not self.confirmed:
+            self.state = self.confirmed
+            self.player.hand_mask = self.state.hand_mask
+            self._state_changed = True
+
+    def _end(self, reason: str):
+        """The connection ended without a game over."""
+        if self.phase != FINISHED:
+            self.phase = FINISHED
+            self._pending.append(("closed", (reason,)))
+
+    def _notify(self):
+        """Tell observers what changed since the last notification."""
+        # The threaded client reconnects on its own, the session only mirrors it
+        reconnecting = getattr(self.client, "reconnecting", False)
+        if self.phase == PLAYING and reconnecting:
+            self.phase = RECONNECTING
+        elif self.phase == RECONNECTING and not reconnecting:
+            self.phase = PLAYING
+
+        if self.phase != self._notified_phase:
+            self._notified_phase = self.phase
+            self._emit("phase", self.phase)
+        if self._state_changed:
+            self._state_changed = False
+            self._emit("state", self.state)
+            # Only the cards that changed since the last notification, however many updates it took
+            hand_mask = self.state.hand_mask
+            if hand_mask != self._notified_hand_mask:
+                removed = cards_from_mask(self._notified_hand_mask & ~hand_mask)
+                added = cards_from_mask(hand_mask & ~self._notified_hand_mask)
+                self._notified_hand_mask = hand_mask
+                self._emit("hand", self.state.hand, removed, added)
+        if self._log:
+            lines, self._log = self._log, []
+            self._emit("log", lines)
+        if self._pending:
+            pending, self._pending = self._pending, []
+            for event, args in pending:
+                self._emit(event, *args)
+
+    # Actions
+
+    @property
+    def is_my_turn(self) -> bool:
+        return self.phase == PLAYING and self.state is not None and self.state.current_player == self.name
+
+    def legal_mask(self) -> int:
+        """Bitmask of the cards the server accepts now: same suit or same value as the top card."""
+        top = self.state.top_card if self.state else None
+        if top is None:
+            return 0
+        return self.player.hand_mask & (SUIT_MASKS[top.suit] | RANK_MASKS[top.rank])
+
+    def legal_cards(self) -> tuple[Card, ...]:
+        return cards_from_mask(self.legal_mask())
+
+    def play_card(self, card):
+        """Play a card (a Card or its display string); returns what the client returns.
+
+        Returns None without sending anything unless a game is running. While the
+        threaded client reconnects, it buffers the move and sends it after resuming.
+        A card the server's rules allow is predicted: observers see it played right
+        away, before the server's answer confirms or corrects it.
+        """
+        if self.phase not in (PLAYING, RECONNECTING):
+            return None
+        predicted = None
+        # The clients drop moves while the opponent is away, so those are not predicted
+        if self.predict and self.is_my_turn and not self.client.waiting_for_player:
+            predicted = Card.parse(card)
+            if predicted is not None and not predicted.mask & self.legal_mask():
+                predicted = None
+        result = self.client.play_card(str(card))
+        if predicted is not None:
+            self._journal(predicted)
+            self.state.apply_play(predicted, self.name)
+            self.player.hand_mask = self.state.hand_mask
+            self.prediction_stats["predicted"] += 1
+            self._state_changed = True
+            self._notify()
+        return result
+
+    def draw_card(self):
+        """Draw a card; returns what the client returns (None unless a game is running)."""
+        if self.phase not in (PLAYING, RECONNECTING):
+            return None
+        result = self.client.draw_card()
+        if self.journal:
+            # Not predicted, but its answer comes before the ones of later predictions
+            self._journal(None)
+        return result
+
+    def _journal(self, card: Card | None):
+        """Record a move sent on top of the confirmed state and journal."""
+        base = self.journal[-1][1] if self.journal else self.confirmed.version
+        self.journal.append((card, base + 1 if base is not None else None))
+        if card is not None and self.state is self.confirmed:
+            self.state = self.confirmed.copy()
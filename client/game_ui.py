@@ -1,35 +1,48 @@
 import tkinter as tk
-import time
 from tkinter import messagebox
-from player import Player
-import json
-import threading
-import ast
+from game_session import GameSession, GameState
+from metrics import format_overlay
+
+# Delay between two runs of the message dispatcher (roughly one frame at 60 Hz)
+FRAME_INTERVAL_MS = 16
+# Refresh interval of the statistics overlay (shown only when metrics are enabled)
+STATS_INTERVAL_MS = 500
 
 
 class CardGameGUI(tk.Frame):
-    def __init__(self, parent, controller, name: str):
-        """Initializes the Card Game GUI for a single player."""
+    def __init__(self, parent, controller, session: GameSession):
+        """Initializes the Card Game GUI for the player of a connected session."""
         tk.Frame.__init__(self, parent)
         self.controller = controller
         self.configure(background="green")
 
         # Player setup
-        self.player = Player(name)
-        self.previous_hand = None
+        self.session = session
+        self.player = session.player
 
         # UI components
         self.suit_buttons = []
+        self.card_buttons = {}  # Card -> button currently showing it
+        self.card_positions = {}  # Card -> (row, column) it is gridded at
+        self.button_pool = []  # Hidden buttons ready for reuse
         self.is_active = True  # Track if GUI is active
+        self.dispatch_job = None
+        self.stats_job = None
+        self.stats_label = None
+        self.frames_dispatched = 0
         self._setup_game_ui()
 
-        if self.controller.network_client and self.controller.network_client.game_state:
-            self.update_game_state(self.controller.network_client.game_state)
+        if session.state:
+            self.update_game_state(session.state)
+            self.create_hand_buttons(session.state.hand)
 
-        # Networking Setup
-        self.listen_thread = threading.Thread(target=self.listen_for_messages)
-        self.listen_thread.daemon = True
-        self.listen_thread.start()
+        # The session calls back on the Tk main thread, from dispatch_messages()
+        self.subscriptions = [("state", self.update_game_state), ("hand", self.update_hand),
+                              ("log", self.log_messages), ("game_over", self.game_over),
+                              ("closed", self.connection_lost)]
+        for event, callback in self.subscriptions:
+            session.on(event, callback)
+        self.schedule_dispatch()
 
     def _setup_game_ui(self):
         """Set up the main game UI components."""
@@ -54,160 +67,203 @@ class CardGameGUI(tk.Frame):
         self.label_current_player = tk.Label(self.info_frame, text="Current player: None")
         self.label_current_player.grid(row=3, column=5)
 
+        self.opponent_info_label = tk.Label(self.info_frame, text="Opponent: 0 cards")
+        self.opponent_info_label.grid(row=4, column=5)
+
         self.log_area = tk.Text(self.info_frame, width=40, height=10, bg="lightyellow", state="disabled")
-        self.log_area.grid(row=4, column=5)
+        self.log_area.grid(row=5, column=5)
+
+        if getattr(self.session.client, "metrics", None) is not None:
+            self.stats_label = tk.Label(self.info_frame, font=("Courier", 8), justify="left", anchor="w")
+            self.stats_label.grid(row=6, column=5, sticky="we")
+            self.update_stats_overlay()
 
     def cleanup(self):
         """Clean up resources before destroying the frame."""
         self.is_active = False
+        for event, callback in self.subscriptions:
+            self.session.off(event, callback)
+        self.subscriptions = []
+        if self.dispatch_job:
+            self.after_cancel(self.dispatch_job)
+            self.dispatch_job = None
+        if self.stats_job:
+            self.after_cancel(self.stats_job)
+            self.stats_job = None
         # Clear all buttons
-        for btn in self.suit_buttons:
-            btn.destroy()
+        for btn in list(self.card_buttons.values()) + self.button_pool:
+            try:
+                btn.destroy()
+            except tk.TclError:
+                pass  # Button was already destroyed
         self.suit_buttons = []
+        self.card_buttons = {}
+        self.card_positions = {}
+        self.button_pool = []
+
+    def destroy(self):
+        """Stop the dispatcher before the widgets go away."""
+        self.cleanup()
+        tk.Frame.destroy(self)
 
     def log_message(self, message: str):
         """Log messages to the log area."""
-        if self.is_active and hasattr(self, 'log_area'):
+        self.log_messages([message])
+
+    def log_messages(self, messages: list[str]):
+        """Append several lines to the log area with a single Text insert."""
+        if messages and self.is_active and hasattr(self, 'log_area'):
             try:
                 self.log_area.config(state="normal")
-                self.log_area.insert(tk.END, message + "\n")
+                self.log_area.insert(tk.END, "\n".join(messages) + "\n")
                 self.log_area.see(tk.END)
                 self.log_area.config(state="disabled")
             except tk.TclError:
                 # Widget was destroyed, ignore the error
                 pass
 
-    def create_hand_buttons(self, hand):
-        """Create buttons for Player's hand."""
-        if not self.is_active:
-            return
-
-        max_columns = 4
-        button_height = 5
-        button_width = 10
+    def update_hand(self, hand, removed, added):
+        """Render a hand change the session reported."""
+        self.create_hand_buttons(hand, removed)
 
-        # Clear existing buttons first
-        for btn in self.suit_buttons:
-            try:
-                btn.destroy()
-            except tk.TclError:
-                pass  # Button was already destroyed
+    def create_hand_buttons(self, hand, removed=None):
+        """Render the Player's hand, reusing the buttons of cards that stayed in it.
 
-        # Reset the button list
-        self.suit_buttons = []
+        Only cards that were added or removed get a widget taken from or returned to
+        the pool, and only cards whose position changed are re-gridded.
 
-        for idx, card in enumerate(hand):
-            current_column = idx % max_columns
-            current_row = 1 + (idx // max_columns)
+        Args:
+            hand: The cards in display order.
+            removed: Cards that left the hand, if known; otherwise the hand is compared
+                with the cards on screen.
+        """
+        if not self.is_active:
+            return
 
-            # Combine suit and value for display
-            card_display = f"{card['value']}{card['suit']}"
+        max_columns = 4
+        if removed is None:
+            new_set = set(hand)
+            removed = [c for c in self.card_buttons if c not in new_set]
 
-            # Create button with card details
-            try:
-                btn = tk.Button(self, text=card_display, width=button_width, height=button_height,
-                                command=lambda c=card_display: self.play_card(c))
-                btn.grid(row=current_row, column=current_column, padx=10, pady=10)
+        try:
+            # Hide buttons of cards that left the hand and keep them for later
+            for card in removed:
+                btn = self.card_buttons.pop(card, None)
+                if btn is None:
+                    continue
+                btn.grid_remove()
+                self.button_pool.append(btn)
+                del self.card_positions[card]
+
+            self.suit_buttons = []
+            for idx, card in enumerate(hand):
+                position = (1 + (idx // max_columns), idx % max_columns)
+
+                btn = self.card_buttons.get(card)
+                if btn is None:
+                    btn = self.button_pool.pop() if self.button_pool else self._create_card_button()
+                    card_display = str(card)
+                    btn.config(text=card_display, command=lambda c=card_display: self.play_card(c))
+                    self.card_buttons[card] = btn
+
+                if self.card_positions.get(card) != position:
+                    btn.grid(row=position[0], column=position[1], padx=10, pady=10)
+                    self.card_positions[card] = position
                 self.suit_buttons.append(btn)
-            except tk.TclError:
-                pass  # Frame was destroyed, ignore the error
+        except tk.TclError:
+            pass  # Frame was destroyed, ignore the error
+
+    def _create_card_button(self):
+        """Create a new card button for the widget pool."""
+        return tk.Button(self, width=10, height=5)
 
     def play_card(self, card: str):
         """Handles the logic when a player plays a card."""
-        if self.is_active and self.controller.network_client and self.controller.network_client.connected:
-            self.controller.network_client.play_card(card)
+        if self.is_active:
+            self.session.play_card(card)
 
     def draw_card(self):
         """Handles drawing a card for the current player."""
-        if self.is_active and self.controller.network_client and self.controller.network_client.connected:
-            self.controller.network_client.draw_card()
+        if self.is_active:
+            self.session.draw_card()
 
-    def listen_for_messages(self):
-        """Listen for messages from the server (game state updates, etc.)."""
-        while self.is_active:
-            try:
-                message = self.controller.network_client.get_next_message()
-                if message and self.is_active:
-                    # Validate message structure
-                    if not isinstance(message, dict) or "type" not in message:
-                        print("Received malformed message, disconnecting...")
-                        self.controller.network_client.close()
-                        self.controller.show_frame("MainMenu")
-                        messagebox.showerror("Error", "Connection lost due to invalid message format")
-                        break
-
-                    if message["type"] == "game_state_update":
-                        self.update_game_state(message)
-                    elif message["type"] == "error":
-                        self.log_message(message["message"])
-                    elif message["type"] == "game_over":
-                        mess: str = message["message"]
-                        self.log_message(mess)
-                        # Use after to ensure thread safety when updating UI
-                        self.after(1000, lambda: self.announce_winner(mess))
-                    elif message["type"] == "player_disconnected":
-                        self.log_message(message["message"])
-                    elif message["type"] == "player_reconnected":
-                        self.log_message(message["message"])
-                    elif message["type"] == "player_played_card":
-                        self.log_message(message["message"])
-                    elif message["type"] == "player_drawn_card":
-                        self.log_message(message["message"])
-                    elif message["type"] == "connect_ack":
-                        pass
-                    else:
-                        self.controller.network_client.close()
-                        self.controller.show_frame("MainMenu")
-                        messagebox.showerror("Error", "Connection lost due to invalid message type")
-                        break
-                else:
-                    time.sleep(0.05)
-            except json.JSONDecodeError:
-                if self.is_active:
-                    self.controller.network_client.close()
-                    self.controller.show_frame("MainMenu")
-                    messagebox.showerror("Error", "Connection lost due to invalid message format")
-                break
-            except Exception as e:
-                if self.is_active:
-                    self.controller.network_client.close()
-                    self.controller.show_frame("MainMenu")
-                    messagebox.showerror("Error", f"Connection lost due to error: {str(e)}")
-                break
-            time.sleep(0.05)
-
-    def update_game_state(self, game_state: dict):
-        """Update the game state in the UI based on the server's response."""
+    def schedule_dispatch(self):
+        """Run the message dispatcher on the next frame."""
+        if self.is_active:
+            self.dispatch_job = self.after(FRAME_INTERVAL_MS, self.dispatch_messages)
+
+    def dispatch_messages(self):
+        """Let the session handle every pending server message on the Tk main thread.
+
+        The whole queue is drained each frame and observers are called once: only the
+        newest game state is rendered and all log lines are written with one insert.
+        """
+        self.dispatch_job = None
         if not self.is_active:
             return
 
+        self.frames_dispatched += 1
         try:
-            self.deck_info_label.config(text=f"Deck: {game_state['deck_size']} cards left")
+            self.session.poll()
+        except Exception as e:
+            if self.is_active:
+                self.connection_lost(f"Connection lost due to error: {str(e)}")
+            return
+
+        self.schedule_dispatch()
+
+    def get_stats(self) -> dict:
+        """Statistics of the network client plus the UI's own counters."""
+        stats = self.session.client.get_stats()
+        stats["phase"] = self.session.phase
+        stats["ui"] = {
+            "frames": self.frames_dispatched,
+            "card_buttons": len(self.card_buttons),
+            "pooled_buttons": len(self.button_pool),
+        }
+        return stats
+
+    def update_stats_overlay(self):
+        """Refresh the statistics panel and schedule the next refresh."""
+        self.stats_job = None
+        if not self.is_active or self.stats_label is None:
+            return
+        try:
+            self.stats_label.config(text=format_overlay(self.get_stats()))
+        except tk.TclError:
+            return  # Frame was destroyed
+        self.stats_job = self.after(STATS_INTERVAL_MS, self.update_stats_overlay)
+
+    def connection_lost(self, reason: str):
+        """Close the connection and go back to the main menu."""
+        self.cleanup()
+        self.session.close()
+        self.controller.show_frame("MainMenu")
+        messagebox.showerror("Error", reason)
+
+    def update_game_state(self, state: GameState):
+        """Show a game state the session parsed."""
+        if not self.is_active:
+            return
+
+        try:
+            self.deck_info_label.config(text=f"Deck: {state.deck_size} cards left")
             # Update discard pile with the top card
-            top_card = game_state.get('top_card')
-            if isinstance(top_card, str):
-                # If it's a string, attempt to parse it as a dictionary
-                try:
-                    top_card = ast.literal_eval(top_card)
-                except (ValueError, SyntaxError):
-                    top_card = {}  # Default to an empty dictionary if parsing fails
-            elif not isinstance(top_card, dict):
-                top_card = {}
-            discard_pile_size = game_state.get("discard_pile", [])
-            self.discard_info_label.config(text=f"Discard Pile: {discard_pile_size} cards")
-            self.discard_pile_button.config(text=f"{top_card.get('value')}"
-                                                 f"{top_card.get('suit')}")
-
-            self.label_current_player.config(text=f"Current player: {game_state['current_player']}")
-
-            hand = game_state.get(self.player.name, [])
-            if hand != self.previous_hand:
-                self.create_hand_buttons(hand)
-                self.previous_hand = hand
+            self.discard_info_label.config(text=f"Discard Pile: {state.discard_size} cards")
+            self.discard_pile_button.config(text=str(state.top_card) if state.top_card else "Discard Pile")
+
+            self.label_current_player.config(text=f"Current player: {state.current_player}")
+            # The server only tells how many cards the opponent holds
+            opponent_cards = sum(size for name, size in state.hand_sizes.items() if name != self.player.name)
+            self.opponent_info_label.config(text=f"Opponent: {opponent_cards} cards")
         except tk.TclError:
             # Widget was destroyed, ignore the error
             pass
 
+    def game_over(self, message: str, winner: str | None):
+        """Announce the result shortly after the last state was shown."""
+        self.after(1000, lambda: self.announce_winner(message))
+
     def announce_winner(self, message: str):
         """Announce the winner and reset the game."""
         if self.is_active:
@@ -0,0 +1,120 @@
+"""Adaptive heartbeat scheduling with RTT and jitter measurement.
+
+The server declares a player disconnected after SHORT_DISCONNECT_THRESHOLD seconds
+without a message from them. Any message counts, so a heartbeat is only needed when
+the client has been quiet for a whole interval. The interval shrinks when heartbeats
+get lost or the round-trip time grows, so a bad link still refreshes the server's
+last_seen well before the threshold.
+
+Heartbeats carry the client's clock in milliseconds ("ts") and the current smoothed
+RTT ("rtt"); the server echoes "ts" back in a heartbeat_ack.
+"""
+import time
+from collections import deque
+
+
+class KeepaliveScheduler:
+    """Decides when to send a heartbeat and keeps the RTT/jitter estimate."""
+
+    def __init__(self, interval: float = 5.0, min_interval: float = 1.0, window: int = 16):
+        """Create a scheduler.
+
+        Args:
+            interval: Seconds between heartbeats on a healthy, idle link.
+            min_interval: Shortest interval, however bad the link gets.
+            window: Number of recent heartbeats the loss rate is computed over.
+        """
+        self.base_interval = interval
+        self.min_interval = min_interval
+        self.on_rtt = None  # Optional callable receiving every RTT sample in seconds
+        self.outcomes = deque(maxlen=window)  # True for answered heartbeats
+        self.reset()
+
+    def reset(self):
+        """Forget all measurements, e.g. for a new connection."""
+        self.last_sent = time.monotonic()
+        self.outstanding: dict[int, float] = {}  # ts -> send time
+        self.outcomes.clear()
+        self.consecutive_lost = 0
+        self.srtt = None
+        self.jitter = 0.0
+        self.stats = {"sent": 0, "answered": 0, "lost": 0}
+
+    @property
+    def loss_rate(self) -> float:
+        """Share of the recent heartbeats that were never answered."""
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def interval(self) -> float:
+        """Current heartbeat interval, shorter on lossy or slow links."""
+        srtt = self.srtt or 0.0
+        interval = self.base_interval / (1.0 + 8.0 * self.loss_rate + 4.0 * srtt)
+        return max(self.min_interval, interval)
+
+    def note_sent(self):
+        """Record that a datagram was sent, which resets the heartbeat timer."""
+        self.last_sent = time.monotonic()
+
+    def next_timeout(self) -> float:
+        """Seconds until the next heartbeat is due."""
+        return max(0.0, self.last_sent + self.interval() - time.monotonic())
+
+    def heartbeat(self, player_name: str) -> dict | None:
+        """Return a heartbeat message if one is due, otherwise None."""
+        now = time.monotonic()
+        if now - self.last_sent < self.interval():
+            return None
+        self._expire(now)
+        ts = int(now * 1000)
+        self.outstanding[ts] = now
+        self.last_sent = now
+        self.stats["sent"] += 1
+        message = {"type": "heartbeat", "name": player_name, "ts": ts}
+        if self.srtt is not None:
+            message["rtt"] = round(self.srtt * 1000)
+        return message
+
+    def ack(self, ts) -> float | None:
+        """Handle a heartbeat_ack.
+
+        Returns:
+            float | None: The RTT sample in seconds, or None for an unknown or late ack.
+        """
+        try:
+            sent = self.outstanding.pop(int(ts))
+        except (KeyError, TypeError, ValueError):
+            return None
+        rtt = time.monotonic() - sent
+        self.outcomes.append(True)
+        self.consecutive_lost = 0
+        self.stats["answered"] += 1
+        if self.srtt is None:
+            self.srtt = rtt
+        else:
+            # Interarrival jitter as in RFC 3550, smoothed RTT as in RFC 6298
+            self.jitter += (abs(rtt - self.srtt) - self.jitter) / 16
+            self.srtt += (rtt - self.srtt) / 8
+        if self.on_rtt:
+            self.on_rtt(rtt)
+        return rtt
+
+    def _expire(self, now: float):
+        """Count heartbeats that stayed unanswered for max(min_interval, 4 * SRTT) as lost."""
+        timeout = max(self.min_interval, 4 * (self.srtt or 0.0))
+        for ts, sent in list(self.outstanding.items()):
+            if now - sent > timeout:
+                del self.outstanding[ts]
+                self.outcomes.append(False)
+                self.consecutive_lost += 1
+                self.stats["lost"] += 1
+
+    def get_stats(self) -> dict:
+        """Counters and the current link estimate."""
+        stats = dict(self.stats)
+        stats["interval_s"] = self.interval()
+        stats["loss_rate"] = self.loss_rate
+        stats["srtt_ms"] = self.srtt * 1000 if self.srtt is not None else None
+        stats["jitter_ms"] = self.jitter * 1000
+        return stats
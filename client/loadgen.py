@@ -0,0 +1,341 @@
+"""Load generator and soak test for the UDP game server.
+
+Runs thousands of simulated players from one process on a single asyncio event loop
+(see AsyncNetworkClient); each one plays through a headless GameSession. Players
+connect in pairs so that each pair fills a lobby, then play legal moves until the
+game is over. The server puts a player into the first lobby with a free seat, so
+the pairs connect one at a time, and each pair checks the first game state for the
+partner it expected; pairs that ended up with other opponents count as mispaired. Every request is timed until the server's answer arrives:
+
+    connect              -> connect_ack / game_state_update / name_taken
+    play_card, draw_card -> game_state_update / state_delta / error
+    heartbeat            -> heartbeat_ack
+
+A request without an answer within --timeout counts as lost and is sent again.
+Heartbeats are scheduled by each client's KeepaliveScheduler and never resent; one
+counts as lost when its ack does not arrive within the scheduler's timeout.
+The run ends with a human-readable summary; --output also writes the results as
+JSON, so runs against different server builds can be compared.
+
+Usage:
+    python loadgen.py --port 8080 --players 2000 --ramp 200 --output run.json
+
+Each player owns a UDP socket, so large runs may need a higher open file limit (ulimit -n).
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+
+from async_network_client import AsyncNetworkClient
+from codec import BINARY, JSON
+from game_session import FINISHED, GameSession
+
+# Message types that answer a move request
+MOVE_REPLIES = ("game_state_update", "state_delta", "error")
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class LoadStats:
+    """Counters and RTT samples collected by all simulated players."""
+
+    def __init__(self):
+        self.rtt_ms: dict[str, list[float]] = {}
+        self.sent = Counter()
+        self.answered = Counter()
+        self.lost = Counter()
+        self.received = Counter()
+        self.lobbies_started = 0
+        self.lobbies_completed = 0
+        self.lobbies_mispaired = 0
+        self.players_failed = 0
+        self.players_stalled = 0
+
+    def record_rtt(self, message_type: str, rtt_ms: float):
+        self.rtt_ms.setdefault(message_type, []).append(rtt_ms)
+        self.answered[message_type] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        """Aggregate the run into a JSON-serializable dict."""
+        requests = {}
+        for message_type in sorted(set(self.sent) | set(self.rtt_ms)):
+            samples = sorted(self.rtt_ms.get(message_type, []))
+            sent = self.sent[message_type]
+            requests[message_type] = {
+                "sent": sent,
+                "answered": self.answered[message_type],
+                "lost": self.lost[message_type],
+                "loss_rate": self.lost[message_type] / sent if sent else 0.0,
+                "rtt_ms": {
+                    "p50": percentile(samples, 0.50),
+                    "p90": percentile(samples, 0.90),
+                    "p99": percentile(samples, 0.99),
+                    "max": samples[-1] if samples else 0.0,
+                    "mean": sum(samples) / len(samples) if samples else 0.0,
+                },
+            }
+        return {
+            "elapsed_s": elapsed,
+            "requests": requests,
+            "received": dict(self.received),
+            "lobbies": {
+                "started": self.lobbies_started,
+                "completed": self.lobbies_completed,
+                "completed_per_s": self.lobbies_completed / elapsed if elapsed else 0.0,
+                "mispaired": self.lobbies_mispaired,
+            },
+            "players_failed": self.players_failed,
+            "players_stalled": self.players_stalled,
+        }
+
+
+class SimulatedPlayer:
+    """One headless player: connects, plays legal moves and times every request."""
+
+    def __init__(self, generator: "LoadGenerator", name: str):
+        self.generator = generator
+        self.stats = generator.stats
+        self.name = name
+        self.session = GameSession(name, AsyncNetworkClient(heartbeat_interval=generator.heartbeat_interval,
+                                                            codec=generator.codec))
+        self.client = self.session.client
+        self.client.keepalive.on_rtt = lambda rtt: self.stats.record_rtt("heartbeat", rtt * 1000.0)
+        self.pending = None  # (message type, send time, card) of the unanswered request
+        self.errors = 0  # Consecutive error replies to this player's moves
+        self.reply = None  # The server's answer to the connect request
+
+    async def connect(self) -> bool:
+        """Connect, retrying lost connect requests. Returns False if the server refused."""
+        config = self.generator
+        for _ in range(config.retries + 1):
+            start = time.perf_counter()
+            self.stats.sent["connect"] += 1
+            try:
+                reply = await self.session.connect(config.ip, config.port, timeout=config.timeout)
+            except asyncio.TimeoutError:
+                self.stats.lost["connect"] += 1
+                continue
+            except (ConnectionError, OSError):
+                return False
+            self.stats.record_rtt("connect", (time.perf_counter() - start) * 1000.0)
+            self.reply = reply
+            return reply["type"] != "name_taken"
+        return False
+
+    async def play(self):
+        """Play until the game is over, the connection fails or the run is stopped."""
+        config = self.generator
+        try:
+            async for message in self._messages():
+                if message is None:
+                    # Request timed out: count it as lost and send it again
+                    if self.pending is None:
+                        continue
+                    message_type, _, card = self.pending
+                    self.stats.lost[message_type] += 1
+                    self.pending = None
+                    await self._send(message_type, card)
+                    continue
+
+                self.stats.received[message["type"]] += 1
+                self.session.handle_message(message)
+                if message["type"] == "error" and self.pending:
+                    self.errors += 1
+                    if self.errors > config.retries:
+                        # e.g. nothing left to draw and no legal card: the game cannot go on
+                        self.stats.players_stalled += 1
+                        break
+                elif message["type"] in ["game_state_update", "state_delta"]:
+                    self.errors = 0
+                if self.pending and message["type"] in MOVE_REPLIES:
+                    message_type, start, _ = self.pending
+                    self.stats.record_rtt(message_type, (time.perf_counter() - start) * 1000.0)
+                    self.pending = None
+
+                if self.session.phase == FINISHED:
+                    if self.session.winner == self.name:
+                        self.stats.lobbies_completed += 1
+                    elif self.session.winner is None:
+                        self.stats.players_failed += 1
+                    break
+                if message["type"] in ("connect_ack", "error") + MOVE_REPLIES and not config.stopping:
+                    await self._take_turn()
+        finally:
+            self.stats.sent["heartbeat"] += self.client.sent["heartbeat"]
+            self.stats.lost["heartbeat"] += self.client.keepalive.stats["lost"]
+            await self.session.close()
+
+    async def _messages(self):
+        """Server messages; yields None whenever a pending request timed out."""
+        while True:
+            timeout = self.generator.timeout if self.pending else self.generator.idle_timeout
+            try:
+                yield await asyncio.wait_for(anext(self.client), timeout)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                if self.pending is None:
+                    return
+                yield None
+
+    async def _take_turn(self):
+        """Send a legal move (server rules: same suit or value) when it is this player's turn."""
+        if self.pending or not self.session.is_my_turn:
+            return
+        if self.generator.think_ms:
+            await asyncio.sleep(self.generator.think_ms / 1000.0)
+        legal = self.session.legal_cards()
+        if legal:
+            await self._send("play_card", str(random.choice(legal)))
+        else:
+            await self._send("draw_card", None)
+
+    async def _send(self, message_type: str, card: str | None):
+        self.pending = (message_type, time.perf_counter(), card)
+        self.stats.sent[message_type] += 1
+        request = self.session.play_card(card) if message_type == "play_card" else self.session.draw_card()
+        if request is not None:
+            await request
+
+
+class LoadGenerator:
+    """Starts simulated players in pairs and collects their statistics."""
+
+    def __init__(self, ip: str, port: int, players: int, ramp: float = 100.0, timeout: float = 2.0,
+                 idle_timeout: float = 30.0, retries: int = 3, think_ms: float = 0.0,
+                 heartbeat_interval: float = 5.0, name_prefix: str = "load", codec: str = BINARY):
+        """Configure a run.
+
+        Args:
+            ip: Server address.
+            port: Server port.
+            players: Number of simulated players (rounded up to an even number).
+            ramp: Lobbies (player pairs) started per second.
+            timeout: Seconds after which an unanswered request counts as lost.
+            idle_timeout: Seconds a player waits for the opponent before giving up.
+            retries: Connect attempts after the first one.
+            think_ms: Delay before each move.
+            heartbeat_interval: Seconds between heartbeats of each player.
+            name_prefix: Prefix of the generated player names.
+            codec: Wire codec the players ask for (see codec.py).
+        """
+        self.ip = ip
+        self.port = port
+        self.players = players + players % 2
+        self.ramp = ramp
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.retries = retries
+        self.think_ms = think_ms
+        self.heartbeat_interval = heartbeat_interval
+        self.codec = codec
+        self.name_prefix = f"{name_prefix}{random.randrange(1 << 20):05x}"
+        self.stats = LoadStats()
+        self.stopping = False
+        self._connecting = asyncio.Lock()  # Held while a pair connects, so pairs do not interleave
+
+    async def run_lobby(self, index: int):
+        """Connect two players one after the other so they share a lobby, then play."""
+        first = SimulatedPlayer(self, f"{self.name_prefix}-{index}a")
+        second = SimulatedPlayer(self, f"{self.name_prefix}-{index}b")
+        async with self._connecting:
+            if not await first.connect():
+                self.stats.players_failed += 1
+                await first.session.close()
+                return
+            if not await second.connect():
+                self.stats.players_failed += 1
+                await first.session.close()
+                await second.session.close()
+                return
+        self.stats.lobbies_started += 1
+        # The second player fills the lobby, so its connect_ack carries the first game state
+        if set(second.reply.get("players", ())) != {first.name, second.name}:
+            self.stats.lobbies_mispaired += 1
+        await asyncio.gather(first.play(), second.play())
+
+    async def run(self, duration: float | None = None) -> dict:
+        """Start all lobbies at the configured ramp and wait for them to finish.
+
+        Args:
+            duration: Optional limit in seconds; afterwards players stop making moves.
+
+        Returns:
+            dict: The run summary (see LoadStats.summary).
+        """
+        start = time.perf_counter()
+        tasks = []
+        for index in range(self.players // 2):
+            tasks.append(asyncio.create_task(self.run_lobby(index)))
+            await asyncio.sleep(1.0 / self.ramp)
+        if duration is not None:
+            remaining = duration - (time.perf_counter() - start)
+            done, pending = await asyncio.wait(tasks, timeout=max(remaining, 0.0))
+            self.stopping = True
+            for task in pending:
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        summary = self.stats.summary(time.perf_counter() - start)
+        summary["config"] = {
+            "server": f"{self.ip}:{self.port}",
+            "players": self.players,
+            "ramp": self.ramp,
+            "timeout_s": self.timeout,
+            "think_ms": self.think_ms,
+            "heartbeat_interval_s": self.heartbeat_interval,
+            "codec": self.codec,
+        }
+        return summary
+
+
+def format_summary(summary: dict) -> str:
+    """Human-readable version of a run summary."""
+    lines = [f"Run against {summary['config']['server']}: {summary['config']['players']} players, "
+             f"{summary['elapsed_s']:.1f} s",
+             f"{'request':<12}{'sent':>8}{'lost':>7}{'loss':>8}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}"]
+    for message_type, data in summary["requests"].items():
+        rtt = data["rtt_ms"]
+        lines.append(f"{message_type:<12}{data['sent']:>8}{data['lost']:>7}{data['loss_rate']:>8.2%}"
+                     f"{rtt['p50']:>9.2f}{rtt['p90']:>9.2f}{rtt['p99']:>9.2f}{rtt['max']:>9.2f}")
+    lobbies = summary["lobbies"]
+    lines.append(f"lobbies: {lobbies['started']} started, {lobbies['completed']} completed "
+                 f"({lobbies['completed_per_s']:.2f}/s), {lobbies['mispaired']} mispaired, "
+                 f"failed players: {summary['players_failed']}, "
+                 f"stalled players: {summary['players_stalled']}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Prší UDP server.")
+    parser.add_argument("--ip", default="127.0.0.1", help="server address")
+    parser.add_argument("--port", type=int, default=8080, help="server port")
+    parser.add_argument("--players", type=int, default=100, help="number of simulated players")
+    parser.add_argument("--ramp", type=float, default=100.0, help="lobbies started per second")
+    parser.add_argument("--timeout", type=float, default=2.0, help="seconds before a request counts as lost")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="delay before each move")
+    parser.add_argument("--heartbeat", type=float, default=5.0, help="heartbeat interval in seconds")
+    parser.add_argument("--duration", type=float, default=None, help="stop making moves after this many seconds")
+    parser.add_argument("--codec", choices=(BINARY, JSON), default=BINARY, help="wire codec to ask the server for")
+    parser.add_argument("--output", default=None, help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    generator = LoadGenerator(args.ip, args.port, args.players, ramp=args.ramp, timeout=args.timeout,
+                              think_ms=args.think_ms, heartbeat_interval=args.heartbeat, codec=args.codec)
+    summary = asyncio.run(generator.run(args.duration))
+    print(format_summary(summary))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
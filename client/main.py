@@ -1,5 +1,46 @@
+import argparse
+import os
+
+import app as app_module
 from app import App
+from profiler import PROFILE_ENV, SamplingProfiler, profiling_enabled
+from recorder import RECORD_ENV
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prší card game client.")
+    parser.add_argument("--profile", action="store_true", default=profiling_enabled(),
+                        help=f"sample thread stacks while running (or set {PROFILE_ENV}=1)")
+    parser.add_argument("--profile-hz", type=float, default=float(os.environ.get("PRSI_PROFILE_HZ", 200)),
+                        help="stack samples per second")
+    parser.add_argument("--profile-output", default=os.environ.get("PRSI_PROFILE_OUTPUT", "prsi-profile"),
+                        help="path prefix of the profile files written on exit")
+    parser.add_argument("--profile-memory", action="store_true",
+                        default=os.environ.get("PRSI_PROFILE_MEMORY", "") == "1",
+                        help="tracemalloc snapshots around game state updates and hand rendering")
+    parser.add_argument("--record", default=None,
+                        help=f"append every datagram to this log for replay.py (or set {RECORD_ENV}=<path>)")
+    args = parser.parse_args()
+
+    if args.record:
+        # Picked up by every NetworkClient the menu creates
+        os.environ[RECORD_ENV] = args.record
+
+    profiler = None
+    if args.profile:
+        profiler = SamplingProfiler(rate_hz=args.profile_hz, output=args.profile_output,
+                                    trace_memory=args.profile_memory)
+        profiler.instrument(app_module.CardGameGUI)
+        profiler.start()
 
-if __name__ == "__main__":
     app = App()
-    app.mainloop()
+    try:
+        app.mainloop()
+    finally:
+        if profiler:
+            profiler.stop()
+            print(f"Profile written to {args.profile_output}.collapsed")
+
+
+if __name__ == "__main__":
+    main()
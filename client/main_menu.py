@@ -1,7 +1,10 @@
 import tkinter as tk
 from tkinter import messagebox
 from tkinter import ttk
-from network_client import NetworkClient
+from game_session import GameSession, PLAYING, WAITING
+
+# Delay between two polls of the session while connecting
+POLL_INTERVAL_MS = 50
 
 
 class MainMenu(tk.Frame):
@@ -9,9 +12,10 @@ class MainMenu(tk.Frame):
         tk.Frame.__init__(self, parent)
         self.update_idletasks()
         self.controller = controller
-        self.network_client = NetworkClient()
+        self.session = None
         self._create_widgets()
-        self.check_timer = None
+        self.poll_job = None
+        self.waiting_label = None
         self.name = None
 
     def connect_to_game(self):
@@ -20,79 +24,81 @@ class MainMenu(tk.Frame):
         self.name = self.name_entry.get()
 
         if ip and port and self.name:
+            self.close_session()
+            self.session = GameSession(self.name)
+            self.session.on("phase", self.on_phase)
+            self.session.on("closed", self.on_connection_failed)
             try:
-                self.network_client.connect(ip, int(port), self.name)
-                # Briefly wait for connection to complete
-                self.after(1000, self.check_connection)
+                self.session.connect(ip, int(port))
             except Exception as e:
+                self.close_session()
                 messagebox.showerror("Connection Error", f"Failed to connect: {str(e)}")
+                return
+            self.poll_job = self.after(POLL_INTERVAL_MS, self.poll_session)
         else:
             messagebox.showwarning("Input Error", "Please fill all fields.")
 
-    def check_connection(self):
-        if self.network_client.connected:
-            if self.network_client.waiting_for_player:
-                self.show_waiting_message()
-            else:
-                self.handle_successful_connection()
-        else:
-            # Handle error responses
-            msg = self.network_client.get_next_message()
-            if msg:
-                if msg["type"] == "name_taken":
-                    messagebox.showerror("Name Taken", "The player name is already in use. Please choose another name.")
-                elif msg["type"] == "game_state_update":
-                    self.handle_reconnection(msg)
-                else:
-                    messagebox.showerror("Connection Error", "Failed to connect to server")
-            else:
-                messagebox.showerror("Connection Error", "Failed to connect to server")
+    def poll_session(self):
+        """Let the session handle server messages until the game starts or fails."""
+        self.poll_job = None
+        if self.session:
+            self.session.poll()
+        if self.session:
+            self.poll_job = self.after(POLL_INTERVAL_MS, self.poll_session)
+
+    def on_phase(self, phase: str):
+        if phase == WAITING:
+            self.show_waiting_message()
+        elif phase == PLAYING:
+            self.hide_waiting_message()
+            if self.session.rejoined:
+                messagebox.showinfo("Reconnected", "Reconnected to your previous game.")
+            self.handle_successful_connection()
 
-    def handle_successful_connection(self):
-        """Handle successful connection to the server."""
-        self.controller.network_client = self.network_client
-        self.controller.create_and_add_card_game_gui(self.name)
+    def on_connection_failed(self, reason: str):
+        self.hide_waiting_message()
+        self.close_session()
+        messagebox.showerror("Connection Error", reason)
 
-    def handle_reconnection(self, game_state):
-        """Handle reconnection to a previous game."""
-        self.network_client.game_state = game_state  # Update client state
-        messagebox.showinfo("Reconnected", "Reconnected to your previous game.")
-        self.handle_successful_connection()
+    def handle_successful_connection(self):
+        """Hand the session over to the game screen."""
+        session, self.session = self.session, None
+        session.off("phase", self.on_phase)
+        session.off("closed", self.on_connection_failed)
+        self.cancel_poll()
+        self.controller.session = session
+        self.controller.create_and_add_card_game_gui(session)
 
     def show_waiting_message(self):
         """Show waiting message if waiting for another player."""
-        self.waiting_label = tk.Label(self, text="Waiting for another player...", font=("Helvetica", 14))
-        self.waiting_label.grid(row=4, column=0, columnspan=2, pady=20)
-        self.check_timer = self.after(1000, self.check_for_player)
-
-    def check_for_player(self):
-        """Check if another player has joined."""
-        if not self.network_client.waiting_for_player:
-            if self.check_timer:
-                self.after_cancel(self.check_timer)
-                self.check_timer = None
-            if hasattr(self, 'waiting_label'):
-                self.waiting_label.destroy()
-            self.handle_successful_connection()
-        elif self.network_client.connected:
-            self.check_timer = self.after(1000, self.check_for_player)
-        else:
-            if hasattr(self, 'waiting_label'):
-                self.waiting_label.destroy()
-            if self.check_timer:
-                self.after_cancel(self.check_timer)
-                self.check_timer = None
-            messagebox.showerror("Connection Error", "Lost connection to server")
+        if self.waiting_label is None:
+            self.waiting_label = tk.Label(self, text="Waiting for another player...", font=("Helvetica", 14))
+            self.waiting_label.grid(row=4, column=0, columnspan=2, pady=20)
+
+    def hide_waiting_message(self):
+        if self.waiting_label is not None:
+            self.waiting_label.destroy()
+            self.waiting_label = None
+
+    def cancel_poll(self):
+        if self.poll_job:
+            self.after_cancel(self.poll_job)
+            self.poll_job = None
+
+    def close_session(self):
+        """Close a session that was not handed over to the game screen."""
+        self.cancel_poll()
+        if self.session:
+            session, self.session = self.session, None
+            session.close()
 
     def on_show_frame(self):
         """Called when the frame is shown."""
-        # Clean up any existing network client
-        if hasattr(self.controller, 'network_client') and self.controller.network_client:
-            self.controller.network_client.close()
-            self.controller.network_client = None  # Clear the reference
-
-        # Reset the network client
-        self.network_client = NetworkClient()
+        # Clean up any existing session
+        if getattr(self.controller, 'session', None):
+            self.controller.session.close()
+            self.controller.session = None  # Clear the reference
+        self.close_session()
 
         # Clear entry fields
         self.name_entry.delete(0, tk.END)
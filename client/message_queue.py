@@ -0,0 +1,208 @@
+"""Bounded message queue that coalesces game states.
+
+A game_state_update carries the whole state, so only the newest one matters, and a
+state_delta only makes sense on top of the state before it. When the UI stalls, the
+queue keeps a single game state: a newer snapshot replaces the queued one, and a
+delta is merged into the queued snapshot or delta it continues, so the UI catches
+up in one step. Every other message (played/drawn cards, disconnects, errors) is
+kept in order.
+
+The queue is bounded; once full, the oldest message other than the queued game state
+is dropped to make room. The game state is never dropped, as losing a delta would
+leave the session with a state it cannot tell is wrong.
+"""
+import queue
+import threading
+from collections import deque
+
+from card import Card
+
+SNAPSHOT = "game_state_update"
+DELTA = "state_delta"
+
+
+class _Entry:
+    __slots__ = ("message",)
+
+    def __init__(self, message):
+        self.message = message  # None once superseded by a newer game state
+
+
+def _take(cards: list | None, card) -> bool:
+    """Remove a card from a list of cards in any representation; False if it is not there."""
+    if cards:
+        code = Card.parse(card).code
+        for index, held in enumerate(cards):
+            if Card.parse(held).code == code:
+                del cards[index]
+                return True
+    return False
+
+
+def merge_state(state: dict, delta: dict) -> dict | None:
+    """Fold a state_delta into the queued game state it continues.
+
+    Args:
+        state: A game_state_update or a state_delta.
+        delta: The state_delta that follows it.
+
+    Returns:
+        dict | None: A game_state_update if state is one, otherwise one state_delta
+        spanning both; None if the delta does not continue the state.
+    """
+    if delta.get("base") is None or delta["base"] != state.get("version"):
+        return None
+    merged = dict(state)
+    for field in ("current_player", "deck_size", "discard_pile", "top_card", "version"):
+        if field in delta:
+            merged[field] = delta[field]
+    try:
+        if state["type"] == SNAPSHOT:
+            # Hands the snapshot carries are updated, the others only counted
+            sizes = state.get("hand_sizes")
+            if sizes is None:
+                sizes = {player: len(state.get(player, ())) for player in state.get("players", ())}
+            sizes = dict(sizes)
+            for player, cards in delta.get("removed", {}).items():
+                sizes[player] = sizes.get(player, 0) - len(cards)
+                if player in merged:
+                    hand = list(merged[player])
+                    if not all(_take(hand, card) for card in cards):
+                        return None
+                    merged[player] = hand
+            for player, cards in delta.get("added", {}).items():
+                sizes[player] = sizes.get(player, 0) + len(cards)
+                if player in merged:
+                    merged[player] = list(merged[player]) + list(cards)
+        else:
+            # A card the second delta takes back cancels out the first one's move
+            removed = {player: list(cards) for player, cards in state.get("removed", {}).items()}
+            added = {player: list(cards) for player, cards in state.get("added", {}).items()}
+            sizes = dict(state.get("hand_sizes", {}))
+            for player, cards in delta.get("removed", {}).items():
+                if player in sizes:
+                    sizes[player] -= len(cards)
+                for card in cards:
+                    if not _take(added.get(player), card):
+                        removed.setdefault(player, []).append(card)
+            for player, cards in delta.get("added", {}).items():
+                if player in sizes:
+                    sizes[player] += len(cards)
+                for card in cards:
+                    if not _take(removed.get(player), card):
+                        added.setdefault(player, []).append(card)
+            for field, hands in (("removed", removed), ("added", added)):
+                hands = {player: cards for player, cards in hands.items() if cards}
+                if hands:
+                    merged[field] = hands
+                else:
+                    merged.pop(field, None)
+    except (AttributeError, TypeError):
+        return None  # An unknown card; the session rejects the delta itself
+    sizes.update(delta.get("hand_sizes", {}))
+    if sizes:
+        merged["hand_sizes"] = sizes
+    return merged
+
+
+class CoalescingQueue:
+    """Thread-safe FIFO with the get/put interface of queue.Queue that the clients use."""
+
+    def __init__(self, capacity: int = 1024):
+        """Create an empty queue.
+
+        Args:
+            capacity: Maximum number of queued messages besides the game state.
+        """
+        self.capacity = capacity
+        self._entries: deque[_Entry] = deque()
+        self._state: _Entry | None = None  # Queued entry of the newest game state
+        self._depth = 0  # Entries that still hold a message
+        self._not_empty = threading.Condition(threading.Lock())
+        self.stats = {"put": 0, "coalesced": 0, "dropped": 0, "max_depth": 0}
+
+    def put(self, message: dict):
+        """Queue a message; a game state replaces or is merged into the queued one."""
+        with self._not_empty:
+            self.stats["put"] += 1
+            message_type = message.get("type") if isinstance(message, dict) else None
+            is_state = message_type in (SNAPSHOT, DELTA)
+            if is_state:
+                previous = self._state
+                if previous is not None and previous.message is not None:
+                    merged = message if message_type == SNAPSHOT else merge_state(previous.message, message)
+                    if merged is not None:
+                        previous.message = None
+                        self._depth -= 1
+                        self.stats["coalesced"] += 1
+                        self._compact()
+                        message = merged
+            queued_state = self._state is not None and self._state.message is not None
+            if not is_state and self._depth - queued_state >= self.capacity:
+                self._drop_oldest()
+
+            entry = _Entry(message)
+            self._entries.append(entry)
+            if is_state:
+                self._state = entry
+            self._depth += 1
+            self.stats["max_depth"] = max(self.stats["max_depth"], self._depth)
+            self._not_empty.notify()
+
+    def get(self, block: bool = True, timeout: float | None = None) -> dict:
+        """Remove and return the oldest message.
+
+        Raises:
+            queue.Empty: If no message arrived in time (or at once, when not blocking).
+        """
+        with self._not_empty:
+            if block and not self._not_empty.wait_for(lambda: self._depth > 0, timeout):
+                raise queue.Empty
+            while self._entries:
+                entry = self._entries.popleft()
+                if entry.message is not None:
+                    message, entry.message = entry.message, None
+                    self._depth -= 1
+                    return message
+            raise queue.Empty
+
+    def get_nowait(self) -> dict:
+        return self.get(block=False)
+
+    def empty(self) -> bool:
+        return self._depth == 0
+
+    def qsize(self) -> int:
+        return self._depth
+
+    def clear(self):
+        """Drop every queued message."""
+        with self._not_empty:
+            self._entries.clear()
+            self._state = None
+            self._depth = 0
+
+    def get_stats(self) -> dict:
+        """Current depth and the put/coalesce/drop counters."""
+        with self._not_empty:
+            stats = dict(self.stats)
+            stats["depth"] = self._depth
+            stats["capacity"] = self.capacity
+            return stats
+
+    def _drop_oldest(self):
+        """Drop the oldest message that is not the queued game state."""
+        for entry in self._entries:
+            if entry.message is not None and entry is not self._state:
+                entry.message = None
+                self._depth -= 1
+                self.stats["dropped"] += 1
+                self._compact()
+                return
+
+    def _compact(self):
+        """Remove superseded entries once they outnumber the live ones."""
+        while self._entries and self._entries[0].message is None:
+            self._entries.popleft()
+        if len(self._entries) > 2 * self._depth + 16:
+            self._entries = deque(entry for entry in self._entries if entry.message is not None)
@@ -0,0 +1,221 @@
+"""Client-side latency and throughput instrumentation.
+
+Every server message is timed through the stages of the client pipeline:
+
+    recv -> decode -> enqueue -> dispatch -> render
+    decode:   datagram received until it is parsed
+    enqueue:  parsed until it is in the message queue (protocol state updated)
+    dispatch: waiting in the queue until the UI picks it up
+    render:   UI picked it up until the widgets are updated
+    total:    datagram received until the widgets are updated
+
+Timings go into log-linear histograms (HDR-style: 16 linear sub-buckets per power
+of two, so every value is kept to within about 6 %) that cost one list increment per
+sample. Metrics are off unless enabled, in which case the clients hold no
+ClientMetrics object and only check for None.
+
+Enable them with the environment variable PRSI_METRICS=1 (see metrics_enabled).
+"""
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+METRICS_ENV = "PRSI_METRICS"
+
+_SUB_BITS = 4
+_SUB_COUNT = 1 << _SUB_BITS
+_MAX_SHIFT = 40 - _SUB_BITS  # Values up to 2**40 (about 12 days in microseconds)
+_BUCKETS = (_MAX_SHIFT + 2) * _SUB_COUNT
+
+
+def metrics_enabled() -> bool:
+    """True if the PRSI_METRICS environment variable asks for instrumentation."""
+    return os.environ.get(METRICS_ENV, "").lower() in ("1", "true", "yes", "on")
+
+
+class Histogram:
+    """Log-linear histogram of non-negative integers (e.g. microseconds)."""
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def merge(self, other: "Histogram"):
+        """Add the samples of another histogram to this one."""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    @staticmethod
+    def _index(value: int) -> int:
+        if value < 2 * _SUB_COUNT:
+            return value
+        shift = min(value.bit_length() - _SUB_BITS - 1, _MAX_SHIFT)
+        return min(shift * _SUB_COUNT + (value >> shift), _BUCKETS - 1)
+
+    @staticmethod
+    def _value(index: int) -> float:
+        """Midpoint of a bucket."""
+        if index < 2 * _SUB_COUNT:
+            return float(index)
+        shift = index // _SUB_COUNT - 1
+        low = (index % _SUB_COUNT + _SUB_COUNT) << shift
+        return low + ((1 << shift) - 1) / 2
+
+    def record(self, value: int):
+        if value < 0:
+            value = 0
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction: float) -> float:
+        """Value below which the given fraction of the samples fall."""
+        if not self.count:
+            return 0.0
+        rank = max(1, round(fraction * self.count))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self._value(index), float(self.max))
+        return float(self.max)
+
+    def to_dict(self, scale: float = 1.0) -> dict:
+        """Summary of the distribution, with every value multiplied by scale."""
+        return {
+            "count": self.count,
+            "mean": self.total / self.count * scale if self.count else 0.0,
+            "p50": self.percentile(0.50) * scale,
+            "p90": self.percentile(0.90) * scale,
+            "p99": self.percentile(0.99) * scale,
+            "max": self.max * scale,
+        }
+
+
+class ClientMetrics:
+    """Per-stage, per-message-type latency histograms and traffic counters."""
+
+    STAGES = ("decode", "enqueue", "dispatch", "render", "total")
+
+    def __init__(self, max_tracked: int = 1024):
+        """Create empty metrics.
+
+        Args:
+            max_tracked: Queued messages whose timestamps are kept; snapshots the queue
+                coalesced away are forgotten once this many newer messages arrived.
+        """
+        self.max_tracked = max_tracked
+        self.histograms: dict[tuple[str, str], Histogram] = {}
+        self.queue_depth = Histogram()
+        self.counters = Counter()
+        self._timings: OrderedDict[int, tuple[int, int]] = OrderedDict()  # id(message) -> (recv, enqueued)
+        self._lock = threading.Lock()
+
+    def _record(self, stage: str, message_type: str, elapsed_ns: int):
+        histogram = self.histograms.get((stage, message_type))
+        if histogram is None:
+            histogram = self.histograms[(stage, message_type)] = Histogram()
+        histogram.record(elapsed_ns // 1000)
+
+    def datagram_in(self, size: int) -> int:
+        """A datagram was received; starts the clock of the message it carries.
+
+        Returns:
+            int: Receive time, to pass to decoded() and enqueued() for this message.
+        """
+        received_ns = time.perf_counter_ns()
+        with self._lock:
+            self.counters["packets_in"] += 1
+            self.counters["bytes_in"] += size
+        return received_ns
+
+    def datagram_out(self, size: int):
+        with self._lock:
+            self.counters["packets_out"] += 1
+            self.counters["bytes_out"] += size
+
+    def decoded(self, message_type: str, received_ns: int) -> int:
+        """The message received at received_ns was parsed; returns the decode time."""
+        decoded_ns = time.perf_counter_ns()
+        with self._lock:
+            self._record("decode", message_type, decoded_ns - received_ns)
+        return decoded_ns
+
+    def enqueued(self, message: dict, received_ns: int, decoded_ns: int):
+        now = time.perf_counter_ns()
+        with self._lock:
+            self._record("enqueue", message["type"], now - decoded_ns)
+            self._timings[id(message)] = (received_ns, now)
+            if len(self._timings) > self.max_tracked:
+                self._timings.popitem(last=False)
+
+    def dispatched(self, message: dict, queue_depth: int):
+        """The UI took a message from the queue.
+
+        Returns:
+            tuple | None: Token to pass to rendered(), None for messages that were not timed.
+        """
+        now = time.perf_counter_ns()
+        with self._lock:
+            self.queue_depth.record(queue_depth)
+            timing = self._timings.pop(id(message), None)
+            if timing is None:
+                return None
+            self._record("dispatch", message["type"], now - timing[1])
+        return timing[0], now
+
+    def rendered(self, message_type: str, token):
+        """The widgets now show the message that dispatched() returned the token for."""
+        if token is None:
+            return
+        now = time.perf_counter_ns()
+        with self._lock:
+            self._record("render", message_type, now - token[1])
+            self._record("total", message_type, now - token[0])
+
+    def get_stats(self) -> dict:
+        """Histograms in milliseconds, grouped by stage and message type, plus counters.
+
+        overall_ms holds each stage over all message types.
+        """
+        with self._lock:
+            stages = {stage: {} for stage in self.STAGES}
+            overall = {stage: Histogram() for stage in self.STAGES}
+            for (stage, message_type), histogram in sorted(self.histograms.items()):
+                stages[stage][message_type] = histogram.to_dict(scale=0.001)
+                overall[stage].merge(histogram)
+            return {
+                "stages_ms": stages,
+                "overall_ms": {stage: histogram.to_dict(scale=0.001)
+                               for stage, histogram in overall.items() if histogram.count},
+                "queue_depth": self.queue_depth.to_dict(),
+                "counters": dict(self.counters),
+            }
+
+
+def format_overlay(stats: dict) -> str:
+    """Compact multi-line text for the on-screen statistics panel."""
+    keepalive = stats.get("keepalive", {})
+    queue = stats.get("queue", {})
+    metrics = stats.get("metrics") or {}
+    counters = metrics.get("counters", {})
+    srtt = keepalive.get("srtt_ms")
+    lines = [
+        f"rtt {srtt:.1f} ms  jitter {keepalive.get('jitter_ms', 0.0):.1f} ms  "
+        f"loss {keepalive.get('loss_rate', 0.0):.0%}" if srtt is not None else "rtt -",
+        f"in {counters.get('packets_in', 0)} pkt / {counters.get('bytes_in', 0) / 1024:.1f} kB  "
+        f"out {counters.get('packets_out', 0)} pkt / {counters.get('bytes_out', 0) / 1024:.1f} kB",
+        f"queue {queue.get('depth', 0)} (max {queue.get('max_depth', 0)})  "
+        f"coalesced {queue.get('coalesced', 0)}  dropped {queue.get('dropped', 0)}",
+    ]
+    for stage, timing in metrics.get("overall_ms", {}).items():
+        lines.append(f"{stage:<8} p50 {timing['p50']:7.2f}  p99 {timing['p99']:7.2f} ms")
+    return "\n".join(lines)
@@ -0,0 +1,262 @@
+"""Local UDP proxy that emulates a bad network between clients and the server.
+
+Clients connect to the proxy instead of the server. Every client address gets its own
+upstream socket, so the server still sees one address per player. Datagrams in both
+directions pass through an Impairment that can drop, delay (with jitter), duplicate
+and reorder them. All random decisions come from seeded generators, so a run with the
+same seed and the same traffic makes the same decisions.
+
+Blackouts drop everything for a while, which is what it takes to exercise the client's
+reconnection path and the server's SHORT/LONG_DISCONNECT_THRESHOLD handling on one box.
+
+Usage:
+    python netem.py --listen 127.0.0.1:9080 --server 127.0.0.1:8080 \\
+        --loss 0.05 --delay 40 --jitter 15 --duplicate 0.01 --reorder 0.02 --seed 1
+
+Point the game client (or loadgen.py) at the --listen address.
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+
+
+class Impairment:
+    """Decides the fate of the datagrams travelling in one direction."""
+
+    def __init__(self, loss: float = 0.0, delay_ms: float = 0.0, jitter_ms: float = 0.0,
+                 duplicate: float = 0.0, reorder: float = 0.0, reorder_gap_ms: float = 20.0,
+                 seed: int | None = None):
+        """Configure the impairment.
+
+        Args:
+            loss: Probability that a datagram is dropped.
+            delay_ms: Base one-way delay.
+            jitter_ms: Standard deviation of the delay (normally distributed, never negative).
+            duplicate: Probability that a datagram is delivered twice.
+            reorder: Probability that a datagram is held back, so later ones overtake it.
+            reorder_gap_ms: Extra delay of a held back datagram.
+            seed: Seed of this direction's random generator.
+        """
+        self.loss = loss
+        self.delay_ms = delay_ms
+        self.jitter_ms = jitter_ms
+        self.duplicate = duplicate
+        self.reorder = reorder
+        self.reorder_gap_ms = reorder_gap_ms
+        self.rng = random.Random(seed)
+        self.blackout_until = 0.0
+        self.stats = Counter()
+
+    def delays(self) -> list[float]:
+        """Return the delivery delays (in seconds) of one datagram; empty if it is dropped."""
+        self.stats["received"] += 1
+        if time.monotonic() < self.blackout_until:
+            self.stats["blackout_dropped"] += 1
+            return []
+        if self.rng.random() < self.loss:
+            self.stats["dropped"] += 1
+            return []
+
+        copies = 2 if self.rng.random() < self.duplicate else 1
+        if copies == 2:
+            self.stats["duplicated"] += 1
+        delays = []
+        for _ in range(copies):
+            delay = self.delay_ms
+            if self.jitter_ms:
+                delay = max(0.0, self.rng.gauss(self.delay_ms, self.jitter_ms))
+            if self.rng.random() < self.reorder:
+                delay += self.reorder_gap_ms
+                self.stats["reordered"] += 1
+            delays.append(delay / 1000.0)
+        self.stats["forwarded"] += copies
+        return delays
+
+    def blackout(self, seconds: float):
+        """Drop every datagram for the given time."""
+        self.blackout_until = time.monotonic() + seconds
+        self.stats["blackouts"] += 1
+
+
+class _UpstreamProtocol(asyncio.DatagramProtocol):
+    """Socket towards the server for one client address."""
+
+    def __init__(self, proxy: "ImpairedProxy", client_address):
+        self.proxy = proxy
+        self.client_address = client_address
+        self.transport = None
+        self.last_active = time.monotonic()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.last_active = time.monotonic()
+        self.proxy._forward(self.proxy.downstream, self.proxy.transport.sendto, data, self.client_address)
+
+
+class _ListenProtocol(asyncio.DatagramProtocol):
+    """Socket the clients talk to."""
+
+    def __init__(self, proxy: "ImpairedProxy"):
+        self.proxy = proxy
+
+    def datagram_received(self, data, addr):
+        self.proxy._from_client(data, addr)
+
+
+class ImpairedProxy:
+    """UDP proxy that impairs traffic between clients and the game server."""
+
+    def __init__(self, listen_address, server_address, upstream: Impairment, downstream: Impairment,
+                 idle_timeout: float = 300.0):
+        """Create the proxy.
+
+        Args:
+            listen_address: (ip, port) the clients send to.
+            server_address: (ip, port) of the game server.
+            upstream: Impairment of client -> server traffic.
+            downstream: Impairment of server -> client traffic.
+            idle_timeout: Seconds after which an idle client's upstream socket is closed.
+        """
+        self.listen_address = listen_address
+        self.server_address = server_address
+        self.upstream = upstream
+        self.downstream = downstream
+        self.idle_timeout = idle_timeout
+        self.transport = None
+        self.sessions: dict[tuple, _UpstreamProtocol] = {}
+        self._pending_sessions: dict[tuple, list[bytes]] = {}
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: _ListenProtocol(self), local_addr=self.listen_address)
+        loop.create_task(self._expire_sessions())
+
+    def close(self):
+        for session in self.sessions.values():
+            session.transport.close()
+        self.sessions.clear()
+        if self.transport:
+            self.transport.close()
+
+    def blackout(self, seconds: float):
+        """Drop all traffic in both directions for the given time."""
+        self.upstream.blackout(seconds)
+        self.downstream.blackout(seconds)
+
+    def _from_client(self, data: bytes, addr):
+        session = self.sessions.get(addr)
+        if session is not None:
+            session.last_active = time.monotonic()
+            self._forward(self.upstream, session.transport.sendto, data)
+        elif addr in self._pending_sessions:
+            self._pending_sessions[addr].append(data)
+        else:
+            self._pending_sessions[addr] = [data]
+            asyncio.get_running_loop().create_task(self._open_session(addr))
+
+    async def _open_session(self, addr):
+        loop = asyncio.get_running_loop()
+        try:
+            _, session = await loop.create_datagram_endpoint(
+                lambda: _UpstreamProtocol(self, addr), remote_addr=self.server_address)
+        except OSError:
+            self._pending_sessions.pop(addr, None)
+            return
+        self.sessions[addr] = session
+        for data in self._pending_sessions.pop(addr, []):
+            self._forward(self.upstream, session.transport.sendto, data)
+
+    def _forward(self, impairment: Impairment, send, data: bytes, *address):
+        loop = asyncio.get_running_loop()
+        for delay in impairment.delays():
+            if delay <= 0.0:
+                send(data, *address)
+            else:
+                loop.call_later(delay, self._send_later, send, data, address)
+
+    @staticmethod
+    def _send_later(send, data, address):
+        try:
+            send(data, *address)
+        except (OSError, AttributeError):
+            pass  # Socket was closed in the meantime
+
+    async def _expire_sessions(self):
+        while self.transport and not self.transport.is_closing():
+            await asyncio.sleep(min(self.idle_timeout, 10.0))
+            now = time.monotonic()
+            for addr, session in list(self.sessions.items()):
+                if now - session.last_active > self.idle_timeout:
+                    session.transport.close()
+                    del self.sessions[addr]
+
+    def get_stats(self) -> dict:
+        return {
+            "sessions": len(self.sessions),
+            "upstream": dict(self.upstream.stats),
+            "downstream": dict(self.downstream.stats),
+        }
+
+
+def _address(text: str) -> tuple[str, int]:
+    host, _, port = text.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+async def _run(args):
+    def impairment(seed):
+        return Impairment(loss=args.loss, delay_ms=args.delay, jitter_ms=args.jitter, duplicate=args.duplicate,
+                          reorder=args.reorder, reorder_gap_ms=args.reorder_gap, seed=seed)
+
+    # Each direction gets its own generator so that traffic in one doesn't shift the other
+    seed = args.seed
+    proxy = ImpairedProxy(args.listen, args.server,
+                          upstream=impairment(None if seed is None else seed * 2),
+                          downstream=impairment(None if seed is None else seed * 2 + 1))
+    await proxy.start()
+    print(f"Forwarding {args.listen[0]}:{args.listen[1]} -> {args.server[0]}:{args.server[1]}")
+
+    async def blackouts():
+        while True:
+            await asyncio.sleep(args.blackout_every)
+            proxy.blackout(args.blackout_for)
+            print(f"Blackout for {args.blackout_for} s")
+
+    if args.blackout_every:
+        asyncio.get_running_loop().create_task(blackouts())
+    try:
+        while True:
+            await asyncio.sleep(args.report)
+            print(proxy.get_stats())
+    finally:
+        proxy.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UDP proxy with loss, delay, jitter, duplication and reordering.")
+    parser.add_argument("--listen", type=_address, default=("127.0.0.1", 9080), help="ip:port for the clients")
+    parser.add_argument("--server", type=_address, default=("127.0.0.1", 8080), help="ip:port of the game server")
+    parser.add_argument("--loss", type=float, default=0.0, help="drop probability")
+    parser.add_argument("--delay", type=float, default=0.0, help="one-way delay in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="delay standard deviation in ms")
+    parser.add_argument("--duplicate", type=float, default=0.0, help="duplication probability")
+    parser.add_argument("--reorder", type=float, default=0.0, help="probability a datagram is held back")
+    parser.add_argument("--reorder-gap", type=float, default=20.0, help="extra delay of held back datagrams in ms")
+    parser.add_argument("--blackout-every", type=float, default=0.0, help="start a blackout every N seconds")
+    parser.add_argument("--blackout-for", type=float, default=15.0, help="blackout length in seconds")
+    parser.add_argument("--report", type=float, default=5.0, help="seconds between statistics reports")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
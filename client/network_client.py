@@ -1,48 +1,53 @@
 import socket
-import json
+import selectors
+import random
 import threading
 import queue
 import time
-
-
-class NetworkClient:
-    def __init__(self):
+from collections import deque
+from keepalive import KeepaliveScheduler
+from message_queue import CoalescingQueue
+from metrics import ClientMetrics, metrics_enabled
+from codec import BINARY, JSON
+from framing import RECEIVE_BUFFER_SIZE
+from protocol import ProtocolState
+from recorder import RECEIVED, SENT, DatagramRecorder, recording_path
+from reliability import ReliableSender
+
+# Heartbeats lost in a row before the client starts to reconnect
+LOST_HEARTBEATS_BEFORE_RECONNECT = 3
+# Moves remembered while reconnecting; older ones are dropped first
+MAX_BUFFERED_INTENTS = 4
+
+
+class NetworkClient(ProtocolState):
+    def __init__(self, reliable=True, metrics=None, record=None, delta=True, codec=BINARY):
+        super().__init__(delta, codec)
+        self.reliable = reliable  # Sequence, acknowledge and retransmit moves
+        if metrics is None:
+            metrics = metrics_enabled()
+        self.metrics = ClientMetrics() if metrics else None  # None keeps instrumentation free
+        if record is None:
+            record = recording_path()
+        self.recorder = DatagramRecorder(record) if record else None  # Datagram log, see recorder.py
+        self.sender = None
         self.socket = None
-        self.message_queue = queue.Queue()
-        self.running = False
-        self.game_state = None
-        self.connected = False
-        self.waiting_for_player = False
-        self.player_name = None
+        self.selector = None
+        self._wakeup_reader = None
+        self._wakeup_writer = None
+        self.message_queue = CoalescingQueue()
+        # Datagrams are received into this buffer instead of a new bytes object each
+        self._receive_buffer = memoryview(bytearray(RECEIVE_BUFFER_SIZE))
         self.receive_thread = None
-        self.heartbeat_thread = None
+        self.keepalive = KeepaliveScheduler()
         self.server_address = None
         self.reconnect_attempts = 0
-        self.max_reconnect_attempts = 3
-        self.reconnect_delay = 5  # seconds
-        self.game_started = False
-        self.disconnected = False
-
-    def _validate_message_for_state(self, message):
-        """Validate if the message is appropriate for the current game state"""
-        message_type = message.get("type", "")
-        if not self.disconnected:
-            if self.game_started:
-                # Messages that shouldn't be sent during an active game
-                if message_type in ["connect", "connect_ack"]:
-                    return False, "Cannot send connection messages during active game"
-            else:
-                # Messages that shouldn't be sent before game starts
-                if message_type in ["play_card", "draw_card"]:
-                    return False, "Cannot perform game actions before game starts"
-
-            # Add validation for specific game states
-            if message_type == "play_card" and self.waiting_for_player:
-                return False, "Cannot play cards while waiting for player"
-
-            if message_type == "draw_card" and self.waiting_for_player:
-                return False, "Cannot draw cards while waiting for player"
-        return True, ""
+        self.max_reconnect_attempts = 6
+        self.reconnect_delay = 0.5  # seconds, doubled after every attempt
+        self.max_reconnect_delay = 8.0
+        self.reconnecting = False
+        self._reconnect_at = None
+        self._intents = deque(maxlen=MAX_BUFFERED_INTENTS)  # Moves made while reconnecting
 
     def connect(self, ip, port, player_name):
         # Clean up any existing connection
@@ -50,39 +55,72 @@ class NetworkClient:
             self.close()
 
         # Create new socket and connection
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.selector = selectors.DefaultSelector()
+        self._wakeup_reader, self._wakeup_writer = socket.socketpair()
+        self._wakeup_reader.setblocking(False)
+        self._wakeup_writer.setblocking(False)
+        self.selector.register(self._wakeup_reader, selectors.EVENT_READ)
+        self._open_socket()
         self.server_address = (ip, int(port))
         self.player_name = player_name
         self.running = True
         self.connected = False
         self.disconnected = False
         self.waiting_for_player = False
+        self.reconnecting = False
+        self.reconnect_attempts = 0
+        self.state_version = None
+        self.send_codec = JSON
+        self.reassembler.clear()
+        self._intents.clear()
+        self.sender = ReliableSender(encode=self._encode) if self.reliable else None
+        self.keepalive.reset()
+        if self.recorder:
+            self.recorder.open()
 
         connect_message = {
             "type": "connect",
-            "name": player_name
+            "name": player_name,
+            "delta": self.delta,
+            "codec": self.codec
         }
         self.send_message(connect_message)
 
         # Start receiving thread
-        self.receive_thread = threading.Thread(target=self._receive_messages)
+        self.receive_thread = threading.Thread(target=self._receive_messages, name="network-receive")
         self.receive_thread.daemon = True
         self.receive_thread.start()
 
-        # Start heartbeat thread
-        self.heartbeat_thread = threading.Thread(target=self._send_heartbeat)
-        self.heartbeat_thread.daemon = True
-        self.heartbeat_thread.start()
+    def _open_socket(self):
+        """Create a fresh non-blocking UDP socket and register it with the selector."""
+        if self.socket:
+            try:
+                self.selector.unregister(self.socket)
+            except (KeyError, ValueError):
+                pass
+            self.socket.close()
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+        self.selector.register(self.socket, selectors.EVENT_READ)
 
     def _send_heartbeat(self):
-        while self.running:
-            if self.connected:
-                heartbeat_message = {
-                    "type": "heartbeat",
-                    "name": self.player_name
-                }
+        """Send a heartbeat if nothing else was sent for a whole keepalive interval."""
+        if self.connected:
+            heartbeat_message = self.keepalive.heartbeat(self.player_name)
+            if heartbeat_message:
                 self.send_message(heartbeat_message)
-            time.sleep(5)  # Send heartbeat every 5 seconds
+
+    def _select_timeout(self):
+        """Time until the receive loop has to wake up for a retransmission or a heartbeat."""
+        timeouts = []
+        if self.sender:
+            timeouts.append(self.sender.next_timeout())
+        if self.connected:
+            timeouts.append(self.keepalive.next_timeout())
+        if self.reconnecting:
+            timeouts.append(max(0.0, self._reconnect_at - time.monotonic()))
+        timeouts = [timeout for timeout in timeouts if timeout is not None]
+        return min(timeouts) if timeouts else None
 
     def send_message(self, message):
         try:
@@ -90,80 +128,163 @@ class NetworkClient:
                 # Validate message for current state
                 is_valid, error_msg = self._validate_message_for_state(message)
                 if not is_valid:
-                    self.message_queue.put({"type": "unknown", "message": {error_msg}})
+                    self.message_queue.put({"type": "unknown", "message": error_msg})
                     return
 
-                data = json.dumps(message, ensure_ascii=False).encode()
-                self.socket.sendto(data, self.server_address)
+                self._sendto(self._encode(message))
 
         except Exception as e:
             self.connected = False
 
+    def _sendto(self, data):
+        """Send an encoded message to the server, in fragments if it is too large for one datagram."""
+        for datagram in self.fragmenter.split(data):
+            self.socket.sendto(datagram, self.server_address)
+            if self.metrics is not None:
+                self.metrics.datagram_out(len(datagram))
+            if self.recorder:
+                self.recorder.record(SENT, datagram)
+        self.keepalive.note_sent()
+
+    def _send_move(self, message):
+        """Send a move, with a sequence number and retransmissions when reliable delivery is on."""
+        if self.reconnecting:
+            # Sent once the session is resumed
+            self._intents.append(message)
+            return
+        if self.sender is None:
+            self.send_message(message)
+            return
+        is_valid, error_msg = self._validate_message_for_state(message)
+        if not is_valid:
+            self.message_queue.put({"type": "unknown", "message": error_msg})
+            return
+        try:
+            if self.socket and self.server_address:
+                self._sendto(self.sender.track(message))
+        except OSError:
+            pass  # The retransmission timer sends it again
+        # Let the receive loop pick up the new retransmission deadline
+        self._wakeup()
+
+    def _retransmit(self):
+        """Send the moves whose acknowledgement is overdue again."""
+        resend, failed = self.sender.poll()
+        for data in resend:
+            try:
+                self._sendto(data)
+            except (OSError, AttributeError, TypeError):
+                break
+        for message in failed:
+            self.message_queue.put({
+                "type": "error",
+                "message": f"The server did not confirm your move ({message['type']})."
+            })
+        if failed:
+            self._handle_disconnect()
+
     def _receive_messages(self):
+        """Wait for the socket (or the wakeup pipe) to become readable and drain it."""
         while self.running:
             try:
-                if not self.socket:
+                events = self.selector.select(self._select_timeout())
+            except (OSError, ValueError, AttributeError):
+                # Selector was closed underneath us
+                break
+
+            for key, _ in events:
+                if not self.running:
                     break
+                if key.fileobj is self._wakeup_reader:
+                    self._drain_wakeup()
+                else:
+                    self._drain_socket()
+            if not self.running:
+                break
+            if self.reconnecting:
+                self._reconnect_step()
+                continue
+            if self.sender:
+                self._retransmit()
+            self._send_heartbeat()
+            if self.keepalive.consecutive_lost >= LOST_HEARTBEATS_BEFORE_RECONNECT:
+                self._handle_disconnect()
+
+    def _drain_socket(self):
+        """Read every datagram that is pending on the socket without blocking."""
+        buffer = self._receive_buffer
+        while self.running and self.socket:
+            try:
+                size, _ = self.socket.recvfrom_into(buffer)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                # e.g. ICMP port unreachable reported on the socket
+                self._handle_disconnect()
+                return
+
+            # A view of the reused buffer, valid until the next datagram is received
+            data = buffer[:size]
+            if self.recorder:
+                self.recorder.record(RECEIVED, data)
+            self._handle_datagram(data)
+
+    def _drain_wakeup(self):
+        """Consume the bytes written to the wakeup pipe."""
+        try:
+            while self._wakeup_reader.recv(512):
+                pass
+        except (BlockingIOError, InterruptedError, OSError):
+            pass
 
-                data, _ = self.socket.recvfrom(4096)
+    def _wakeup(self):
+        """Interrupt a blocking select() in the receive thread."""
+        try:
+            if self._wakeup_writer:
+                self._wakeup_writer.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def _handle_datagram(self, data):
+        """Decode, validate and dispatch a single datagram received from the server."""
+        metrics = self.metrics
+        if metrics is not None:
+            received_ns = metrics.datagram_in(len(data))
+        data = self._reassemble(data)
+        if data is None:
+            return  # A fragment of a message that is not complete yet
+        message, error_msg = self._decode_message(data)
+        if message is None:
+            self._handle_invalid_message(error_msg)
+            return
+        if metrics is not None:
+            decoded_ns = metrics.decoded(message["type"], received_ns)
+        if self.reconnecting and message["type"] in ["resume_ack", "resume_rejected",
+                                                     "connect_ack", "game_state_update"]:
+            self._handle_resume_reply(message)
+            if message["type"] in ["resume_ack", "resume_rejected"]:
+                return
+        if message["type"] == "ack":
+            # Acknowledgements are consumed here, the UI never sees them
+            if self.sender:
+                self.sender.ack(message.get("seq"))
+            return
+        if message["type"] == "heartbeat_ack":
+            self.keepalive.ack(message.get("ts"))
+            self._check_version(message.get("version"))
+            return
+        if message["type"] == "state_delta" and not self._accept_delta(message):
+            return
 
-                # Validate message format
-                try:
-                    message = json.loads(data.decode('utf-8'))
-                    if not isinstance(message, dict) or "type" not in message:
-                        self._handle_invalid_message("Invalid message format")
-                        continue
-                except json.JSONDecodeError:
-                    self._handle_invalid_message("Invalid JSON format")
-                    continue
+        # Process valid message (timed first, the UI thread may take it right away)
+        if metrics is not None:
+            metrics.enqueued(message, received_ns, decoded_ns)
+        self.message_queue.put(message)
 
-                # Validate message for current state
-                is_valid, error_msg = self._validate_message_for_state(message)
-                if not is_valid:
-                    self._handle_invalid_message(error_msg)
-                    continue
-
-                # Process valid message
-                self.message_queue.put(message)
-
-                if message["type"] == "connect_ack":
-                    self.connected = True
-                    self.waiting_for_player = message.get("waiting_for_player", False)
-                    if not self.waiting_for_player:
-                        self.game_state = message
-                        self.game_started = True
-                elif message["type"] == "game_state_update":
-                    self.waiting_for_player = False
-                    self.connected = True
-                    self.game_state = message
-                    self.game_started = True
-                elif message["type"] == "name_taken":
-                    self.connected = False
-                    self.running = False
-                    self.message_queue.put({"type": "name_taken"})
-                elif message["type"] == "player_disconnected":
-                    self.waiting_for_player = True
-                elif message["type"] == "player_reconnected":
-                    self.waiting_for_player = False
-                    self.game_state = message
-                elif message["type"] == "game_over":
-                    self.connected = False
-                    self.running = False
-                    self.game_started = False
-                elif message["type"] == "error":
-                    pass
-                elif message["type"] == "player_played_card":
-                    pass
-                elif message["type"] == "player_drawn_card":
-                    pass
-                else:
-                    self._handle_invalid_message(message.get("message", "Server error"))
-
-            except Exception as e:
-                if self.running:
-                    if not self._handle_disconnect():
-                        break
-            time.sleep(0.05)
+        if not self._apply_server_message(message):
+            self._handle_invalid_message(message.get("message", "Server error"))
+        elif message["type"] == "name_taken":
+            self.message_queue.put({"type": "name_taken"})
 
     def _handle_invalid_message(self, error_message):
         """Handle invalid messages and track their count"""
@@ -173,6 +294,21 @@ class NetworkClient:
         })
         self.close()
 
+    def get_stats(self):
+        """Link, queue and reliability statistics, plus the stage timings if metrics are enabled."""
+        stats = {
+            "keepalive": self.keepalive.get_stats(),
+            "queue": self.message_queue.get_stats(),
+            "reconnecting": self.reconnecting,
+            "framing": dict(self.reassembler.stats),
+            "metrics": self.metrics.get_stats() if self.metrics is not None else None,
+        }
+        if self.sender:
+            rtt = self.sender.rtt
+            stats["reliability"] = dict(self.sender.stats, rto_ms=rtt.rto * 1000,
+                                        srtt_ms=rtt.srtt * 1000 if rtt.srtt is not None else None)
+        return stats
+
     def get_next_message(self):
         try:
             return self.message_queue.get_nowait()
@@ -187,7 +323,7 @@ class NetworkClient:
             "card": card,
             "player_name": self.player_name
         }
-        self.send_message(message)
+        self._send_move(message)
 
     def draw_card(self):
         if self.waiting_for_player:
@@ -196,7 +332,7 @@ class NetworkClient:
             "type": "draw_card",
             "player_name": self.player_name
         }
-        self.send_message(message)
+        self._send_move(message)
 
     def close(self):
         """Properly close the connection and clean up resources."""
@@ -211,25 +347,41 @@ class NetworkClient:
                         "name": self.player_name
                     }
                     self.send_message(disconnect_message)
-
-                self.socket.close()
             except:
                 pass
-            finally:
-                self.socket = None
+
+        # Wake the receive thread so it leaves select() before the socket goes away
+        self._wakeup()
 
         # Wait for threads to finish
-        if self.receive_thread and self.receive_thread.is_alive():
+        current = threading.current_thread()
+        if self.receive_thread and self.receive_thread.is_alive() and self.receive_thread is not current:
             self.receive_thread.join(timeout=1.0)
-        if self.heartbeat_thread and self.heartbeat_thread.is_alive():
-            self.heartbeat_thread.join(timeout=1.0)
 
-        # Clear the message queue
-        while not self.message_queue.empty():
+        if self.selector:
             try:
-                self.message_queue.get_nowait()
-            except queue.Empty:
-                break
+                self.selector.close()
+            except:
+                pass
+            finally:
+                self.selector = None
+
+        for sock in (self.socket, self._wakeup_reader, self._wakeup_writer):
+            if sock:
+                try:
+                    sock.close()
+                except:
+                    pass
+        self.socket = None
+        if self.sender:
+            self.sender.reset()
+        if self.recorder:
+            self.recorder.close()
+        self._wakeup_reader = None
+        self._wakeup_writer = None
+
+        # Clear the message queue
+        self.message_queue.clear()
 
         # Reset all client state
         self.connected = False
@@ -239,66 +391,66 @@ class NetworkClient:
         self.player_name = None
         self.game_state = None
         self.receive_thread = None
-        self.heartbeat_thread = None
 
     def _handle_disconnect(self):
-        """Handle disconnection with automatic reconnection attempts."""
-        if not self.running:
-            return False
+        """Start reconnecting in the background; the receive loop keeps running."""
+        if not self.running or self.reconnecting:
+            return
+        self.reconnecting = True
+        self.connected = False
         self.disconnected = True
-        while self.reconnect_attempts < self.max_reconnect_attempts and self.running:
-            print(
-                f"Connection lost. Attempting to reconnect ({self.reconnect_attempts + 1}/{self.max_reconnect_attempts})...")
-            try:
-                # Clean up socket and attempt to reconnect
-                if self.socket:
-                    self.socket.close()
-                self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-
-                # Send reconnect message
-                connect_message = {
-                    "type": "connect",
-                    "name": self.player_name
-                }
-                self.send_message(connect_message)
-
-                # Wait for server response with timeout
-                self.socket.settimeout(5.0)  # 5 second timeout
-                try:
-                    data, _ = self.socket.recvfrom(4096)
-                    message = json.loads(data.decode('utf-8'))
-
-                    if message["type"] in ["connect_ack", "game_state_update"]:
-                        print("Reconnection successful!")
-                        self.socket.settimeout(None)  # Remove timeout
-                        self.connected = True
-                        self.reconnect_attempts = 0
-                        self.game_state = message
-                        self.disconnected = False
-                        self.message_queue.put(message)
-                        return True
-                    elif message["type"] == "error":
-                        print(f"Reconnection failed: {message.get('message', 'Unknown error')}")
-
-                except socket.timeout:
-                    print("Reconnection attempt timed out")
-                except json.JSONDecodeError:
-                    print("Invalid response from server")
-
-            except Exception as e:
-                print(f"Reconnection attempt failed: {e}")
-
-            self.reconnect_attempts += 1
-            time.sleep(self.reconnect_delay)
+        self.reconnect_attempts = 0
+        self._reconnect_at = time.monotonic()
+        self.message_queue.put({"type": "connection_status", "message": "Connection lost. Reconnecting..."})
 
+    def _reconnect_step(self):
+        """Send the next resume request once its backoff delay has passed."""
+        if time.monotonic() < self._reconnect_at:
+            return
         if self.reconnect_attempts >= self.max_reconnect_attempts:
-            print("Failed to reconnect after maximum attempts")
+            self._reconnect_failed("Connection lost and could not reconnect. Please restart the game.")
+            return
+
+        # The same socket is kept, so a send never races with a socket swap
+        self.send_message({
+            "type": "resume",
+            "name": self.player_name,
+            "version": self.state_version if self.state_version is not None else -1
+        })
+        self.reconnect_attempts += 1
+
+        # Exponential backoff with jitter, so clients that lost the server together don't retry together
+        delay = min(self.max_reconnect_delay, self.reconnect_delay * 2 ** (self.reconnect_attempts - 1))
+        self._reconnect_at = time.monotonic() + random.uniform(delay / 2, delay)
+
+    def _handle_resume_reply(self, message):
+        """Finish reconnecting after the server answered a resume request."""
+        if message["type"] == "resume_rejected":
+            self._reconnect_failed(message.get("message", "The server refused to resume the game."))
+            return
+
+        self.reconnecting = False
+        self.reconnect_attempts = 0
+        self.disconnected = False
+        self.connected = True
+        self.keepalive.reset()
+        self.message_queue.put({"type": "connection_status", "message": "Reconnected."})
+
+        intents = list(self._intents)
+        self._intents.clear()
+        if message["type"] == "resume_ack":
+            # Nothing changed while we were away, the buffered moves are still valid
+            for intent in intents:
+                self._send_move(intent)
+        elif intents:
             self.message_queue.put({
-                "type": "unknown",
-                "message": "Connection lost and could not reconnect. Please restart the game."
+                "type": "connection_status",
+                "message": "The game changed while reconnecting, please make your move again."
             })
-            self.connected = False
-            self.reconnect_attempts = 0
-            return False
 
-        return False
+    def _reconnect_failed(self, reason):
+        self.reconnecting = False
+        self.connected = False
+        self.running = False
+        self._intents.clear()
+        self.message_queue.put({"type": "unknown", "message": reason})
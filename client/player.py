@@ -1,14 +1,17 @@
 """Class representing player."""
-from card import Card
+from card import Card, cards_from_mask, LEGAL_MASKS, SUIT_MASKS
 
 
 class Player:
     """
     Represents a player in the card game.
 
+    The hand is stored as a 32-bit mask over card codes, so adding, removing and
+    checking cards are single integer operations.
+
     Attributes:
         name: The name of the player.
-        hand: The cards currently held by the player.
+        hand_mask: Bitmask of the cards currently held by the player.
     """
     def __init__(self, name: str = None):
         """Initialize a player with a name and an empty hand.
@@ -17,7 +20,12 @@ class Player:
             name (str): The name of the player.
         """
         self.name: str = name
-        self.hand: list[Card] = []
+        self.hand_mask: int = 0
+
+    @property
+    def hand(self) -> tuple[Card, ...]:
+        """The cards currently held by the player, ordered by card code (read-only, see hand_mask)."""
+        return cards_from_mask(self.hand_mask)
 
     def draw_card(self, card: Card):
         """Add a card to the player's hand.
@@ -26,7 +34,25 @@ class Player:
             card (Card): The card to be added to the player's hand.
         """
         if card:
-            self.hand.append(card)
+            self.hand_mask |= card.mask
+
+    def legal_moves(self, top_discard: Card, allowed_suit: str | None = None) -> int:
+        """Return the cards from the hand that may be played, in constant time.
+
+        A card may be played if it matches the allowed suit, the suit or rank of the top
+        card of the discard pile, or if it is a queen.
+
+        Args:
+            top_discard: The top card of the discard pile.
+            allowed_suit: The currently allowed suit for play, if any.
+
+        Returns:
+            int: Bitmask of the playable cards (see card.cards_from_mask).
+        """
+        legal = LEGAL_MASKS[top_discard.code]
+        if allowed_suit:
+            legal |= SUIT_MASKS.get(allowed_suit, 0)
+        return self.hand_mask & legal
 
     def play_card(self, card: Card, top_discard: Card, allowed_suite: str) -> bool:
         """Try to play a card.
@@ -41,13 +67,8 @@ class Player:
         Returns:
             bool: True if the card was successfully played, False otherwise.
         """
-        if allowed_suite:
-            if card.suit == allowed_suite:
-                self.hand.remove(card)
-                return True
-
-        if card.suit == top_discard.suit or card.rank == top_discard.rank or card.rank == 'Q':
-            self.hand.remove(card)
+        if card.mask & self.legal_moves(top_discard, allowed_suite):
+            self.hand_mask &= ~card.mask
             return True
         return False
 
@@ -57,7 +78,7 @@ class Player:
         Returns:
             bool: True if the player's hand is empty, indicating a win; False otherwise.
         """
-        return len(self.hand) == 0
+        return self.hand_mask == 0
 
     def get_hand_size(self) -> int:
         """Return the number of cards in the player's hand.
@@ -65,7 +86,7 @@ class Player:
         Returns:
             int: The number of cards currently held by the player.
         """
-        return len(self.hand)
+        return self.hand_mask.bit_count()
 
     def __str__(self):
         """String representation of the player's name and hand size.
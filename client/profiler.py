@@ -0,0 +1,174 @@
+"""Opt-in sampling profiler for the client.
+
+A daemon thread wakes up at a fixed rate and records the stack of each watched
+thread with sys._current_frames(), so a client that freezes in production can be
+profiled without a debugger. By default it watches the Tk main thread and the
+network receive thread. Since the adaptive keepalive, heartbeats are sent from the
+receive thread, so there is no separate heartbeat thread to watch.
+
+With trace_memory, methods wrapped by instrument() take a tracemalloc snapshot
+before and after every call and accumulate the allocation differences per line.
+
+On stop() the profiler writes:
+    <output>.collapsed   one "thread;frame;frame;... count" line per stack, the input
+                         format of flamegraph.pl, speedscope and inferno
+    <output>.memory.txt  top allocation sites per instrumented method (trace_memory only)
+
+Enable it with ``python main.py --profile`` or PRSI_PROFILE=1 (see main.py).
+"""
+import functools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+PROFILE_ENV = "PRSI_PROFILE"
+DEFAULT_THREADS = ("MainThread", "network-receive")
+# Methods of CardGameGUI that tracemalloc snapshots are taken around
+MEMORY_TRACED_METHODS = ("update_game_state", "create_hand_buttons")
+
+
+def profiling_enabled() -> bool:
+    """True if the PRSI_PROFILE environment variable asks for profiling."""
+    return os.environ.get(PROFILE_ENV, "").lower() in ("1", "true", "yes", "on")
+
+
+class SamplingProfiler:
+    """Samples thread stacks at a fixed rate and aggregates them as collapsed stacks."""
+
+    def __init__(self, rate_hz: float = 200.0, threads=DEFAULT_THREADS, output: str = "prsi-profile",
+                 trace_memory: bool = False, memory_frames: int = 5, top_allocations: int = 20):
+        """Configure the profiler.
+
+        Args:
+            rate_hz: Samples per second.
+            threads: Names of the threads to sample.
+            output: Path prefix of the files written on stop().
+            trace_memory: Take tracemalloc snapshots around instrumented methods.
+            memory_frames: Frames tracemalloc stores per allocation.
+            top_allocations: Allocation sites listed per method in the memory report.
+        """
+        self.interval = 1.0 / rate_hz
+        self.threads = frozenset(threads)
+        self.output = output
+        self.trace_memory = trace_memory
+        self.memory_frames = memory_frames
+        self.top_allocations = top_allocations
+        self.stacks = Counter()
+        self.samples = 0
+        self.memory: dict[str, Counter] = {}  # method -> allocation site -> bytes
+        self.memory_calls = Counter()
+        # Leave out the allocations of the snapshots themselves
+        self._memory_filters = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+        self._code_names: dict = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self._started = None
+
+    def start(self):
+        if self._thread:
+            return
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(self.memory_frames)
+        self._started = time.perf_counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling and write the output files."""
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self._thread = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.write()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        next_sample = time.perf_counter()
+        while not self._stop.is_set():
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                name = names.get(thread_id)
+                if thread_id != own_id and name in self.threads:
+                    self.stacks[self._collapse(name, frame)] += 1
+            self.samples += 1
+
+            # Keep the rate steady even when sampling itself takes a while
+            next_sample += self.interval
+            delay = next_sample - time.perf_counter()
+            if delay < 0:
+                next_sample = time.perf_counter()
+                delay = 0
+            self._stop.wait(delay)
+
+    def _collapse(self, thread_name: str, frame) -> str:
+        """Stack as "thread;outermost;...;innermost" with one "file:function" per frame."""
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            name = self._code_names.get(code)
+            if name is None:
+                # co_qualname is new in Python 3.11
+                qualname = getattr(code, "co_qualname", code.co_name)
+                name = f"{os.path.basename(code.co_filename)}:{qualname}".replace(";", ",")
+                self._code_names[code] = name
+            names.append(name)
+            frame = frame.f_back
+        names.append(thread_name)
+        return ";".join(reversed(names))
+
+    def instrument(self, cls, method_names=MEMORY_TRACED_METHODS):
+        """Wrap methods of a class so tracemalloc snapshots are taken around every call.
+
+        Does nothing unless trace_memory is on, so the methods stay untouched otherwise.
+        """
+        if not self.trace_memory:
+            return
+        for method_name in method_names:
+            method = getattr(cls, method_name)
+            setattr(cls, method_name, self._traced(method_name, method))
+
+    def _traced(self, label: str, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            if not tracemalloc.is_tracing():
+                return method(*args, **kwargs)
+            before = tracemalloc.take_snapshot().filter_traces(self._memory_filters)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                after = tracemalloc.take_snapshot().filter_traces(self._memory_filters)
+                sites = self.memory.setdefault(label, Counter())
+                for stat in after.compare_to(before, "lineno"):
+                    if stat.size_diff > 0:
+                        frame = stat.traceback[0]
+                        sites[f"{frame.filename}:{frame.lineno}"] += stat.size_diff
+                self.memory_calls[label] += 1
+        return wrapper
+
+    def write(self):
+        """Write the collapsed stacks (and the memory report) to the output files."""
+        with open(f"{self.output}.collapsed", "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        if self.trace_memory:
+            with open(f"{self.output}.memory.txt", "w", encoding="utf-8") as f:
+                for label, sites in sorted(self.memory.items()):
+                    calls = self.memory_calls[label]
+                    f.write(f"{label}: {calls} calls, {sum(sites.values())} bytes allocated\n")
+                    for site, size in sites.most_common(self.top_allocations):
+                        f.write(f"  {size / calls:12.1f} B/call  {site}\n")
+
+    def get_stats(self) -> dict:
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        return {
+            "samples": self.samples,
+            "effective_rate_hz": self.samples / elapsed if elapsed else 0.0,
+            "stacks": len(self.stacks),
+        }
@@ -0,0 +1,190 @@
+"""Connection state and message rules shared by the network clients."""
+import time
+
+from codec import BINARY, JSON, decode, encode, is_binary
+from framing import Fragmenter, Reassembler, is_fragment
+
+# Seconds before a snapshot request that went unanswered is sent again
+SNAPSHOT_RETRY = 1.0
+
+
+class ProtocolState:
+    """Tracks the client side of the game protocol.
+
+    Both the threaded NetworkClient and the asyncio AsyncNetworkClient derive from
+    this class so that they validate and react to server messages the same way.
+    """
+
+    def __init__(self, delta=True, codec=BINARY):
+        self.delta = delta  # Ask the server for state_delta messages instead of full states
+        self.codec = codec  # Wire codec asked for at connect, see codec.py
+        self.send_codec = JSON  # Codec of outgoing messages, the requested one once the server agreed
+        self.running = False
+        self.game_state = None  # Last full game state; state_delta messages are applied by GameSession
+        self.connected = False
+        self.waiting_for_player = False
+        self.player_name = None
+        self.game_started = False
+        self.disconnected = False
+        self.state_version = None  # "version" of the last game state received
+        self._snapshot_requested_at = None
+        self.fragmenter = Fragmenter()  # Splits messages too large for one datagram, see framing.py
+        self.reassembler = Reassembler()
+
+    def _validate_message_for_state(self, message):
+        """Validate if the message is appropriate for the current game state"""
+        message_type = message.get("type", "")
+        if not self.disconnected:
+            if self.game_started:
+                # Messages that shouldn't be sent during an active game
+                if message_type in ["connect", "connect_ack"]:
+                    return False, "Cannot send connection messages during active game"
+            else:
+                # Messages that shouldn't be sent before game starts
+                if message_type in ["play_card", "draw_card"]:
+                    return False, "Cannot perform game actions before game starts"
+
+            # Add validation for specific game states
+            if message_type == "play_card" and self.waiting_for_player:
+                return False, "Cannot play cards while waiting for player"
+
+            if message_type == "draw_card" and self.waiting_for_player:
+                return False, "Cannot draw cards while waiting for player"
+        return True, ""
+
+    def _decode_message(self, data):
+        """Decode a datagram and check it against the current state.
+
+        Args:
+            data: Raw bytes received from the server.
+
+        Returns:
+            tuple[dict | None, str]: The decoded message, or None and the reason it was rejected.
+        """
+        # Validate message format
+        try:
+            message = decode(data)
+        except ValueError:
+            return None, "Invalid message encoding"
+        if not isinstance(message, dict) or "type" not in message:
+            return None, "Invalid message format"
+        if self.codec == BINARY and is_binary(data):
+            self.send_codec = BINARY  # The server only answers in binary if it understands it
+
+        # Validate message for current state
+        is_valid, error_msg = self._validate_message_for_state(message)
+        if not is_valid:
+            return None, error_msg
+        return message, ""
+
+    def _encode(self, message) -> bytes:
+        """Encode an outgoing message with the negotiated codec."""
+        return encode(message, self.send_codec)
+
+    def _reassemble(self, data):
+        """The message a received datagram completes: the datagram itself unless it is a
+        fragment, the whole message after its last fragment, otherwise None."""
+        if is_fragment(data):
+            return self.reassembler.add(data)
+        return data
+
+    def _accept_delta(self, message):
+        """Check that a state_delta continues the state we hold.
+
+        Deltas for an older version are stale and dropped. After a gap the delta is
+        dropped as well and a full snapshot is requested (at most once per
+        SNAPSHOT_RETRY seconds), the deltas that follow it continue from there.
+
+        Returns:
+            bool: True if the delta applies to the current state, whose version it now is.
+        """
+        version = message.get("version")
+        base = message.get("base")
+        if self.state_version is not None and base == self.state_version:
+            self.state_version = version
+            return True
+        if self.state_version is not None and isinstance(version, int) and version <= self.state_version:
+            return False
+        self.request_snapshot()
+        return False
+
+    def _check_version(self, version):
+        """Compare our state with the version a heartbeat_ack or a rejected move reports.
+
+        A lost update is otherwise only noticed when the next one arrives, which never
+        happens if the lost update made it our turn.
+        """
+        if not self.game_started or not isinstance(version, int):
+            return
+        if self.state_version is None or version > self.state_version:
+            self.request_snapshot()
+
+    def request_snapshot(self):
+        """Ask the server for the full game state, at most once per SNAPSHOT_RETRY seconds.
+
+        Also used by GameSession when a state_delta does not continue the state it holds.
+        """
+        now = time.monotonic()
+        if self._snapshot_requested_at is None or now - self._snapshot_requested_at > SNAPSHOT_RETRY:
+            self._snapshot_requested_at = now
+            self.send_message({"type": "snapshot_request", "name": self.player_name})
+
+    def _apply_server_message(self, message):
+        """Update the connection state from a validated server message.
+
+        Args:
+            message: The decoded server message.
+
+        Returns:
+            bool: False if the message type is not part of the protocol.
+        """
+        if message["type"] == "connect_ack":
+            self.connected = True
+            if message.get("codec") == self.codec:
+                self.send_codec = self.codec
+            self.waiting_for_player = message.get("waiting_for_player", False)
+            if not self.waiting_for_player:
+                self.game_state = message
+                self.game_started = True
+        elif message["type"] == "game_state_update":
+            self.waiting_for_player = False
+            self.connected = True
+            self.game_state = message
+            self.game_started = True
+            self.state_version = message.get("version", self.state_version)
+            self._snapshot_requested_at = None
+        elif message["type"] == "state_delta":
+            # The version was taken over by _accept_delta
+            self.waiting_for_player = False
+            self.connected = True
+            self.game_started = True
+        elif message["type"] == "resume_ack":
+            self.connected = True
+            self.disconnected = False
+        elif message["type"] == "resume_rejected":
+            self.connected = False
+            self.running = False
+        elif message["type"] == "name_taken":
+            self.connected = False
+            self.running = False
+        elif message["type"] == "player_disconnected":
+            self.waiting_for_player = True
+        elif message["type"] == "player_reconnected":
+            self.waiting_for_player = False
+            self.game_state = message
+        elif message["type"] == "game_over":
+            self.connected = False
+            self.running = False
+            self.game_started = False
+        elif message["type"] == "error":
+            # Rejected moves carry the version the server judged them against
+            self._check_version(message.get("version"))
+        elif message["type"] == "player_played_card":
+            pass
+        elif message["type"] == "player_drawn_card":
+            pass
+        elif message["type"] in ["ack", "heartbeat_ack"]:
+            pass
+        else:
+            return False
+        return True
@@ -0,0 +1,91 @@
+"""Datagram recorder.
+
+A NetworkClient with recording enabled appends every datagram it sends or receives
+to a binary log, so a bug report can come with the exact traffic that caused it and
+real games can be replayed as a deterministic benchmark (see replay.py).
+
+Log format (little endian):
+    file header  b"PRSIREC1"
+    record       u64 monotonic timestamp in ns, u8 direction (0 received, 1 sent),
+                 u16 payload length, payload
+
+Every connection of a client appends to the same file; the timestamps keep the gaps
+between them.
+
+Enable recording with the environment variable PRSI_RECORD=<path> or
+``python main.py --record <path>``.
+"""
+import os
+import struct
+import threading
+import time
+
+RECORD_ENV = "PRSI_RECORD"
+MAGIC = b"PRSIREC1"
+RECEIVED = 0
+SENT = 1
+
+_RECORD = struct.Struct("<QBH")
+
+
+def recording_path() -> str | None:
+    """Log file named by the PRSI_RECORD environment variable, if any."""
+    return os.environ.get(RECORD_ENV) or None
+
+
+class DatagramRecorder:
+    """Appends datagrams to a binary log; safe to use from several threads."""
+
+    def __init__(self, path: str, buffer_size: int = 64 * 1024):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.records = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        """Open the log for appending, writing the header to a new file."""
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "ab", buffering=self.buffer_size)
+                if self._file.tell() == 0:
+                    self._file.write(MAGIC)
+
+    def record(self, direction: int, data: bytes):
+        """Append one datagram with the current monotonic time."""
+        header = _RECORD.pack(time.monotonic_ns(), direction, len(data))
+        with self._lock:
+            if self._file is not None:
+                self._file.write(header)
+                self._file.write(data)
+                self.records += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_records(buffer):
+    """Iterate over the records of a log held in a bytes-like object (e.g. an mmap).
+
+    Yields:
+        tuple[int, int, int, int]: Timestamp in ns, direction, payload start and end offset.
+
+    Raises:
+        ValueError: If the buffer is not a datagram log.
+    """
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a datagram log")
+    offset = len(MAGIC)
+    size = len(buffer)
+    unpack_from = _RECORD.unpack_from
+    header_size = _RECORD.size
+    while offset + header_size <= size:
+        timestamp, direction, length = unpack_from(buffer, offset)
+        start = offset + header_size
+        offset = start + length
+        if offset > size:
+            return  # Truncated by a crash while recording
+        yield timestamp, direction, start, offset
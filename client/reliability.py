@@ -0,0 +1,161 @@
+"""Reliable delivery of game moves over UDP.
+
+Moves (play_card, draw_card) carry a sequence number and are sent again until the
+server acknowledges them with {"type": "ack", "seq": n}. The server re-acknowledges
+a sequence number it has already seen without applying the move twice, so a
+retransmission never plays a card twice. Heartbeats and state pushes stay fire-and-forget.
+
+The retransmission timeout follows RFC 6298: a smoothed RTT and its variation are
+updated from acknowledged moves that were sent only once (Karn's algorithm), and the
+timeout doubles after every retransmission.
+"""
+import threading
+import time
+
+from codec import encode as encode_json
+
+
+class RttEstimator:
+    """Smoothed round-trip time and retransmission timeout (RFC 6298)."""
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    K = 4
+
+    def __init__(self, initial_rto: float = 1.0, min_rto: float = 0.2, max_rto: float = 8.0):
+        """Create an estimator without samples.
+
+        Args:
+            initial_rto: Timeout in seconds until the first RTT sample arrives.
+            min_rto: Lower bound of the timeout. RFC 6298 asks for one second, which is
+                far too slow for a card game on a LAN.
+            max_rto: Upper bound of the timeout, also after backing off.
+        """
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+        self.srtt = None
+        self.rttvar = None
+        self.rto = initial_rto
+
+    def sample(self, rtt: float):
+        """Update the estimate with a measured round-trip time in seconds."""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+        self.rto = min(self.max_rto, max(self.min_rto, self.srtt + self.K * self.rttvar))
+
+    def backoff(self):
+        """Double the timeout after a retransmission."""
+        self.rto = min(self.max_rto, self.rto * 2)
+
+
+class _PendingMessage:
+    __slots__ = ("message", "data", "first_sent", "deadline", "attempts")
+
+    def __init__(self, message: dict, data: bytes, now: float, rto: float):
+        self.message = message
+        self.data = data
+        self.first_sent = now
+        self.deadline = now + rto
+        self.attempts = 1
+
+
+class ReliableSender:
+    """Numbers outgoing moves and keeps them until the server acknowledges them.
+
+    The sender never touches a socket: track() returns the datagram to send and
+    poll() the datagrams due for retransmission, so it works with both the selector
+    loop of NetworkClient and an event loop. All methods are thread-safe.
+    """
+
+    def __init__(self, max_attempts: int = 6, rtt: RttEstimator | None = None, encode=None):
+        """Create a sender.
+
+        Args:
+            max_attempts: Transmissions of a move before it is given up.
+            rtt: Estimator to use; a default RttEstimator if omitted.
+            encode: Turns a message into a datagram; JSON if omitted.
+        """
+        self.max_attempts = max_attempts
+        self.rtt = rtt or RttEstimator()
+        self.encode = encode or encode_json
+        self.pending: dict[int, _PendingMessage] = {}
+        self.next_seq = 1
+        self.stats = {"sent": 0, "retransmitted": 0, "acked": 0, "duplicate_acks": 0, "failed": 0}
+        self._lock = threading.Lock()
+
+    def track(self, message: dict) -> bytes:
+        """Assign the next sequence number to a message and remember it.
+
+        Returns:
+            bytes: The encoded datagram to send.
+        """
+        with self._lock:
+            message = dict(message, seq=self.next_seq)
+            self.next_seq += 1
+            data = self.encode(message)
+            self.pending[message["seq"]] = _PendingMessage(message, data, time.monotonic(), self.rtt.rto)
+            self.stats["sent"] += 1
+            return data
+
+    def ack(self, seq) -> bool:
+        """Handle an acknowledgement.
+
+        Returns:
+            bool: False for an acknowledgement of an unknown or already acknowledged move.
+        """
+        try:
+            seq = int(seq)
+        except (TypeError, ValueError):
+            return False
+        with self._lock:
+            entry = self.pending.pop(seq, None)
+            if entry is None:
+                self.stats["duplicate_acks"] += 1
+                return False
+            if entry.attempts == 1:
+                # Karn's algorithm: an ack of a retransmitted move is ambiguous
+                self.rtt.sample(time.monotonic() - entry.first_sent)
+            self.stats["acked"] += 1
+            return True
+
+    def poll(self) -> tuple[list[bytes], list[dict]]:
+        """Collect the moves whose timeout expired.
+
+        Returns:
+            tuple[list[bytes], list[dict]]: Datagrams to send again, and the messages
+            that ran out of attempts and were dropped.
+        """
+        now = time.monotonic()
+        resend, failed = [], []
+        with self._lock:
+            for seq, entry in list(self.pending.items()):
+                if entry.deadline > now:
+                    continue
+                if entry.attempts >= self.max_attempts:
+                    del self.pending[seq]
+                    failed.append(entry.message)
+                    self.stats["failed"] += 1
+                    continue
+                self.rtt.backoff()
+                entry.attempts += 1
+                entry.deadline = now + self.rtt.rto
+                resend.append(entry.data)
+                self.stats["retransmitted"] += 1
+        return resend, failed
+
+    def next_timeout(self) -> float | None:
+        """Seconds until the next retransmission is due, or None if nothing is pending."""
+        with self._lock:
+            if not self.pending:
+                return None
+            deadline = min(entry.deadline for entry in self.pending.values())
+        return max(0.0, deadline - time.monotonic())
+
+    def reset(self):
+        """Forget every pending move, e.g. when the connection is closed."""
+        with self._lock:
+            self.pending.clear()
@@ -0,0 +1,121 @@
+"""Replay engine for datagram logs written by the recorder.
+
+The log is memory-mapped and its received datagrams are fed through
+NetworkClient._handle_datagram and a GameSession, the same decode and dispatch path
+live traffic takes, either at the recorded pace or as fast as possible. Replaying
+a bug report reproduces what the client saw; replaying as fast as possible turns
+real games into a deterministic throughput benchmark.
+
+Usage:
+    python replay.py game.rec --speed 1
+    python replay.py game.rec --repeat 20 --output replay.json
+"""
+import argparse
+import json
+import mmap
+import time
+
+from game_session import CONNECTING, GameSession
+from network_client import NetworkClient
+from recorder import SENT, read_records
+
+
+def _player_name(buffer) -> str | None:
+    """Name from the first connect message the client sent."""
+    for _, direction, start, end in read_records(buffer):
+        if direction == SENT:
+            try:
+                message = json.loads(buffer[start:end])
+            except ValueError:
+                continue
+            if isinstance(message, dict) and message.get("type") == "connect":
+                return message.get("name")
+    return None
+
+
+def replay(path: str, speed: float = 0.0, name: str | None = None, metrics: bool = False) -> dict:
+    """Feed the received datagrams of a log through a fresh client and session.
+
+    Args:
+        path: The datagram log.
+        speed: 0 replays as fast as possible, 1 at the recorded pace, 2 twice as fast, ...
+        name: Player name; by default the one of the recorded connect message.
+        metrics: Collect the client's stage timings (see metrics.py).
+
+    Returns:
+        dict: Counts, throughput and the session's final phase.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        name = name or _player_name(buffer) or "player"
+        client = NetworkClient(reliable=False, metrics=metrics)
+        client.player_name = name
+        client.running = True
+        session = GameSession(name, client, connect_timeout=None)
+        session.phase = CONNECTING
+        client_metrics = client.metrics
+
+        received = sent = bytes_received = messages = 0
+        first_timestamp = None
+        start = time.perf_counter()
+        for timestamp, direction, begin, end in read_records(buffer):
+            if direction == SENT:
+                sent += 1
+                continue
+            if speed:
+                if first_timestamp is None:
+                    first_timestamp = timestamp
+                delay = (timestamp - first_timestamp) / 1e9 / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            data = buffer[begin:end]
+            client._handle_datagram(data)
+            messages += session.poll()
+            received += 1
+            bytes_received += len(data)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "player": name,
+        "received": received,
+        "sent": sent,
+        "bytes_received": bytes_received,
+        "messages_dispatched": messages,
+        "elapsed_s": elapsed,
+        "datagrams_per_s": received / elapsed if elapsed else 0.0,
+        "mb_per_s": bytes_received / elapsed / 1e6 if elapsed else 0.0,
+        "final_phase": session.phase,
+        "winner": session.winner,
+        "metrics": client_metrics.get_stats() if client_metrics is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded datagram log through the client.")
+    parser.add_argument("path", help="log written by the recorder (PRSI_RECORD)")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="0 = as fast as possible, 1 = recorded pace, 2 = twice as fast, ...")
+    parser.add_argument("--name", default=None, help="player name (default: from the recorded connect)")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the log this many times")
+    parser.add_argument("--metrics", action="store_true", help="collect per-stage timings")
+    parser.add_argument("--output", default=None, help="write the results of the last run as JSON to this file")
+    args = parser.parse_args()
+
+    result = None
+    best = None
+    for _ in range(args.repeat):
+        result = replay(args.path, speed=args.speed, name=args.name, metrics=args.metrics)
+        if best is None or result["elapsed_s"] < best:
+            best = result["elapsed_s"]
+    print(f"{result['player']}: {result['received']} datagrams received ({result['bytes_received']} bytes), "
+          f"{result['sent']} sent, {result['messages_dispatched']} messages dispatched, "
+          f"final phase {result['final_phase']}" + (f", winner {result['winner']}" if result["winner"] else ""))
+    print(f"best of {args.repeat}: {best * 1000:.2f} ms, "
+          f"{result['received'] / best if best else 0.0:.0f} datagrams/s, "
+          f"{result['bytes_received'] / best / 1e6 if best else 0.0:.1f} MB/s")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""Vectorized batch simulator for Prší games.
+
+Plays many two-player games in lockstep with NumPy. Every game is a row in a set of
+arrays: the deck is a row of an (N, 32) permutation matrix of card codes with a read
+pointer, hands and the discard pile are 32-bit masks over card codes.
+
+Rules follow Player.play_card (match suit or rank, queens are wild) and the server's
+special cards: a 7 makes the opponent draw two cards and an ace skips the opponent,
+so in both cases the same player plays again. A player without a legal card draws one
+card and the turn passes. When the deck runs out, the discard pile except its top card
+becomes the new deck; a game in which nothing can be drawn any more is a stalemate.
+
+Both players use the same deterministic policy: play the legal card with the lowest
+code, otherwise draw. The order of a refilled deck is given by per-game random keys
+instead of a fresh shuffle, so the scalar reference (play_reference_game) can replay
+any game exactly.
+
+Usage:
+    python simulator.py --games 100000 --seed 1 --verify 1000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from card import Card, CARD_COUNT, LEGAL_MASKS, cards_from_mask
+from deck import Deck
+from player import Player
+
+HAND_SIZE = 4
+SEVEN_RANK = 0  # Rank index of '7' (code >> 2)
+ACE_RANK = 7  # Rank index of 'A'
+NO_WINNER = -1
+
+_MASK = np.uint32
+_LEGAL = np.array(LEGAL_MASKS, dtype=_MASK)
+_BIT = np.array([1 << code for code in range(CARD_COUNT)], dtype=_MASK)
+_BITS = np.arange(CARD_COUNT, dtype=_MASK)
+
+# De Bruijn sequence for finding the index of an isolated bit with a multiply and a lookup
+_DE_BRUIJN = _MASK(0x077CB531)
+_DE_BRUIJN_CODES = np.zeros(CARD_COUNT, dtype=np.int8)
+for _code in range(CARD_COUNT):
+    _DE_BRUIJN_CODES[((0x077CB531 << _code) & 0xFFFFFFFF) >> 27] = _code
+
+
+def _bit_index(bits: np.ndarray) -> np.ndarray:
+    """Return the card code of every single-bit mask (0 for empty masks)."""
+    return _DE_BRUIJN_CODES[(bits * _DE_BRUIJN) >> _MASK(27)]
+
+
+def _select(choose_second: np.ndarray, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """Branch-free ``np.where`` for masks; choose_second must be 0 or 1 as uint32."""
+    return first ^ ((first ^ second) & -choose_second)
+
+
+class BatchSimulator:
+    """Plays N games of Prší in lockstep.
+
+    Each step is a handful of dense bitwise NumPy operations over the working arrays.
+    Finished games are written to the result arrays right away and the working arrays
+    are compacted once at least half of their rows belong to finished games.
+
+    Attributes:
+        orders: (N, 32) card codes in the order they were dealt.
+        refill_keys: (N, 32) keys (indexed by card code) that order a refilled deck.
+        winner: Index (0 or 1) of the winning player per game, -1 for stalemates and
+            games cut off at max_turns.
+        turns: Number of turns played per game.
+        hands: (N, 2) hand masks at the end of the game.
+    """
+
+    _WORKING_ARRAYS = ("game", "deck_base", "alive", "hand0", "hand1", "top", "discard_mask", "discard_count",
+                       "deck_pos", "deck_end", "current")
+
+    def __init__(self, num_games: int, seed: int | None = None, max_turns: int = 1000,
+                 orders: np.ndarray | None = None, refill_keys: np.ndarray | None = None):
+        """Deal N games.
+
+        Args:
+            num_games: Number of games to play.
+            seed: Seed for the deck permutations and refill keys.
+            max_turns: Games still running after this many turns end without a winner.
+            orders: Optional (N, 32) card orders to use instead of random shuffles.
+            refill_keys: Optional (N, 32) keys that order a refilled deck.
+        """
+        rng = np.random.default_rng(seed)
+        self.num_games = num_games
+        self.max_turns = max_turns
+        if orders is None:
+            orders = rng.random((num_games, CARD_COUNT)).argsort(axis=1)
+        if refill_keys is None:
+            refill_keys = rng.random((num_games, CARD_COUNT))
+        self.orders = np.array(orders, dtype=np.int8)
+        self.refill_keys = np.asarray(refill_keys, dtype=np.float64)
+
+        self.winner = np.full(num_games, NO_WINNER, dtype=np.int64)
+        self.turns = np.zeros(num_games, dtype=np.int64)
+        self.hands = np.zeros((num_games, 2), dtype=np.int64)
+
+        # Working state; ``game`` maps a row back to its game (and its row of the deck matrix)
+        self._deck = self.orders.copy()
+        self._deck_flat = self._deck.reshape(-1)
+        self.game = np.arange(num_games, dtype=np.int64)
+        self.deck_base = CARD_COUNT * self.game  # Offset of each row's deck in the flat deck matrix
+        self.alive = np.ones(num_games, dtype=bool)
+
+        # Deal like the server: four cards to each player, then the first discard
+        self.hand0 = np.zeros(num_games, dtype=_MASK)
+        self.hand1 = np.zeros(num_games, dtype=_MASK)
+        for i in range(HAND_SIZE):
+            self.hand0 |= _BIT[self.orders[:, i]]
+            self.hand1 |= _BIT[self.orders[:, HAND_SIZE + i]]
+        self.top = self.orders[:, 2 * HAND_SIZE].copy()
+        self.discard_mask = _BIT[self.top]
+        self.discard_count = np.ones(num_games, dtype=np.int32)
+        self.deck_pos = np.full(num_games, 2 * HAND_SIZE + 1, dtype=np.int32)
+        self.deck_end = np.full(num_games, CARD_COUNT, dtype=np.int32)
+        self.current = np.zeros(num_games, dtype=_MASK)  # 1 when the second player is on turn
+        self.running = num_games
+        self.turn = 0
+
+    def run(self) -> "BatchSimulator":
+        """Step until every game is finished."""
+        while self.step():
+            pass
+        return self
+
+    def step(self) -> int:
+        """Play one turn in every running game.
+
+        Returns:
+            int: The number of games that were still running before the step.
+        """
+        running = self.running
+        if running == 0:
+            return 0
+        self.turn += 1
+
+        current = self.current
+        hand = _select(current, self.hand0, self.hand1)
+        opponent = _select(current, self.hand1, self.hand0)
+
+        # Play the lowest legal card if there is one
+        legal = hand & _LEGAL[self.top]
+        can_play = legal != 0
+        low = legal & -legal
+        code = _bit_index(low)
+        hand ^= low
+        self.discard_mask |= low
+        self.discard_count += can_play
+        self.top = np.where(can_play, code, self.top)
+        won = can_play & (hand == 0)
+        rank = code >> 2
+        seven = can_play & ~won & (rank == SEVEN_RANK)
+        ace = can_play & (rank == ACE_RANK)
+
+        # Otherwise draw a card, refilling the deck from the discard pile when needed
+        draw = ~can_play
+        empty = self.deck_pos >= self.deck_end
+        refill = draw & empty & (self.discard_count > 1) & self.alive
+        if refill.any():
+            self._refill(np.flatnonzero(refill))
+        stalled = draw & empty & ~refill
+        hand |= self._take_from_deck(draw & ~stalled)
+
+        # A seven makes the opponent take two cards, without refilling the deck
+        if seven.any():
+            opponent |= self._take_from_deck(seven)
+            opponent |= self._take_from_deck(seven)
+
+        self.hand0 = _select(current, hand, opponent)
+        self.hand1 = _select(current, opponent, hand)
+
+        # Sevens and aces skip the opponent, so only other cards and draws pass the turn
+        passes = (can_play & ~won & ~seven & ~ace) | (draw & ~stalled)
+        self.current = current ^ passes
+
+        finished = (won | stalled) & self.alive
+        if self.turn >= self.max_turns:
+            finished = self.alive
+        if finished.any():
+            self._finish(finished, won)
+        return running
+
+    def _take_from_deck(self, takes: np.ndarray) -> np.ndarray:
+        """Pop the next deck card for the selected rows where the deck is not empty.
+
+        Returns:
+            np.ndarray: Per row, the bit of the taken card or 0.
+        """
+        takes = takes & (self.deck_pos < self.deck_end)
+        position = np.minimum(self.deck_pos, CARD_COUNT - 1)
+        cards = self._deck_flat[self.deck_base + position]
+        self.deck_pos += takes
+        return _BIT[cards] & -takes.astype(_MASK)
+
+    def _refill(self, rows):
+        """Turn the discard pile, except its top card, into the new deck ordered by refill key."""
+        games = self.game[rows]
+        top_bit = _BIT[self.top[rows]]
+        refill = self.discard_mask[rows] & ~top_bit
+        in_refill = ((refill[:, None] >> _BITS) & _MASK(1)).astype(bool)
+        keys = np.where(in_refill, self.refill_keys[games], np.inf)
+        self._deck[games] = np.argsort(keys, axis=1)
+        self.deck_pos[rows] = 0
+        self.deck_end[rows] = self.discard_count[rows] - 1
+        self.discard_mask[rows] = top_bit
+        self.discard_count[rows] = 1
+
+    def _finish(self, finished: np.ndarray, won: np.ndarray):
+        """Record the results of newly finished games and compact the working arrays."""
+        games = self.game[finished]
+        self.turns[games] = self.turn
+        self.hands[games, 0] = self.hand0[finished]
+        self.hands[games, 1] = self.hand1[finished]
+        winners = won[finished]
+        self.winner[games[winners]] = self.current[finished][winners]
+
+        self.alive &= ~finished
+        self.running -= games.size
+        # Rows of finished games keep being stepped (and ignored) until compaction pays off
+        if self.running * 2 <= self.game.size:
+            keep = self.alive
+            for name in self._WORKING_ARRAYS:
+                setattr(self, name, getattr(self, name)[keep])
+
+
+def play_reference_game(order, refill_keys, max_turns: int = 1000) -> tuple[int, int, tuple[int, int]]:
+    """Play one game with the scalar Deck and Player classes.
+
+    Uses the same rules, policy and refill order as BatchSimulator.
+
+    Args:
+        order: The 32 card codes in dealing order.
+        refill_keys: 32 keys (indexed by card code) that order a refilled deck.
+        max_turns: Turn limit.
+
+    Returns:
+        tuple[int, int, tuple[int, int]]: Winner (-1 for none), turns played and the final hand masks.
+    """
+    deck = Deck(cards=[Card.from_code(int(code)) for code in order],
+                refill_key=lambda card: refill_keys[card.code])
+    players = [Player("0"), Player("1")]
+    for player in players:
+        for card in deck.deal(HAND_SIZE):
+            player.draw_card(card)
+    deck.add_to_discard(deck.draw_card())
+
+    current, winner, turns = 0, NO_WINNER, 0
+    while turns < max_turns:
+        turns += 1
+        player, opponent = players[current], players[1 - current]
+        top = deck.get_top_discard()
+        legal = player.legal_moves(top, None)
+        if legal:
+            card = cards_from_mask(legal)[0]
+            player.play_card(card, top, None)
+            deck.add_to_discard(card)
+            if player.has_won():
+                winner = current
+                break
+            if card.rank == '7':
+                # The penalty cards come from the deck alone, it is not refilled for them
+                for card in deck.deal(min(2, len(deck))):
+                    opponent.draw_card(card)
+            elif card.rank != 'A':
+                current = 1 - current
+        else:
+            card = deck.draw_card()
+            if card is None:
+                break
+            player.draw_card(card)
+            current = 1 - current
+    return winner, turns, (players[0].hand_mask, players[1].hand_mask)
+
+
+def verify(simulator: BatchSimulator, num_games: int) -> int:
+    """Replay the first games of a finished simulation with the scalar model classes.
+
+    Args:
+        simulator: A simulator that has been run.
+        num_games: How many games to replay.
+
+    Returns:
+        int: The number of games whose winner, turn count or final hands differ.
+    """
+    mismatches = 0
+    for g in range(min(num_games, simulator.num_games)):
+        winner, turns, hands = play_reference_game(simulator.orders[g], simulator.refill_keys[g], simulator.max_turns)
+        if (winner != simulator.winner[g] or turns != simulator.turns[g]
+                or hands != tuple(int(h) for h in simulator.hands[g])):
+            mismatches += 1
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play Prší games in batches with NumPy.")
+    parser.add_argument("--games", type=int, default=100_000, help="number of games")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--max-turns", type=int, default=1000, help="turn limit per game")
+    parser.add_argument("--verify", type=int, default=0, metavar="N",
+                        help="replay the first N games with the scalar Deck/Player classes")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    simulator = BatchSimulator(args.games, seed=args.seed, max_turns=args.max_turns)
+    simulator.run()
+    elapsed = time.perf_counter() - start
+
+    wins = np.bincount(simulator.winner + 1, minlength=3)
+    print(f"{args.games} games in {elapsed:.3f} s ({args.games / elapsed:,.0f} games/s)")
+    print(f"first player wins: {wins[1]}, second player wins: {wins[2]}, no winner: {wins[0]}")
+    print(f"mean turns: {simulator.turns.mean():.1f}, max turns: {simulator.turns.max()}")
+    if args.verify:
+        mismatches = verify(simulator, args.verify)
+        print(f"verified {min(args.verify, args.games)} games against the model classes: {mismatches} mismatches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import asyncio
+import socket
+
+from async_network_client import AsyncNetworkClient
+from codec import JSON, decode, encode
+
+
+class _SilentServer(asyncio.DatagramProtocol):
+    """Accepts the connection, then never answers again (e.g. the server process hung)."""
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if decode(data)["type"] == "connect":
+            self.transport.sendto(encode({"type": "connect_ack", "waiting_for_player": True}), addr)
+
+
+async def _connect(client: AsyncNetworkClient):
+    """Start a silent server on a free port and connect the client to it."""
+    loop = asyncio.get_running_loop()
+    server, _ = await loop.create_datagram_endpoint(_SilentServer, local_addr=("127.0.0.1", 0))
+    port = server.get_extra_info("sockname")[1]
+    reply = await client.connect("127.0.0.1", port, "alice", timeout=1.0)
+    return server, reply
+
+
+async def _messages(client: AsyncNetworkClient) -> list[dict]:
+    return [message async for message in client]
+
+
+def test_unanswered_heartbeats_end_the_stream():
+    async def run():
+        client = AsyncNetworkClient(heartbeat_interval=0.01, codec=JSON)
+        client.keepalive.min_interval = 0.01
+        server, reply = await _connect(client)
+        try:
+            messages = await asyncio.wait_for(_messages(client), 2.0)
+        finally:
+            server.close()
+        return client, reply, messages
+
+    client, reply, messages = asyncio.run(run())
+    assert reply["type"] == "connect_ack"
+    assert messages[-1] == {"type": "unknown", "message": "Connection lost: the server stopped answering."}
+    assert client.keepalive.stats["lost"] >= 3
+    assert not client.running and client.transport is None
+
+
+def test_a_transport_error_ends_the_stream():
+    async def run():
+        client = AsyncNetworkClient(codec=JSON)
+        server, _ = await _connect(client)
+        try:
+            client._handle_error(ConnectionRefusedError("port unreachable"))
+            messages = await asyncio.wait_for(_messages(client), 1.0)
+        finally:
+            server.close()
+        return client, messages
+
+    client, messages = asyncio.run(run())
+    assert messages[-1] == {"type": "unknown", "message": "Connection lost: port unreachable"}
+    assert not client.connected and client.transport is None
+
+
+def test_a_transport_error_while_connecting_fails_the_connect():
+    async def run():
+        # Nothing listens on this port, so the connect request is answered by ICMP
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        client = AsyncNetworkClient(codec=JSON)
+        try:
+            await client.connect("127.0.0.1", port, "alice", timeout=1.0)
+        except ConnectionError:
+            return client
+        raise AssertionError("connect() did not fail")
+
+    client = asyncio.run(run())
+    assert client.transport is None
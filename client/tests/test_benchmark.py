@@ -0,0 +1,23 @@
+import pytest
+
+from benchmark import BENCHMARKS, compare, run_benchmarks
+
+
+@pytest.mark.parametrize("name", sorted(BENCHMARKS))
+def test_every_benchmark_runs(name):
+    run = BENCHMARKS[name]()
+    run()
+    run()
+
+
+def test_run_benchmarks_selects_by_prefix():
+    results = run_benchmarks(["card.construct"], repeat=1)
+    assert list(results) == ["card.construct"]
+    assert results["card.construct"]["ns_per_op"] > 0
+    assert results["card.construct"]["loops"] >= 1
+
+
+def test_compare_reports_regressions_beyond_the_threshold():
+    baseline = {"a": {"ns_per_op": 100.0}, "b": {"ns_per_op": 100.0}}
+    results = {"a": {"ns_per_op": 120.0}, "b": {"ns_per_op": 130.0}, "c": {"ns_per_op": 1e9}}
+    assert compare(results, baseline, threshold=0.25) == ["b"]
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from bot import DRAW, MctsSearch, _Game
+from card import Card, mask_from_cards
+
+
+def _hand(*cards: str) -> list[Card]:
+    return [Card.from_string(card) for card in cards]
+
+
+def _game(opponent: list[Card], deck_size: int = 10) -> _Game:
+    hands = [mask_from_cards(_hand("7♥", "K♠")), mask_from_cards(opponent)]
+    return _Game(hands, Card.from_string("9♥").code, list(range(deck_size)), [], 0, random.Random(0))
+
+
+def test_key_ignores_the_cards_the_player_on_turn_cannot_see():
+    game = _game(_hand("A♦", "8♣"))
+    assert game.key() == _game(_hand("10♣", "Q♦")).key()
+    assert game.key() != _game(_hand("10♣")).key()
+    assert game.key() != _game(_hand("A♦", "8♣"), deck_size=9).key()
+    game.to_move = 1
+    assert game.key() != _game(_hand("A♦", "8♣")).key()
+
+
+def _search_hits() -> int:
+    search = MctsSearch(move_time_ms=10_000, max_iterations=300, seed=1)
+    search.choose(_hand("7♥", "K♠", "9♣"), Card.from_string("9♥"), opponent_cards=3, deck_size=10)
+    last = search.last_search
+    assert last["iterations"] == last["table_misses"] == 300  # Each iteration adds one node
+    assert search.get_stats()["table_hits"] == last["table_hits"]
+    return last["table_hits"]
+
+
+def test_samples_share_the_nodes_of_an_information_set(monkeypatch):
+    hits = _search_hits()
+    # Keyed on the whole sampled state, nodes are almost never found again
+    monkeypatch.setattr(_Game, "key", lambda game: (game.hands[0] | game.hands[1] << 32 | game.top << 64
+                                                    | game.to_move << 69 | len(game.deck) << 70))
+    assert hits > 10 * max(_search_hits(), 1)
+
+
+def test_the_table_evicts_the_least_recently_used_nodes():
+    search = MctsSearch(move_time_ms=10_000, max_iterations=200, table_size=8, seed=1)
+    search.choose(_hand("7♥", "K♠", "9♣"), Card.from_string("9♥"), opponent_cards=3, deck_size=10)
+    stats = search.get_stats()
+    assert stats["table_size"] == 8
+    assert stats["evictions"] == stats["table_misses"] - 8 > 0
+
+
+def test_a_decision_stays_within_its_time_budget(monkeypatch):
+    now = [0.0]
+
+    def perf_counter():
+        now[0] += 0.001  # Every reading takes a millisecond
+        return now[0]
+
+    monkeypatch.setattr("bot.time.perf_counter", perf_counter)
+    search = MctsSearch(move_time_ms=20, seed=1)
+    search.choose(_hand("7♥", "K♠"), Card.from_string("9♥"), opponent_cards=4, deck_size=10)
+    assert 0 < search.last_search["iterations"] < 20
+
+
+@pytest.mark.parametrize("excluded, expected", [((), DRAW), ((DRAW,), None)])
+def test_without_a_choice_no_search_runs(excluded, expected):
+    search = MctsSearch(seed=1)
+    assert search.choose(_hand("K♠"), Card.from_string("9♥"), 4, 10, excluded=excluded) == expected
+    assert search.get_stats()["searches"] == 0
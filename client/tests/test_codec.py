@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from card import Card
+from codec import BINARY, JSON, LAYOUTS, NO_HAND, decode, encode, is_binary
+
+# One message per binary layout, with every field set; cards already as Card objects
+MESSAGES = [
+    {"type": "heartbeat", "name": "alice", "ts": 2 ** 40, "rtt": 35},
+    {"type": "play_card", "card": Card("10", "♥"), "player_name": "alice", "seq": 7},
+    {"type": "draw_card", "player_name": "žluťoučký kůň", "seq": 8},
+    {"type": "disconnect", "name": "alice"},
+    {"type": "resume", "name": "alice", "version": -1},
+    {"type": "snapshot_request", "name": "alice"},
+    {"type": "game_state_update", "players": ["alice", "bob"], "current_player": "bob", "deck_size": 17,
+     "discard_pile": 3, "top_card": Card("A", "♠"), "alice": [Card("7", "♥"), Card("Q", "♣")],
+     "hand_sizes": {"alice": 2, "bob": 5}, "version": 42},
+    {"type": "state_delta", "version": 43, "base": 42, "current_player": "alice", "deck_size": 16,
+     "discard_pile": 4, "top_card": Card("7", "♥"), "removed": {"alice": [Card("7", "♥")]},
+     "added": {"alice": [Card("8", "♦")]}, "hand_sizes": {"alice": 2, "bob": 4}},
+    {"type": "error", "message": "Invalid move.", "version": 43},
+    {"type": "ack", "seq": 8},
+    {"type": "heartbeat_ack", "ts": 123, "version": 43},
+    {"type": "resume_ack", "version": 43},
+    {"type": "resume_rejected", "message": "Your game is no longer available."},
+    {"type": "player_disconnected", "player": "bob", "message": "Player bob has disconnected."},
+    {"type": "player_reconnected", "player": "bob", "message": "Player bob reconnected."},
+    {"type": "player_played_card", "player_name": "bob", "message": "Player bob played a card."},
+    {"type": "player_drawn_card", "player_name": "bob", "message": "Player bob draw a card."},
+    {"type": "game_over", "winner": "bob", "message": "Game Over! winner: bob"},
+]
+
+
+def test_every_layout_is_covered():
+    assert {message["type"] for message in MESSAGES} == set(LAYOUTS)
+
+
+@pytest.mark.parametrize("message", MESSAGES, ids=[message["type"] for message in MESSAGES])
+def test_binary_round_trip(message):
+    data = encode(message, BINARY)
+    assert is_binary(data)
+    assert decode(data) == message
+    assert decode(memoryview(data)) == message
+
+
+def test_partial_messages_round_trip():
+    message = {"type": "state_delta", "version": 43, "base": 42, "hand_sizes": {"bob": 6}}
+    assert decode(encode(message, BINARY)) == message
+
+
+def test_card_strings_and_objects_decode_to_cards():
+    message = {"type": "play_card", "card": "10♥", "player_name": "alice", "seq": 1}
+    assert decode(encode(message, BINARY))["card"] is Card("10", "♥")
+    state = dict(MESSAGES[6], top_card={"value": "A", "suit": "♠"})
+    assert decode(encode(state, BINARY))["top_card"] is Card("A", "♠")
+
+
+def test_hands_left_out_stay_left_out():
+    message = MESSAGES[6]
+    data = encode(message, BINARY)
+    assert NO_HAND in data
+    assert "bob" not in decode(data)
+
+
+def test_json_codec_and_fallbacks():
+    message = {"type": "ack", "seq": 1}
+    assert encode(message, JSON) == json.dumps(message).encode()
+    # No layout, a number out of range, an unknown card: all fall back to JSON
+    for message in ({"type": "connect", "name": "alice"}, {"type": "ack", "seq": 2 ** 40},
+                    {"type": "play_card", "card": "1♥", "player_name": "alice", "seq": 1}):
+        data = encode(message, BINARY)
+        assert not is_binary(data)
+        assert decode(data) == message
+
+
+def test_malformed_datagrams_raise_value_error():
+    data = encode(MESSAGES[0], BINARY)
+    for bad in (data[:-1], data + b"\0", bytes([99, 0]), b'{"type": ', bytes([0x11])):
+        with pytest.raises(ValueError):
+            decode(bad)
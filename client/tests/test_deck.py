@@ -0,0 +1,22 @@
+from card import Card
+from deck import Deck
+
+
+def _cards(*cards: str) -> list[Card]:
+    return [Card.from_string(card) for card in cards]
+
+
+def test_cards_are_dealt_in_the_given_order():
+    deck = Deck(cards=_cards("7♥", "8♥", "9♥"))
+    assert deck.deal(2) == _cards("7♥", "8♥")
+    assert deck.draw_card() == Card.from_string("9♥")
+    assert deck.draw_card() is None
+
+
+def test_a_refill_key_orders_the_refilled_deck():
+    deck = Deck(cards=[], refill_key=lambda card: card.code)
+    for card in _cards("K♠", "8♦", "A♥", "10♣"):
+        deck.add_to_discard(card)
+    assert deck.refill_from_discard() == 3
+    assert deck.get_top_discard() == Card.from_string("10♣")
+    assert deck.deal(3) == sorted(_cards("K♠", "8♦", "A♥"), key=lambda card: card.code)
@@ -0,0 +1,94 @@
+import pytest
+
+from framing import HEADER, MAX_FRAGMENTS, Fragmenter, Reassembler, is_fragment
+
+MESSAGE = bytes(range(256)) * 20  # 5120 bytes
+
+
+def _fragments(data=MESSAGE, max_datagram=1200):
+    return Fragmenter(max_datagram).split(data)
+
+
+def test_small_messages_are_not_fragmented():
+    assert Fragmenter().split(b'{"type": "ack"}') == [b'{"type": "ack"}']
+    assert not is_fragment(b'{"type": "ack"}')
+
+
+def test_split_and_reassemble_in_any_order(clock):
+    fragments = _fragments()
+    assert len(fragments) == 5
+    assert all(is_fragment(fragment) and len(fragment) <= 1200 for fragment in fragments)
+    reassembler = Reassembler()
+    results = [reassembler.add(fragment) for fragment in reversed(fragments)]
+    assert results[:-1] == [None] * 4
+    assert results[-1] == MESSAGE
+    assert reassembler.buffered == 0 and not reassembler.partials
+
+
+def test_fragments_are_copied_out_of_the_receive_buffer(clock):
+    reassembler = Reassembler()
+    buffer = bytearray(2048)
+    view = memoryview(buffer)
+    for fragment in _fragments():
+        buffer[:len(fragment)] = fragment
+        result = reassembler.add(view[:len(fragment)])
+    assert result == MESSAGE
+
+
+def test_duplicates_are_ignored(clock):
+    first, *rest = _fragments()
+    reassembler = Reassembler()
+    assert reassembler.add(first) is None
+    assert reassembler.add(first) is None
+    buffered = reassembler.buffered
+    assert buffered == len(first) - HEADER.size
+    assert [reassembler.add(fragment) for fragment in rest][-1] == MESSAGE
+    assert reassembler.stats["reassembled"] == 1
+
+
+def test_senders_are_kept_apart(clock):
+    fragments = _fragments()
+    reassembler = Reassembler()
+    for fragment in fragments[:-1]:
+        reassembler.add(fragment, source="a")
+    assert reassembler.add(fragments[-1], source="b") is None
+    assert reassembler.add(fragments[-1], source="a") == MESSAGE
+
+
+def test_incomplete_messages_expire(clock):
+    reassembler = Reassembler(timeout=2.0)
+    old = _fragments()
+    reassembler.add(old[0])
+    clock.advance(2.5)
+    new = _fragments(b"x" * 3000)
+    reassembler.add(new[0])
+    assert reassembler.stats["expired"] == 1
+    assert len(reassembler.partials) == 1
+    # The rest of the expired message cannot complete it any more
+    assert [reassembler.add(fragment) for fragment in old[1:]][-1] is None
+
+
+def test_oldest_messages_are_evicted_over_the_cap(clock):
+    reassembler = Reassembler(max_bytes=6000)
+    first, second = _fragments(), _fragments(b"y" * 5000)
+    reassembler.add(first[0])
+    reassembler.add(first[1])
+    results = [reassembler.add(fragment) for fragment in second]
+    # The first message made room for the last fragments of the second one
+    assert reassembler.stats["evicted"] == 1
+    assert results[-1] == b"y" * 5000
+    assert reassembler.buffered == 0 and not reassembler.partials
+
+
+def test_invalid_fragments(clock):
+    reassembler = Reassembler()
+    assert reassembler.add(b"{}") is None
+    assert reassembler.add(HEADER.pack(0xFE, 1, 3, 3) + b"data") is None  # Index out of range
+    reassembler.add(HEADER.pack(0xFE, 2, 0, 3) + b"data")
+    assert reassembler.add(HEADER.pack(0xFE, 2, 1, 4) + b"data") is None  # Count changed
+    assert reassembler.stats["invalid"] == 3
+
+
+def test_too_large_messages_are_refused():
+    with pytest.raises(ValueError):
+        Fragmenter(100).split(b"z" * ((100 - HEADER.size) * MAX_FRAGMENTS + 1))
@@ -0,0 +1,286 @@
+import pytest
+
+from card import Card
+from game_session import CONNECTING, FINISHED, PLAYING, RECONNECTING, WAITING, GameSession
+from message_queue import CoalescingQueue
+
+
+class FakeClient:
+    """Records the moves a session sends instead of talking to a server."""
+
+    def __init__(self):
+        self.message_queue = CoalescingQueue()
+        self.reconnecting = False
+        self.waiting_for_player = False
+        self.sent = []
+
+    def connect(self, ip, port, name, **kwargs):
+        return None
+
+    def play_card(self, card):
+        self.sent.append(card)
+
+    def draw_card(self):
+        self.sent.append("draw")
+
+    def request_snapshot(self):
+        self.sent.append("snapshot_request")
+
+    def close(self):
+        return None
+
+
+def _card(text: str) -> dict:
+    return Card.from_string(text).to_dict()
+
+
+def _state_message(**changes) -> dict:
+    """alice on turn with 7♥ K♠ A♥ 9♣ against 9♥."""
+    message = {
+        "type": "game_state_update", "players": ["alice", "bob"], "current_player": "alice",
+        "deck_size": 10, "discard_pile": 1, "top_card": _card("9♥"),
+        "alice": [_card(text) for text in ("7♥", "K♠", "A♥", "9♣")],
+        "hand_sizes": {"alice": 4, "bob": 4},
+        "version": 5,
+    }
+    message.update(changes)
+    return message
+
+
+@pytest.fixture
+def events() -> list:
+    return []
+
+
+@pytest.fixture
+def session(events, clock) -> GameSession:
+    """A session that is connecting; every notification is appended to events."""
+    session = GameSession("alice", FakeClient())
+    for event in ("phase", "state", "log", "server_error", "game_over", "closed"):
+        session.on(event, lambda *args, event=event: events.append((event, *args)))
+    session.connect("127.0.0.1", 8080)
+    return session
+
+
+def test_a_game_starts_after_waiting_for_an_opponent(session, events):
+    session.handle_message({"type": "connect_ack", "waiting_for_player": True})
+    assert session.phase == WAITING
+    session.handle_message(_state_message())
+    assert session.phase == PLAYING
+    assert not session.rejoined
+    assert [event[:2] for event in events] == [("phase", CONNECTING), ("phase", WAITING),
+                                               ("phase", PLAYING), ("state", session.state)]
+    assert session.state.hand == tuple(Card.from_string(text) for text in ("7♥", "K♠", "A♥", "9♣"))
+    assert session.player.hand_mask == session.state.hand_mask
+    assert session.is_my_turn
+
+
+def test_a_state_without_a_connect_ack_means_a_rejoined_game(session):
+    session.handle_message(_state_message())
+    assert session.rejoined and session.phase == PLAYING
+
+
+def test_poll_notifies_once_for_every_message_it_handled(session, events):
+    session.client.message_queue.put({"type": "connection_status", "message": "Reconnected."})
+    session.client.message_queue.put(_state_message(current_player="bob"))
+    session.client.message_queue.put({"type": "player_played_card", "message": "bob played 8♥"})
+    events.clear()
+    assert session.poll() == 3
+    assert events == [("phase", PLAYING), ("state", session.state),
+                      ("log", ["Reconnected.", "bob played 8♥"])]
+    assert session.poll() == 0
+
+
+def test_an_unanswered_connect_times_out(session, events, clock):
+    clock.advance(0.5)
+    session.poll()
+    assert session.phase == CONNECTING
+    clock.advance(1.0)
+    session.poll()
+    assert session.phase == FINISHED
+    assert events[-1] == ("closed", "Failed to connect to server")
+
+
+def test_errors_end_a_connect_but_not_a_game(session, events):
+    session.handle_message(_state_message())
+    session.handle_message({"type": "error", "message": "Not your turn."})
+    assert session.phase == PLAYING
+    assert events[-2:] == [("log", ["Not your turn."]), ("server_error", "Not your turn.")]
+
+    other = GameSession("bob", FakeClient())
+    other.connect("127.0.0.1", 8080)
+    other.handle_message({"type": "error", "message": "Lobby is full."})
+    assert other.phase == FINISHED
+
+
+def test_game_over_is_reported_once(session, events):
+    session.handle_message(_state_message())
+    session.handle_message({"type": "game_over", "message": "bob won!", "winner": "bob"})
+    session.handle_message({"type": "game_over", "message": "bob won!", "winner": "bob"})
+    assert session.phase == FINISHED and session.winner == "bob"
+    assert [event for event in events if event[0] == "game_over"] == [("game_over", "bob won!", "bob")]
+
+
+@pytest.mark.parametrize("message, reason", [
+    ({"type": "name_taken"}, "The player name is already in use. Please choose another name."),
+    ({"type": "unknown", "message": "Connection lost and could not reconnect."},
+     "Connection lost and could not reconnect."),
+    ({"type": "surprise"}, "Connection lost due to invalid message type"),
+    (_state_message(top_card={"value": "1", "suit": "?"}, alice=[{"value": "1", "suit": "?"}]),
+     "Connection lost due to invalid game state"),
+])
+def test_the_session_ends_on_fatal_messages(session, events, message, reason):
+    session.handle_message(message)
+    assert session.phase == FINISHED
+    assert events[-1] == ("closed", reason)
+
+
+def test_the_phase_mirrors_a_reconnecting_client(session):
+    session.handle_message(_state_message())
+    session.client.reconnecting = True
+    session.poll()
+    assert session.phase == RECONNECTING
+    session.play_card("9♣")  # Buffered by the client until it has resumed
+    session.client.reconnecting = False
+    session.poll()
+    assert session.phase == PLAYING
+    assert session.client.sent == ["9♣"]
+
+
+def test_legal_cards_follow_the_servers_rule(session):
+    assert session.legal_cards() == ()
+    session.handle_message(_state_message())
+    # Same suit or rank as 9♥; queens are not wild on the server
+    assert set(session.legal_cards()) == {Card("7", "♥"), Card("A", "♥"), Card("9", "♣")}
+
+
+def test_moves_are_sent_only_during_a_game(session):
+    assert session.play_card("9♣") is None
+    assert session.draw_card() is None
+    session.handle_message(_state_message())
+    session.play_card(Card("9", "♣"))
+    session.draw_card()
+    assert session.client.sent == ["9♣", "draw"]
+
+
+def _playing(events, predict=True) -> GameSession:
+    """A session in the game of _state_message, recording state, hand and server_error events."""
+    session = GameSession("alice", FakeClient(), predict=predict)
+    session.connect("127.0.0.1", 8080)
+    session.handle_message(_state_message())
+    assert session.phase == PLAYING
+    session.on("state", lambda state: events.append("state"))
+    session.on("hand", lambda hand, removed, added: events.append(("hand", removed, added)))
+    session.on("server_error", lambda text: events.append("server_error"))
+    return session
+
+
+def _delta(version, **fields) -> dict:
+    return dict(fields, type="state_delta", version=version, base=version - 1)
+
+
+def test_a_play_is_shown_before_the_server_answers(events):
+    session = _playing(events)
+    session.play_card("9♣")
+    assert session.client.sent == ["9♣"]
+    state = session.state
+    assert state.top_card == Card("9", "♣")
+    assert state.current_player == "bob"
+    assert state.discard_size == 2
+    assert state.hand_sizes == {"alice": 3, "bob": 4}
+    assert Card("9", "♣") not in state.hand
+    assert session.player.hand_mask == state.hand_mask
+    # The server's state is untouched
+    assert session.confirmed.top_card == Card("9", "♥")
+    assert session.confirmed.hand_sizes == {"alice": 4, "bob": 4}
+    assert session.journal == [(Card("9", "♣"), 6)]
+    assert events == ["state", ("hand", (Card("9", "♣"),), ())]
+
+
+def test_a_state_that_agrees_confirms_silently(events):
+    session = _playing(events)
+    session.play_card("9♣")
+    events.clear()
+    session.handle_message(_delta(6, current_player="bob", top_card=_card("9♣"), discard_pile=2,
+                                  removed={"alice": [_card("9♣")]}, hand_sizes={"alice": 3}))
+    assert events == []
+    assert session.journal == []
+    assert session.state is session.confirmed
+    assert session.state.version == 6
+    assert session.prediction_stats == {"predicted": 1, "confirmed": 1, "rolled_back": 0}
+
+
+def test_a_state_that_disagrees_replaces_the_prediction(events):
+    session = _playing(events)
+    session.play_card("9♣")
+    events.clear()
+    # The server applied something else, e.g. a draw sent before
+    session.handle_message(_delta(6, current_player="bob", deck_size=9, added={"alice": [_card("8♦")]},
+                                  hand_sizes={"alice": 5}))
+    assert session.state is session.confirmed
+    assert session.state.top_card == Card("9", "♥")
+    assert events == ["state", ("hand", (), (Card("8", "♦"), Card("9", "♣")))]
+    assert session.prediction_stats["rolled_back"] == 1
+
+
+def test_an_error_rolls_every_prediction_back(events):
+    session = _playing(events)
+    session.play_card("A♥")
+    session.play_card("7♥")
+    events.clear()
+    session.handle_message({"type": "error", "message": "Invalid move.", "version": 5})
+    assert session.journal == []
+    assert session.state is session.confirmed
+    assert session.state.hand_mask == session.player.hand_mask
+    assert len(session.state.hand) == 4
+    assert events == ["state", ("hand", (), (Card("7", "♥"), Card("A", "♥"))), "server_error"]
+    assert session.prediction_stats["rolled_back"] == 2
+
+
+def test_special_cards_keep_the_turn_and_moves_settle_in_order(events):
+    session = _playing(events)
+    session.play_card("A♥")
+    assert session.is_my_turn
+    session.play_card("7♥")  # Matches the predicted ace's suit
+    state = session.state
+    assert state.current_player == "alice"
+    assert state.deck_size == 8
+    assert state.hand_sizes == {"alice": 2, "bob": 6}
+    assert session.journal == [(Card("A", "♥"), 6), (Card("7", "♥"), 7)]
+    events.clear()
+
+    # The server answers the ace; the 7 stays predicted on top of it
+    session.handle_message(_delta(6, top_card=_card("A♥"), discard_pile=2, removed={"alice": [_card("A♥")]},
+                                  hand_sizes={"alice": 3}))
+    assert events == []
+    assert session.journal == [(Card("7", "♥"), 7)]
+    assert session.confirmed.version == 6
+    assert session.state is not session.confirmed
+    assert session.state.top_card == Card("7", "♥")
+    assert session.prediction_stats["confirmed"] == 1
+
+
+def test_a_draw_after_a_prediction_is_journaled(events):
+    session = _playing(events)
+    session.play_card("A♥")
+    session.draw_card()
+    assert session.client.sent == ["A♥", "draw"]
+    assert session.journal == [(Card("A", "♥"), 6), (None, 7)]
+
+
+def test_cards_the_server_refuses_are_sent_but_not_predicted(events):
+    session = _playing(events)
+    session.play_card("K♠")
+    assert session.client.sent == ["K♠"]
+    assert session.journal == []
+    assert session.state is session.confirmed
+    assert events == []
+
+
+def test_no_prediction_without_predict(events):
+    session = _playing(events, predict=False)
+    session.play_card("9♣")
+    assert session.client.sent == ["9♣"]
+    assert session.state is session.confirmed
+    assert session.state.top_card == Card("9", "♥")
+    assert events == []
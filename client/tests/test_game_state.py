@@ -0,0 +1,125 @@
+from card import Card
+from codec import BINARY, JSON, decode, encode
+from game_session import GameSession, GameState
+
+
+def _state_message(**changes) -> dict:
+    message = {
+        "type": "game_state_update",
+        "players": ["alice", "bob"],
+        "current_player": "alice",
+        "deck_size": 10,
+        "discard_pile": 1,
+        "top_card": {"value": "9", "suit": "♥"},
+        "alice": [{"value": "7", "suit": "♥"}, {"value": "K", "suit": "♠"}, {"value": "A", "suit": "♥"}],
+        "hand_sizes": {"alice": 3, "bob": 4},
+        "version": 5,
+    }
+    message.update(changes)
+    return message
+
+
+def test_from_message():
+    state = GameState.from_message(_state_message(), "alice")
+    assert state.version == 5
+    assert state.players == ("alice", "bob")
+    assert state.top_card == Card("9", "♥")
+    assert state.hand == (Card("7", "♥"), Card("K", "♠"), Card("A", "♥"))
+    assert state.hand_mask == Card("7", "♥").mask | Card("K", "♠").mask | Card("A", "♥").mask
+    assert state.hand_sizes == {"alice": 3, "bob": 4}
+
+
+def test_hand_sizes_fall_back_to_the_hands():
+    message = _state_message(bob=[{"value": "8", "suit": "♦"}])
+    del message["hand_sizes"]
+    state = GameState.from_message(message, "alice")
+    assert state.hand_sizes == {"alice": 3, "bob": 1}
+
+
+def test_delta_touches_only_what_it_names():
+    state = GameState.from_message(_state_message(), "alice")
+    state.apply_delta({"type": "state_delta", "version": 6, "base": 5, "deck_size": 9}, "alice")
+    assert state.version == 6
+    assert state.deck_size == 9
+    assert state.current_player == "alice"
+    assert state.top_card == Card("9", "♥")
+    assert len(state.hand) == 3
+
+
+def test_delta_moves_cards_in_and_out_of_the_hand():
+    state = GameState.from_message(_state_message(), "alice")
+    state.apply_delta({
+        "type": "state_delta", "version": 6, "base": 5,
+        "current_player": "bob", "top_card": {"value": "7", "suit": "♥"}, "discard_pile": 2,
+        "removed": {"alice": [{"value": "7", "suit": "♥"}]},
+        "hand_sizes": {"alice": 2},
+    }, "alice")
+    state.apply_delta({
+        "type": "state_delta", "version": 7, "base": 6,
+        "current_player": "alice", "deck_size": 9,
+        "added": {"alice": [Card("Q", "♣")]},  # Binary messages carry Card objects
+        "hand_sizes": {"alice": 3},
+    }, "alice")
+    assert state.version == 7
+    assert state.current_player == "alice"
+    assert state.top_card == Card("7", "♥")
+    assert state.discard_size == 2
+    assert state.hand == (Card("K", "♠"), Card("A", "♥"), Card("Q", "♣"))
+    assert state.hand_mask == Card("K", "♠").mask | Card("A", "♥").mask | Card("Q", "♣").mask
+    assert state.hand_sizes == {"alice": 3, "bob": 4}
+
+
+def test_delta_without_hand_sizes_counts_the_cards():
+    state = GameState.from_message(_state_message(), "alice")
+    state.apply_delta({"type": "state_delta", "version": 6, "base": 5,
+                       "removed": {"alice": [{"value": "K", "suit": "♠"}]},
+                       "added": {"bob": [{"value": "8", "suit": "♦"}, {"value": "9", "suit": "♦"}]}}, "alice")
+    assert state.hand_sizes == {"alice": 2, "bob": 6}
+    assert state.hand == (Card("7", "♥"), Card("A", "♥"))
+
+
+def test_redacted_states_decode_to_hand_sizes_only():
+    # What the server sends alice: her own hand and how many cards bob holds
+    for codec in (JSON, BINARY):
+        message = decode(encode(_state_message(), codec))
+        assert "bob" not in message
+        state = GameState.from_message(message, "alice")
+        assert state.hand == (Card("7", "♥"), Card("K", "♠"), Card("A", "♥"))
+        assert state.hand_sizes == {"alice": 3, "bob": 4}
+
+
+class _SnapshotClient:
+    waiting_for_player = False
+
+    def __init__(self):
+        self.snapshot_requests = 0
+
+    def request_snapshot(self):
+        self.snapshot_requests += 1
+
+
+def test_session_refuses_a_delta_for_another_version():
+    session = GameSession("alice", _SnapshotClient())
+    session.handle_message(_state_message())
+    delta = {"type": "state_delta", "version": 7, "base": 6, "current_player": "bob",
+             "removed": {"alice": [{"value": "7", "suit": "♥"}]}, "hand_sizes": {"alice": 2}}
+    session.handle_message(delta)
+    assert session.confirmed.version == 5
+    assert len(session.state.hand) == 3
+    assert session.state.current_player == "alice"
+    assert session.client.snapshot_requests == 1
+
+    # A delta that arrives before any state cannot be applied either
+    fresh = GameSession("alice", _SnapshotClient())
+    fresh.handle_message(delta)
+    assert fresh.confirmed is None
+    assert fresh.client.snapshot_requests == 1
+
+
+def test_session_applies_a_delta_for_its_version():
+    session = GameSession("alice", _SnapshotClient())
+    session.handle_message(_state_message())
+    session.handle_message({"type": "state_delta", "version": 6, "base": 5, "deck_size": 9})
+    assert session.confirmed.version == 6
+    assert session.state.deck_size == 9
+    assert session.client.snapshot_requests == 0
@@ -0,0 +1,94 @@
+import pytest
+
+from keepalive import KeepaliveScheduler
+
+
+def _answer(scheduler, clock, rtt):
+    """Send a heartbeat now and answer it after rtt seconds."""
+    message = scheduler.heartbeat("alice")
+    clock.advance(rtt)
+    return scheduler.ack(message["ts"])
+
+
+def test_heartbeats_are_sent_only_after_a_quiet_interval(clock):
+    scheduler = KeepaliveScheduler(interval=5.0)
+    assert scheduler.heartbeat("alice") is None
+    clock.advance(4.0)
+    scheduler.note_sent()  # Any other datagram refreshes the server as well
+    clock.advance(4.0)
+    assert scheduler.heartbeat("alice") is None
+    assert scheduler.next_timeout() == pytest.approx(1.0)
+    clock.advance(1.0)
+    assert scheduler.heartbeat("alice") == {"type": "heartbeat", "name": "alice", "ts": 1_009_000}
+    assert scheduler.next_timeout() == pytest.approx(5.0)
+
+
+def test_acks_measure_rtt_and_jitter(clock):
+    scheduler = KeepaliveScheduler(interval=5.0)
+    samples = []
+    scheduler.on_rtt = samples.append
+    clock.advance(5.0)
+    assert _answer(scheduler, clock, 0.1) == pytest.approx(0.1)
+    assert scheduler.srtt == pytest.approx(0.1)
+    assert scheduler.jitter == 0.0
+    clock.advance(5.0)
+    assert _answer(scheduler, clock, 0.2) == pytest.approx(0.2)
+    assert scheduler.srtt == pytest.approx(0.1 + 0.1 / 8)
+    assert scheduler.jitter == pytest.approx(0.1 / 16)
+    assert samples == pytest.approx([0.1, 0.2])
+    clock.advance(5.0)
+    assert scheduler.heartbeat("alice")["rtt"] == 113
+
+
+def test_unknown_and_repeated_acks_are_ignored(clock):
+    scheduler = KeepaliveScheduler()
+    clock.advance(5.0)
+    ts = scheduler.heartbeat("alice")["ts"]
+    assert scheduler.ack(ts + 1) is None
+    assert scheduler.ack("garbage") is None
+    assert scheduler.ack(ts) is not None
+    assert scheduler.ack(ts) is None
+    assert scheduler.stats == {"sent": 1, "answered": 1, "lost": 0}
+
+
+def test_a_slow_link_shortens_the_interval(clock):
+    scheduler = KeepaliveScheduler(interval=5.0)
+    clock.advance(5.0)
+    _answer(scheduler, clock, 0.25)
+    assert scheduler.interval() == pytest.approx(5.0 / (1.0 + 4.0 * 0.25))
+
+
+def test_lost_heartbeats_shorten_the_interval(clock):
+    scheduler = KeepaliveScheduler(interval=5.0, min_interval=0.5, window=4)
+    for _ in range(3):
+        clock.advance(5.0)
+        _answer(scheduler, clock, 0.0)
+    assert scheduler.loss_rate == 0.0
+    clock.advance(5.0)
+    scheduler.heartbeat("alice")  # Never answered
+    clock.advance(5.0)
+    scheduler.heartbeat("alice")  # Counts the previous one as lost
+    assert scheduler.stats["lost"] == 1
+    assert scheduler.loss_rate == pytest.approx(0.25)
+    assert scheduler.interval() == pytest.approx(5.0 / 3.0)
+
+
+def test_the_interval_never_drops_below_the_minimum(clock):
+    scheduler = KeepaliveScheduler(interval=5.0, min_interval=1.0)
+    for _ in range(5):
+        clock.advance(5.0)
+        scheduler.heartbeat("alice")
+    assert scheduler.loss_rate == 1.0
+    assert scheduler.interval() == 1.0
+    assert scheduler.get_stats()["loss_rate"] == 1.0
+
+
+def test_lost_heartbeats_in_a_row_are_counted_until_one_is_answered(clock):
+    scheduler = KeepaliveScheduler(interval=5.0, min_interval=1.0)
+    for _ in range(4):
+        clock.advance(5.0)
+        scheduler.heartbeat("alice")
+    assert scheduler.consecutive_lost == 3
+    clock.advance(0.1)
+    scheduler.ack(max(scheduler.outstanding))
+    assert scheduler.consecutive_lost == 0
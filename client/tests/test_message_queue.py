@@ -0,0 +1,186 @@
+import queue
+
+import pytest
+
+from card import Card
+from game_session import GameState
+from message_queue import CoalescingQueue, merge_state
+
+
+def _state(version: int) -> dict:
+    return {"type": "game_state_update", "version": version}
+
+
+def _card(text: str) -> dict:
+    return Card.from_string(text).to_dict()
+
+
+SNAPSHOT = {
+    "type": "game_state_update", "players": ["alice", "bob"], "current_player": "alice",
+    "deck_size": 10, "discard_pile": 1, "top_card": _card("9♥"),
+    "alice": [_card("7♥"), _card("K♠"), _card("A♥")], "hand_sizes": {"alice": 3, "bob": 4}, "version": 5,
+}
+# alice plays 7♥ (bob takes two), plays A♥, draws K♦, bob plays 8♥ and alice takes 7♥ back
+# from a refilled deck; cards come as JSON objects or, once binary is on, as Card objects
+DELTAS = [
+    {"type": "state_delta", "version": 6, "base": 5, "top_card": _card("7♥"), "discard_pile": 2, "deck_size": 8,
+     "removed": {"alice": [_card("7♥")]}, "hand_sizes": {"alice": 2, "bob": 6}},
+    {"type": "state_delta", "version": 7, "base": 6, "top_card": Card("A", "♥"), "discard_pile": 3,
+     "removed": {"alice": [Card("A", "♥")]}, "hand_sizes": {"alice": 1}},
+    {"type": "state_delta", "version": 8, "base": 7, "current_player": "bob", "deck_size": 7,
+     "added": {"alice": [_card("K♦")]}, "hand_sizes": {"alice": 2}},
+    {"type": "state_delta", "version": 9, "base": 8, "current_player": "alice", "top_card": _card("8♥"),
+     "discard_pile": 4, "hand_sizes": {"bob": 5}},
+    {"type": "state_delta", "version": 10, "base": 9, "current_player": "bob", "deck_size": 4, "discard_pile": 1,
+     "added": {"alice": [Card("7", "♥")]}},
+]
+
+
+def _applied(messages) -> GameState:
+    state = GameState.from_message(messages[0], "alice") if messages[0]["type"] == "game_state_update" else None
+    for delta in messages[1:]:
+        state.apply_delta(delta, "alice")
+    return state
+
+
+def _drain(messages: CoalescingQueue) -> list:
+    drained = []
+    while not messages.empty():
+        drained.append(messages.get_nowait())
+    return drained
+
+
+def test_only_the_newest_snapshot_is_kept():
+    messages = CoalescingQueue()
+    messages.put(_state(1))
+    messages.put({"type": "error", "message": "Invalid move."})
+    messages.put(_state(2))
+    messages.put(_state(3))
+    assert messages.qsize() == 2
+    assert _drain(messages) == [{"type": "error", "message": "Invalid move."}, _state(3)]
+    assert messages.get_stats()["coalesced"] == 2
+
+
+def test_other_messages_keep_their_order():
+    messages = CoalescingQueue()
+    sent = [{"type": "connection_status", "message": str(i)} for i in range(5)]
+    for message in sent:
+        messages.put(message)
+    assert _drain(messages) == sent
+
+
+def test_a_full_queue_drops_the_oldest_message():
+    messages = CoalescingQueue(capacity=3)
+    for i in range(5):
+        messages.put({"type": "connection_status", "message": str(i)})
+    assert [message["message"] for message in _drain(messages)] == ["2", "3", "4"]
+    stats = messages.get_stats()
+    assert stats["dropped"] == 2
+    assert stats["max_depth"] == 3
+
+
+def test_superseded_entries_are_compacted():
+    messages = CoalescingQueue()
+    messages.put({"type": "connection_status", "message": "kept"})
+    for version in range(100):
+        messages.put(_state(version))
+    assert messages.qsize() == 2
+    assert len(messages._entries) <= 2 * messages.qsize() + 17
+    assert _drain(messages) == [{"type": "connection_status", "message": "kept"}, _state(99)]
+
+
+def test_get_waits_for_a_message():
+    messages = CoalescingQueue()
+    with pytest.raises(queue.Empty):
+        messages.get(timeout=0.01)
+    with pytest.raises(queue.Empty):
+        messages.get_nowait()
+    messages.put(_state(1))
+    assert messages.get(timeout=0.01) == _state(1)
+
+
+def test_clear():
+    messages = CoalescingQueue()
+    messages.put(_state(1))
+    messages.put({"type": "error"})
+    messages.clear()
+    assert messages.empty()
+    messages.put(_state(2))
+    assert _drain(messages) == [_state(2)]
+
+
+@pytest.mark.parametrize("count", range(1, len(DELTAS) + 1))
+def test_deltas_are_merged_into_the_queued_snapshot(count):
+    messages = CoalescingQueue()
+    for message in [SNAPSHOT] + DELTAS[:count]:
+        messages.put(message)
+    assert messages.qsize() == 1
+    merged = messages.get_nowait()
+    assert merged["type"] == "game_state_update"
+    expected = _applied([SNAPSHOT] + DELTAS[:count])
+    state = GameState.from_message(merged, "alice")
+    assert state.version == expected.version
+    assert state.same_view(expected)
+
+
+@pytest.mark.parametrize("start", range(len(DELTAS) - 1))
+def test_deltas_are_merged_with_each_other(start):
+    # The UI took the snapshot and everything up to start, then stalled
+    messages = CoalescingQueue()
+    for delta in DELTAS[start:]:
+        messages.put(delta)
+    assert messages.qsize() == 1
+    merged = messages.get_nowait()
+    assert (merged["type"], merged["base"], merged["version"]) == ("state_delta", start + 5, 10)
+    state = _applied([SNAPSHOT] + DELTAS[:start])
+    state.apply_delta(merged, "alice")
+    expected = _applied([SNAPSHOT] + DELTAS)
+    assert state.version == expected.version
+    assert state.same_view(expected)
+
+
+def test_a_card_taken_back_cancels_out():
+    merged = merge_state(DELTAS[0], {"type": "state_delta", "version": 7, "base": 6,
+                                     "added": {"alice": [Card("7", "♥")]}, "hand_sizes": {"alice": 3}})
+    assert "removed" not in merged and "added" not in merged
+    assert merged["hand_sizes"] == {"alice": 3, "bob": 6}
+    assert SNAPSHOT["alice"] == [_card("7♥"), _card("K♠"), _card("A♥")]  # Nothing is changed in place
+    assert DELTAS[0]["removed"] == {"alice": [_card("7♥")]}
+
+
+def test_a_snapshot_replaces_queued_deltas():
+    messages = CoalescingQueue()
+    messages.put(DELTAS[0])
+    messages.put({"type": "player_played_card", "message": "bob played"})
+    messages.put(DELTAS[1])
+    messages.put(_state(12))
+    assert _drain(messages) == [{"type": "player_played_card", "message": "bob played"}, _state(12)]
+
+
+def test_deltas_that_do_not_continue_the_queued_state_are_kept():
+    messages = CoalescingQueue()
+    messages.put(DELTAS[0])
+    messages.put(DELTAS[2])  # DELTAS[1] was lost; the session asks for a snapshot
+    assert _drain(messages) == [DELTAS[0], DELTAS[2]]
+    assert merge_state(SNAPSHOT, DELTAS[1]) is None
+    unknown = dict(DELTAS[0], removed={"alice": [{"value": "1", "suit": "?"}]})
+    assert merge_state(SNAPSHOT, unknown) is None
+
+
+def test_the_queued_state_is_never_dropped():
+    messages = CoalescingQueue(capacity=2)
+    messages.put({"type": "connection_status", "message": "0"})
+    messages.put(DELTAS[0])
+    for i in range(1, 4):
+        messages.put({"type": "connection_status", "message": str(i)})
+    assert _drain(messages) == [DELTAS[0], {"type": "connection_status", "message": "2"},
+                                {"type": "connection_status", "message": "3"}]
+    assert messages.get_stats()["dropped"] == 2
+
+
+def test_compact_removes_superseded_entries_from_the_front():
+    messages = CoalescingQueue(capacity=4)
+    for i in range(50):
+        messages.put({"type": "connection_status", "message": str(i)})
+    assert messages.qsize() == 4
+    assert len(messages._entries) == 4
@@ -0,0 +1,127 @@
+import pytest
+
+from metrics import ClientMetrics, Histogram, format_overlay, metrics_enabled
+
+
+def test_small_values_are_exact():
+    histogram = Histogram()
+    for value in range(1, 11):
+        histogram.record(value)
+    assert histogram.percentile(0.5) == 5.0
+    assert histogram.to_dict() == {"count": 10, "mean": 5.5, "p50": 5.0, "p90": 9.0, "p99": 10.0, "max": 10}
+
+
+@pytest.mark.parametrize("value", [100, 1_234, 99_999, 5_000_000])
+def test_large_values_are_kept_within_a_bucket(value):
+    histogram = Histogram()
+    histogram.record(value)
+    histogram.record(value * 2)
+    assert histogram.percentile(0.5) == pytest.approx(value, rel=1 / 16)
+    assert histogram.percentile(1.0) <= histogram.max == value * 2
+
+
+def test_negative_values_count_as_zero():
+    histogram = Histogram()
+    histogram.record(-5)
+    assert histogram.to_dict()["max"] == 0
+    assert Histogram().percentile(0.5) == 0.0
+
+
+def test_a_message_is_timed_through_every_stage():
+    metrics = ClientMetrics()
+    message = {"type": "game_state_update"}
+    received = metrics.datagram_in(120)
+    metrics.enqueued(message, received, metrics.decoded("game_state_update", received))
+    token = metrics.dispatched(message, queue_depth=1)
+    metrics.rendered("game_state_update", token)
+    stats = metrics.get_stats()
+    for stage in ClientMetrics.STAGES:
+        assert stats["stages_ms"][stage]["game_state_update"]["count"] == 1
+    assert stats["counters"] == {"packets_in": 1, "bytes_in": 120}
+    assert stats["queue_depth"]["count"] == 1
+
+
+def test_messages_that_were_not_enqueued_are_not_timed():
+    metrics = ClientMetrics()
+    token = metrics.dispatched({"type": "connection_status"}, queue_depth=0)
+    assert token is None
+    metrics.rendered("connection_status", token)
+    assert metrics.get_stats()["stages_ms"]["render"] == {}
+
+
+def test_only_the_newest_queued_messages_are_tracked():
+    metrics = ClientMetrics(max_tracked=2)
+    messages = [{"type": "game_state_update"} for _ in range(3)]
+    for message in messages:
+        received = metrics.datagram_in(10)
+        metrics.enqueued(message, received, metrics.decoded("game_state_update", received))
+    assert metrics.dispatched(messages[0], queue_depth=3) is None
+    assert metrics.dispatched(messages[2], queue_depth=2) is not None
+
+
+def test_interleaved_messages_keep_their_own_timestamps(monkeypatch):
+    ticks = iter(range(0, 10_000_000, 1_000_000))  # 1 ms per reading
+    monkeypatch.setattr("metrics.time.perf_counter_ns", lambda: next(ticks))
+    metrics = ClientMetrics()
+    first, second = {"type": "game_state_update"}, {"type": "state_delta"}
+    first_received = metrics.datagram_in(10)  # 0 ms
+    second_received = metrics.datagram_in(10)  # 1 ms
+    second_decoded = metrics.decoded("state_delta", second_received)  # 2 ms
+    first_decoded = metrics.decoded("game_state_update", first_received)  # 3 ms
+    metrics.enqueued(first, first_received, first_decoded)  # 4 ms
+    metrics.enqueued(second, second_received, second_decoded)  # 5 ms
+    stages = metrics.get_stats()["stages_ms"]
+    assert stages["decode"]["game_state_update"]["max"] == 3.0
+    assert stages["decode"]["state_delta"]["max"] == 1.0
+    assert stages["enqueue"]["game_state_update"]["max"] == 1.0
+    assert stages["enqueue"]["state_delta"]["max"] == 3.0
+
+
+def test_overall_timings_cover_every_message_type():
+    metrics = ClientMetrics()
+    for message_type in ("game_state_update", "state_delta", "state_delta"):
+        message = {"type": message_type}
+        received = metrics.datagram_in(10)
+        metrics.enqueued(message, received, metrics.decoded(message_type, received))
+    stats = metrics.get_stats()
+    assert stats["stages_ms"]["decode"]["state_delta"]["count"] == 2
+    assert stats["overall_ms"]["decode"]["count"] == 3
+    assert stats["overall_ms"]["enqueue"]["count"] == 3
+    assert "render" not in stats["overall_ms"]
+
+
+def test_merged_histograms_add_their_samples():
+    first, second = Histogram(), Histogram()
+    first.record(3)
+    second.record(7)
+    second.record(100)
+    first.merge(second)
+    assert first.to_dict()["count"] == 3
+    assert first.total == 110
+    assert first.max == 100
+
+
+def test_overlay():
+    metrics = ClientMetrics()
+    message = {"type": "state_delta"}
+    received = metrics.datagram_in(2048)
+    metrics.enqueued(message, received, metrics.decoded("state_delta", received))
+    metrics.rendered("state_delta", metrics.dispatched(message, queue_depth=1))
+    text = format_overlay({
+        "keepalive": {"srtt_ms": 12.5, "jitter_ms": 1.0, "loss_rate": 0.0},
+        "queue": {"depth": 0, "max_depth": 3, "coalesced": 2, "dropped": 0},
+        "metrics": metrics.get_stats(),
+    })
+    lines = text.splitlines()
+    assert lines[0] == "rtt 12.5 ms  jitter 1.0 ms  loss 0%"
+    assert lines[1] == "in 1 pkt / 2.0 kB  out 0 pkt / 0.0 kB"
+    assert lines[2] == "queue 0 (max 3)  coalesced 2  dropped 0"
+    assert [line.split()[0] for line in lines[3:]] == list(ClientMetrics.STAGES)
+    assert format_overlay({}).splitlines()[0] == "rtt -"
+
+
+def test_metrics_are_enabled_by_the_environment(monkeypatch):
+    monkeypatch.delenv("PRSI_METRICS", raising=False)
+    assert not metrics_enabled()
+    monkeypatch.setenv("PRSI_METRICS", "1")
+    assert metrics_enabled()
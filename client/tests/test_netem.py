@@ -0,0 +1,49 @@
+import pytest
+
+from netem import Impairment, _address
+
+
+def _fates(impairment, count=200):
+    return [impairment.delays() for _ in range(count)]
+
+
+def test_a_clean_link_forwards_everything_at_once():
+    impairment = Impairment()
+    assert _fates(impairment, 10) == [[0.0]] * 10
+    assert impairment.stats["forwarded"] == 10
+
+
+def test_the_same_seed_makes_the_same_decisions():
+    settings = dict(loss=0.2, delay_ms=30, jitter_ms=10, duplicate=0.1, reorder=0.1, seed=7)
+    assert _fates(Impairment(**settings)) == _fates(Impairment(**settings))
+
+
+def test_loss_duplication_and_reordering_are_counted():
+    impairment = Impairment(loss=0.3, duplicate=0.2, reorder=0.2, reorder_gap_ms=20, seed=1)
+    fates = _fates(impairment, 1000)
+    stats = impairment.stats
+    assert stats["received"] == 1000
+    assert stats["dropped"] == fates.count([])
+    assert stats["duplicated"] == sum(len(delays) == 2 for delays in fates)
+    assert stats["forwarded"] == sum(len(delays) for delays in fates)
+    assert stats["reordered"] == sum(delay == pytest.approx(0.02) for delays in fates for delay in delays)
+    assert 250 < stats["dropped"] < 350
+
+
+def test_jitter_never_makes_a_delay_negative():
+    impairment = Impairment(delay_ms=5, jitter_ms=50, seed=3)
+    assert all(delay >= 0.0 for delays in _fates(impairment) for delay in delays)
+
+
+def test_a_blackout_drops_everything_until_it_ends(clock):
+    impairment = Impairment()
+    impairment.blackout(2.0)
+    assert impairment.delays() == []
+    clock.advance(2.5)
+    assert impairment.delays() == [0.0]
+    assert impairment.stats["blackout_dropped"] == 1
+
+
+def test_address_parsing():
+    assert _address("10.0.0.1:9080") == ("10.0.0.1", 9080)
+    assert _address(":8080") == ("127.0.0.1", 8080)
@@ -0,0 +1,123 @@
+import random
+
+import pytest
+
+from network_client import NetworkClient
+
+
+@pytest.fixture
+def client(clock, monkeypatch):
+    """A client that lost its server, with the datagrams it sends collected in client.sent."""
+    client = NetworkClient(reliable=False)
+    client.running = True
+    client.connected = True
+    client.player_name = "alice"
+    client.state_version = 7
+    client.sent = []
+    client.send_message = client.sent.append
+    # No jitter: every backoff delay is its upper bound
+    monkeypatch.setattr(random, "uniform", lambda low, high: high)
+    return client
+
+
+def _messages(client) -> list:
+    messages = []
+    while (message := client.get_next_message()) is not None:
+        messages.append(message)
+    return messages
+
+
+def test_a_lost_connection_starts_reconnecting_once(client):
+    client._handle_disconnect()
+    client._handle_disconnect()
+    assert client.reconnecting and client.disconnected and not client.connected
+    assert _messages(client) == [{"type": "connection_status", "message": "Connection lost. Reconnecting..."}]
+
+
+def test_resume_requests_back_off_exponentially(client, clock):
+    client._handle_disconnect()
+    sent_at = []
+    for _ in range(200):
+        client._reconnect_step()
+        if len(client.sent) > len(sent_at):
+            sent_at.append(clock.now - 1000.0)
+        clock.advance(0.25)
+    assert client.sent[0] == {"type": "resume", "name": "alice", "version": 7}
+    assert len(client.sent) == client.max_reconnect_attempts == 6
+    gaps = [later - earlier for earlier, later in zip(sent_at, sent_at[1:])]
+    assert gaps == pytest.approx([0.5, 1.0, 2.0, 4.0, 8.0])
+
+
+def test_reconnecting_gives_up_after_the_last_attempt(client, clock):
+    client.max_reconnect_attempts = 2
+    client._handle_disconnect()
+    for _ in range(3):
+        client._reconnect_step()
+        clock.advance(client.max_reconnect_delay)
+    assert len(client.sent) == 2
+    assert not client.running and not client.reconnecting
+    assert _messages(client)[-1]["type"] == "unknown"
+
+
+def test_moves_made_while_reconnecting_are_sent_after_a_resume(client):
+    client._handle_disconnect()
+    move = {"type": "draw_card", "player_name": "alice"}
+    client._send_move(move)
+    assert client.sent == []
+    client._handle_resume_reply({"type": "resume_ack"})
+    assert client.sent == [move]
+    assert client.connected and not client.reconnecting
+    assert _messages(client)[-1] == {"type": "connection_status", "message": "Reconnected."}
+
+
+def test_moves_are_dropped_when_the_game_changed(client):
+    client._handle_disconnect()
+    client._send_move({"type": "draw_card", "player_name": "alice"})
+    client._handle_resume_reply({"type": "game_state_update"})
+    assert client.sent == []
+    assert client.connected
+    assert "make your move again" in _messages(client)[-1]["message"]
+
+
+def test_a_rejected_resume_ends_the_session(client):
+    client._handle_disconnect()
+    client._send_move({"type": "draw_card", "player_name": "alice"})
+    client._handle_resume_reply({"type": "resume_rejected", "message": "Session expired."})
+    assert not client.running
+    assert not client._intents
+    assert _messages(client)[-1] == {"type": "unknown", "message": "Session expired."}
+
+
+def _delta(version: int, base: int) -> dict:
+    return {"type": "state_delta", "version": version, "base": base}
+
+
+def test_deltas_continue_the_version_they_are_based_on(client):
+    assert client._accept_delta(_delta(8, 7))
+    assert client._accept_delta(_delta(9, 8))
+    assert client.state_version == 9
+    assert client.sent == []
+
+
+def test_stale_deltas_are_dropped_quietly(client):
+    assert not client._accept_delta(_delta(7, 6))
+    assert client.state_version == 7
+    assert client.sent == []
+
+
+def test_a_gap_asks_for_a_snapshot_once_per_retry(client, clock):
+    assert not client._accept_delta(_delta(10, 9))
+    assert not client._accept_delta(_delta(11, 10))
+    assert client.sent == [{"type": "snapshot_request", "name": "alice"}]
+    clock.advance(1.5)
+    assert not client._accept_delta(_delta(12, 11))
+    assert len(client.sent) == 2
+    assert client.state_version == 7
+
+
+def test_a_newer_version_in_a_heartbeat_ack_asks_for_a_snapshot(client):
+    client.game_started = True
+    client._check_version(7)
+    assert client.sent == []
+    client._check_version(8)
+    assert client.sent == [{"type": "snapshot_request", "name": "alice"}]
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from profiler import SamplingProfiler, profiling_enabled
+
+
+def _spin(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class _Widget:
+    def update_game_state(self):
+        self.cache = [bytearray(1024) for _ in range(64)]
+        return len(self.cache)
+
+
+def test_samples_the_watched_threads_only(tmp_path):
+    stop = threading.Event()
+    busy = threading.Thread(target=_spin, args=(stop,), name="busy")
+    busy.start()
+    profiler = SamplingProfiler(rate_hz=500, threads=("busy",), output=str(tmp_path / "run"))
+    profiler.start()
+    time.sleep(0.2)
+    profiler.stop()
+    stop.set()
+    busy.join()
+
+    assert profiler.samples > 10
+    lines = (tmp_path / "run.collapsed").read_text(encoding="utf-8").splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert stack.startswith("busy;") and int(count) > 0
+    assert any("test_profiler.py:_spin" in line for line in lines)
+    assert not (tmp_path / "run.memory.txt").exists()
+
+
+def test_memory_is_traced_around_instrumented_methods(tmp_path):
+    class Widget(_Widget):
+        pass
+
+    profiler = SamplingProfiler(threads=(), output=str(tmp_path / "run"), trace_memory=True)
+    profiler.instrument(Widget, ("update_game_state",))
+    profiler.start()
+    assert Widget().update_game_state() == 64
+    profiler.stop()
+
+    assert profiler.memory_calls["update_game_state"] == 1
+    assert sum(profiler.memory["update_game_state"].values()) >= 64 * 1024
+    report = (tmp_path / "run.memory.txt").read_text(encoding="utf-8")
+    assert report.startswith("update_game_state: 1 calls")
+
+
+def test_methods_stay_untouched_without_memory_tracing():
+    class Widget(_Widget):
+        pass
+
+    method = Widget.update_game_state
+    SamplingProfiler().instrument(Widget, ("update_game_state",))
+    assert Widget.update_game_state is method
+
+
+def test_profiling_is_enabled_by_the_environment(monkeypatch):
+    monkeypatch.setenv("PRSI_PROFILE", "yes")
+    assert profiling_enabled()
+    monkeypatch.setenv("PRSI_PROFILE", "0")
+    assert not profiling_enabled()
+
+
+def test_frames_without_a_qualified_name_use_the_function_name():
+    # Code objects of Python < 3.11 have no co_qualname
+    class Code:
+        co_filename = "/src/game_ui.py"
+        co_name = "update_game_state"
+
+    class Frame:
+        f_code = Code()
+        f_back = None
+
+    assert SamplingProfiler()._collapse("MainThread", Frame()) == "MainThread;game_ui.py:update_game_state"
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from card import Card
+from game_session import FINISHED
+from recorder import MAGIC, RECEIVED, SENT, DatagramRecorder, read_records, recording_path
+from replay import replay
+
+
+def _datagram(message: dict) -> bytes:
+    return json.dumps(message, ensure_ascii=False).encode()
+
+
+GAME = [
+    (SENT, _datagram({"type": "connect", "name": "alice"})),
+    (RECEIVED, _datagram({"type": "connect_ack", "waiting_for_player": True})),
+    (RECEIVED, _datagram({
+        "type": "game_state_update", "players": ["alice", "bob"], "current_player": "alice",
+        "deck_size": 10, "discard_pile": 1, "top_card": Card("9", "♥").to_dict(),
+        "alice": [Card("9", "♣").to_dict()], "bob": [Card("8", "♦").to_dict()], "version": 1,
+    })),
+    (SENT, _datagram({"type": "play_card", "player_name": "alice", "card": "9♣"})),
+    (RECEIVED, _datagram({"type": "game_over", "message": "alice won!", "winner": "alice"})),
+]
+
+
+def _record(path, records=GAME):
+    recorder = DatagramRecorder(str(path))
+    recorder.open()
+    for direction, data in records:
+        recorder.record(direction, data)
+    recorder.close()
+    return recorder
+
+
+def test_records_are_read_back_in_order(tmp_path):
+    path = tmp_path / "game.rec"
+    assert _record(path).records == len(GAME)
+    buffer = path.read_bytes()
+    assert buffer.startswith(MAGIC)
+    records = list(read_records(buffer))
+    assert [(direction, buffer[start:end]) for _, direction, start, end in records] == GAME
+    timestamps = [timestamp for timestamp, *_ in records]
+    assert timestamps == sorted(timestamps)
+
+
+def test_a_second_connection_appends_without_a_new_header(tmp_path):
+    path = tmp_path / "game.rec"
+    _record(path, GAME[:2])
+    _record(path, GAME[2:])
+    buffer = path.read_bytes()
+    assert buffer.count(MAGIC) == 1
+    assert len(list(read_records(buffer))) == len(GAME)
+
+
+def test_a_truncated_record_is_skipped(tmp_path):
+    path = tmp_path / "game.rec"
+    _record(path)
+    buffer = path.read_bytes()[:-5]
+    assert len(list(read_records(buffer))) == len(GAME) - 1
+
+
+def test_other_files_are_refused():
+    with pytest.raises(ValueError):
+        list(read_records(b"not a log"))
+
+
+def test_a_recorded_game_replays_to_the_same_end(tmp_path):
+    path = tmp_path / "game.rec"
+    _record(path)
+    result = replay(str(path))
+    assert result["player"] == "alice"
+    assert result["received"] == 3
+    assert result["sent"] == 2
+    assert result["messages_dispatched"] == 3
+    assert result["final_phase"] == FINISHED
+    assert result["winner"] == "alice"
+
+
+def test_recording_is_enabled_by_the_environment(monkeypatch):
+    monkeypatch.delenv("PRSI_RECORD", raising=False)
+    assert recording_path() is None
+    monkeypatch.setenv("PRSI_RECORD", "game.rec")
+    assert recording_path() == "game.rec"
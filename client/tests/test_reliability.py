@@ -0,0 +1,98 @@
+import pytest
+
+from codec import decode
+from reliability import ReliableSender, RttEstimator
+
+
+def test_first_sample_initializes_the_estimate():
+    rtt = RttEstimator()
+    rtt.sample(0.1)
+    assert rtt.srtt == pytest.approx(0.1)
+    assert rtt.rttvar == pytest.approx(0.05)
+    assert rtt.rto == pytest.approx(0.3)  # srtt + 4 * rttvar
+
+
+def test_later_samples_are_smoothed():
+    rtt = RttEstimator()
+    rtt.sample(0.1)
+    rtt.sample(0.3)
+    assert rtt.rttvar == pytest.approx(0.75 * 0.05 + 0.25 * 0.2)
+    assert rtt.srtt == pytest.approx(0.875 * 0.1 + 0.125 * 0.3)
+
+
+def test_timeout_is_clamped():
+    rtt = RttEstimator(min_rto=0.2, max_rto=8.0)
+    rtt.sample(0.001)
+    assert rtt.rto == 0.2
+    rtt = RttEstimator(min_rto=0.2, max_rto=8.0)
+    rtt.sample(5.0)
+    assert rtt.rto == 8.0
+
+
+def test_backoff_doubles_up_to_the_maximum():
+    rtt = RttEstimator(initial_rto=1.0, max_rto=3.0)
+    rtt.backoff()
+    assert rtt.rto == 2.0
+    rtt.backoff()
+    assert rtt.rto == 3.0
+
+
+def test_track_numbers_moves(clock):
+    sender = ReliableSender()
+    first = decode(sender.track({"type": "draw_card", "player_name": "alice"}))
+    second = decode(sender.track({"type": "draw_card", "player_name": "alice"}))
+    assert (first["seq"], second["seq"]) == (1, 2)
+    assert sorted(sender.pending) == [1, 2]
+
+
+def test_ack_of_a_single_transmission_samples_the_rtt(clock):
+    sender = ReliableSender()
+    sender.track({"type": "draw_card"})
+    clock.advance(0.05)
+    assert sender.ack(1)
+    assert sender.rtt.srtt == pytest.approx(0.05)
+    assert not sender.pending
+
+
+def test_karn_ack_of_a_retransmission_is_not_sampled(clock):
+    sender = ReliableSender(rtt=RttEstimator(initial_rto=1.0))
+    data = sender.track({"type": "draw_card"})
+    clock.advance(1.0)
+    resend, failed = sender.poll()
+    assert resend == [data] and failed == []
+    assert sender.rtt.rto == 2.0  # Backed off
+    clock.advance(0.1)
+    assert sender.ack(1)
+    assert sender.rtt.srtt is None
+    assert sender.rtt.rto == 2.0
+
+
+def test_nothing_is_resent_before_the_deadline(clock):
+    sender = ReliableSender(rtt=RttEstimator(initial_rto=1.0))
+    sender.track({"type": "draw_card"})
+    clock.advance(0.5)
+    assert sender.poll() == ([], [])
+    assert sender.next_timeout() == pytest.approx(0.5)
+
+
+def test_duplicate_and_unknown_acks(clock):
+    sender = ReliableSender()
+    sender.track({"type": "draw_card"})
+    assert sender.ack("1")
+    assert not sender.ack(1)
+    assert not sender.ack("garbage")
+    assert sender.stats["duplicate_acks"] == 1
+
+
+def test_move_is_given_up_after_max_attempts(clock):
+    sender = ReliableSender(max_attempts=2, rtt=RttEstimator(initial_rto=1.0))
+    sender.track({"type": "play_card", "card": "7♥"})
+    clock.advance(1.0)
+    resend, failed = sender.poll()
+    assert len(resend) == 1 and not failed
+    clock.advance(2.0)
+    resend, failed = sender.poll()
+    assert not resend
+    assert failed == [{"type": "play_card", "card": "7♥", "seq": 1}]
+    assert sender.next_timeout() is None
+    assert sender.stats["failed"] == 1
@@ -0,0 +1,385 @@
+#include "binary_codec.h"
+
+#include <cstdint>
+#include <stdexcept>
+#include <vector>
+
+namespace {
+
+enum class Kind { U8, U32, U64, I32, CARD, NAME, TEXT, NAMES, HANDS, HAND_MAP, SIZES };
+
+// Count of a hand that is not included in the message
+const uint8_t NO_HAND = 0xFF;
+
+struct Field {
+    const char* name;
+    Kind kind;
+};
+
+struct Layout {
+    uint8_t id;
+    const char* type;
+    bool from_client;  // Only client messages are decoded by the server
+    std::vector<Field> fields;  // One presence flag each
+
+    size_t flag_bytes() const { return (fields.size() + 7) / 8; }
+};
+
+// Must match LAYOUTS in client/codec.py
+const std::vector<Layout>& layouts() {
+    static const std::vector<Layout> table = {
+        {1, "heartbeat", true, {{"name", Kind::NAME}, {"ts", Kind::U64}, {"rtt", Kind::U32}}},
+        {2, "play_card", true, {{"card", Kind::CARD}, {"player_name", Kind::NAME}, {"seq", Kind::U32}}},
+        {3, "draw_card", true, {{"player_name", Kind::NAME}, {"seq", Kind::U32}}},
+        {4, "disconnect", true, {{"name", Kind::NAME}}},
+        {5, "resume", true, {{"name", Kind::NAME}, {"version", Kind::I32}}},
+        {6, "snapshot_request", true, {{"name", Kind::NAME}}},
+        {16, "game_state_update", false, {{"players", Kind::NAMES}, {"current_player", Kind::NAME},
+                                          {"deck_size", Kind::U8}, {"discard_pile", Kind::U8},
+                                          {"top_card", Kind::CARD}, {"hands", Kind::HANDS},
+                                          {"hand_sizes", Kind::SIZES}, {"version", Kind::U32}}},
+        {17, "state_delta", false, {{"version", Kind::U32}, {"base", Kind::U32},
+                                    {"current_player", Kind::NAME}, {"deck_size", Kind::U8},
+                                    {"discard_pile", Kind::U8}, {"top_card", Kind::CARD},
+                                    {"removed", Kind::HAND_MAP}, {"added", Kind::HAND_MAP},
+                                    {"hand_sizes", Kind::SIZES}}},
+        {18, "error", false, {{"message", Kind::TEXT}, {"version", Kind::U32}}},
+        {19, "ack", false, {{"seq", Kind::U32}}},
+        {20, "heartbeat_ack", false, {{"ts", Kind::U64}, {"version", Kind::U32}}},
+        {21, "resume_ack", false, {{"version", Kind::U32}}},
+        {22, "resume_rejected", false, {{"message", Kind::TEXT}}},
+        {23, "player_disconnected", false, {{"player", Kind::NAME}, {"message", Kind::TEXT}}},
+        {24, "player_reconnected", false, {{"player", Kind::NAME}, {"message", Kind::TEXT}}},
+        {25, "player_played_card", false, {{"player_name", Kind::NAME}, {"message", Kind::TEXT}}},
+        {26, "player_drawn_card", false, {{"player_name", Kind::NAME}, {"message", Kind::TEXT}}},
+        {27, "game_over", false, {{"winner", Kind::NAME}, {"message", Kind::TEXT}}},
+    };
+    return table;
+}
+
+const std::vector<std::string> SUITS = {"♥", "♦", "♣", "♠"};
+const std::vector<std::string> VALUES = {"7", "8", "9", "10", "J", "Q", "K", "A"};
+
+std::string unquote(const std::string& str) {
+    if (str.size() >= 2 && str.front() == '"' && str.back() == '"') {
+        return str.substr(1, str.size() - 2);
+    }
+    return str;
+}
+
+// Cards in a fragment written by SimpleJSON (serialize_card, serialize_cards or
+// convert_hand_to_nested): {"suit": "♥", "value": "7"} objects between begin and end
+std::vector<Card> parse_cards(const std::string& text, size_t begin, size_t end) {
+    static const std::string suit_key = "\"suit\": \"";
+    static const std::string value_key = "\"value\": \"";
+    std::vector<Card> cards;
+    size_t pos = begin;
+    while (true) {
+        size_t suit_at = text.find(suit_key, pos);
+        if (suit_at == std::string::npos || suit_at >= end) break;
+        size_t suit_start = suit_at + suit_key.size();
+        size_t suit_end = text.find('"', suit_start);
+        size_t value_at = text.find(value_key, suit_end);
+        if (suit_end == std::string::npos || value_at == std::string::npos) {
+            throw std::invalid_argument("Invalid card");
+        }
+        size_t value_start = value_at + value_key.size();
+        size_t value_end = text.find('"', value_start);
+        if (value_end == std::string::npos) {
+            throw std::invalid_argument("Invalid card");
+        }
+        cards.emplace_back(text.substr(suit_start, suit_end - suit_start),
+                           text.substr(value_start, value_end - value_start));
+        pos = value_end + 1;
+    }
+    return cards;
+}
+
+// {"alice": [cards], "bob": [cards]} as written by SimpleJSON::serialize_nested_object
+std::vector<std::pair<std::string, std::vector<Card>>> parse_hand_map(const std::string& text) {
+    std::vector<std::pair<std::string, std::vector<Card>>> hands;
+    size_t pos = text.find('{');
+    while (pos != std::string::npos && (pos = text.find('"', pos + 1)) != std::string::npos) {
+        size_t name_end = text.find('"', pos + 1);
+        size_t open = text.find('[', name_end);
+        size_t close = text.find(']', open);
+        if (name_end == std::string::npos || open == std::string::npos || close == std::string::npos) {
+            throw std::invalid_argument("Invalid hand map");
+        }
+        hands.emplace_back(text.substr(pos + 1, name_end - pos - 1), parse_cards(text, open, close));
+        pos = close;
+    }
+    return hands;
+}
+
+// {"alice": 5, "bob": 4} as written by SimpleJSON::serialize_object
+std::vector<std::pair<std::string, std::string>> parse_sizes(const std::string& text) {
+    std::vector<std::pair<std::string, std::string>> sizes;
+    size_t pos = text.find('{');
+    while (pos != std::string::npos && (pos = text.find('"', pos + 1)) != std::string::npos) {
+        size_t name_end = text.find('"', pos + 1);
+        size_t colon = text.find(':', name_end);
+        if (name_end == std::string::npos || colon == std::string::npos) {
+            throw std::invalid_argument("Invalid hand sizes");
+        }
+        size_t end = text.find_first_of(",}", colon);
+        if (end == std::string::npos) {
+            throw std::invalid_argument("Invalid hand sizes");
+        }
+        sizes.emplace_back(text.substr(pos + 1, name_end - pos - 1), text.substr(colon + 1, end - colon - 1));
+        pos = end;
+    }
+    return sizes;
+}
+
+void put_uint(std::string& out, uint64_t value, int bytes) {
+    for (int i = 0; i < bytes; ++i) {
+        out.push_back(static_cast<char>((value >> (8 * i)) & 0xFF));
+    }
+}
+
+void put_string(std::string& out, const std::string& value, int length_bytes) {
+    if (value.size() >= (1ULL << (8 * length_bytes))) {
+        throw std::invalid_argument("String too long");
+    }
+    put_uint(out, value.size(), length_bytes);
+    out += value;
+}
+
+void put_cards(std::string& out, const std::vector<Card>& cards) {
+    if (cards.size() > 255) {
+        throw std::invalid_argument("Too many cards");
+    }
+    out.push_back(static_cast<char>(cards.size()));
+    for (const Card& card : cards) {
+        out.push_back(static_cast<char>(BinaryCodec::card_code(card)));
+    }
+}
+
+void put_number(std::string& out, const std::string& text, Kind kind) {
+    std::string digits = unquote(text);
+    if (kind == Kind::I32) {
+        long long value = std::stoll(digits);
+        if (value < INT32_MIN || value > INT32_MAX) throw std::invalid_argument("Number out of range");
+        put_uint(out, static_cast<uint32_t>(static_cast<int32_t>(value)), 4);
+        return;
+    }
+    digits.erase(0, digits.find_first_not_of(' '));
+    if (digits.empty() || digits.front() == '-') throw std::invalid_argument("Negative number");
+    unsigned long long value = std::stoull(digits);
+    int bytes = kind == Kind::U8 ? 1 : kind == Kind::U32 ? 4 : 8;
+    if (bytes < 8 && value >= (1ULL << (8 * bytes))) throw std::invalid_argument("Number out of range");
+    put_uint(out, value, bytes);
+}
+
+// Bounds-checked reading of a binary message
+class Reader {
+public:
+    Reader(const char* data, size_t size) : data_(data), size_(size) {}
+
+    uint64_t uint(int bytes) {
+        need(bytes);
+        uint64_t value = 0;
+        for (int i = 0; i < bytes; ++i) {
+            value |= static_cast<uint64_t>(static_cast<unsigned char>(data_[pos_ + i])) << (8 * i);
+        }
+        pos_ += bytes;
+        return value;
+    }
+
+    std::string string(int length_bytes) {
+        size_t length = uint(length_bytes);
+        need(length);
+        std::string value(data_ + pos_, length);
+        pos_ += length;
+        return value;
+    }
+
+    bool done() const { return pos_ == size_; }
+
+private:
+    void need(size_t bytes) const {
+        if (size_ - pos_ < bytes) throw std::invalid_argument("Truncated binary message");
+    }
+
+    const char* data_;
+    size_t size_;
+    size_t pos_ = 0;
+};
+
+}  // namespace
+
+bool BinaryCodec::is_binary(const char* data, size_t size) {
+    return size > 0 && data[0] != '{';
+}
+
+std::string BinaryCodec::encode(const SimpleJSON& msg) {
+    const auto& data = msg.get_data();
+    auto type_it = data.find("type");
+    if (type_it == data.end()) return "";
+    std::string type = unquote(type_it->second);
+
+    for (const Layout& layout : layouts()) {
+        if (type != layout.type) continue;
+        try {
+            std::string out;
+            out.push_back(static_cast<char>(layout.id));
+            out.append(layout.flag_bytes(), '\0');
+            uint64_t flags = 0;
+            for (size_t i = 0; i < layout.fields.size(); ++i) {
+                const Field& field = layout.fields[i];
+                if (field.kind == Kind::HANDS) {
+                    // The hands are stored under the player names, in "players" order; a
+                    // player whose hand is not in the message gets the NO_HAND count
+                    auto players_it = data.find("players");
+                    if (players_it == data.end()) continue;
+                    std::string hands;
+                    bool any = false;
+                    for (const std::string& name : SimpleJSON::deserialize_array(players_it->second)) {
+                        auto hand_it = data.find(name);
+                        if (hand_it == data.end()) {
+                            hands.push_back(static_cast<char>(NO_HAND));
+                            continue;
+                        }
+                        std::vector<Card> cards = parse_cards(hand_it->second, 0, hand_it->second.size());
+                        if (cards.size() >= NO_HAND) throw std::invalid_argument("Too many cards");
+                        put_cards(hands, cards);
+                        any = true;
+                    }
+                    if (!any) continue;
+                    out += hands;
+                    flags |= 1ULL << i;
+                    continue;
+                }
+                auto it = data.find(field.name);
+                if (it == data.end()) continue;
+                const std::string& value = it->second;
+                switch (field.kind) {
+                    case Kind::U8:
+                    case Kind::U32:
+                    case Kind::U64:
+                    case Kind::I32:
+                        put_number(out, value, field.kind);
+                        break;
+                    case Kind::CARD: {
+                        std::vector<Card> cards = parse_cards(value, 0, value.size());
+                        if (cards.size() != 1) throw std::invalid_argument("Not a card");
+                        out.push_back(static_cast<char>(card_code(cards[0])));
+                        break;
+                    }
+                    case Kind::NAME:
+                        put_string(out, unquote(value), 1);
+                        break;
+                    case Kind::TEXT:
+                        put_string(out, unquote(value), 2);
+                        break;
+                    case Kind::NAMES: {
+                        SimpleJSON::JSONArray names = SimpleJSON::deserialize_array(value);
+                        if (names.size() > 255) throw std::invalid_argument("Too many names");
+                        out.push_back(static_cast<char>(names.size()));
+                        for (const std::string& name : names) put_string(out, name, 1);
+                        break;
+                    }
+                    case Kind::HAND_MAP: {
+                        auto hands = parse_hand_map(value);
+                        if (hands.size() > 255) throw std::invalid_argument("Too many hands");
+                        out.push_back(static_cast<char>(hands.size()));
+                        for (const auto& hand : hands) {
+                            put_string(out, hand.first, 1);
+                            put_cards(out, hand.second);
+                        }
+                        break;
+                    }
+                    case Kind::SIZES: {
+                        auto sizes = parse_sizes(value);
+                        if (sizes.size() > 255) throw std::invalid_argument("Too many hands");
+                        out.push_back(static_cast<char>(sizes.size()));
+                        for (const auto& size : sizes) {
+                            put_string(out, size.first, 1);
+                            put_number(out, size.second, Kind::U8);
+                        }
+                        break;
+                    }
+                    case Kind::HANDS:
+                        break;
+                }
+                flags |= 1ULL << i;
+            }
+            for (size_t i = 0; i < layout.flag_bytes(); ++i) {
+                out[1 + i] = static_cast<char>((flags >> (8 * i)) & 0xFF);
+            }
+            return out;
+        } catch (const std::exception&) {
+            return "";  // Sent as JSON instead
+        }
+    }
+    return "";
+}
+
+SimpleJSON BinaryCodec::decode(const char* data, size_t size) {
+    Reader reader(data, size);
+    int id = static_cast<int>(reader.uint(1));
+
+    for (const Layout& layout : layouts()) {
+        if (layout.id != id) continue;
+        if (!layout.from_client) break;
+        uint64_t flags = reader.uint(static_cast<int>(layout.flag_bytes()));
+
+        // Values are stored without quotes, like SimpleJSON::deserialize_object does
+        SimpleJSON msg;
+        msg["type"] = layout.type;
+        for (size_t i = 0; i < layout.fields.size(); ++i) {
+            if (!(flags & (1ULL << i))) continue;
+            const Field& field = layout.fields[i];
+            switch (field.kind) {
+                case Kind::U8:
+                    msg[field.name] = std::to_string(reader.uint(1));
+                    break;
+                case Kind::U32:
+                    msg[field.name] = std::to_string(reader.uint(4));
+                    break;
+                case Kind::U64:
+                    msg[field.name] = std::to_string(reader.uint(8));
+                    break;
+                case Kind::I32:
+                    msg[field.name] = std::to_string(static_cast<int32_t>(static_cast<uint32_t>(reader.uint(4))));
+                    break;
+                case Kind::CARD:
+                    msg[field.name] = card_from_code(static_cast<int>(reader.uint(1))).to_string();
+                    break;
+                case Kind::NAME:
+                    msg[field.name] = reader.string(1);
+                    break;
+                case Kind::TEXT:
+                    msg[field.name] = reader.string(2);
+                    break;
+                default:
+                    throw std::invalid_argument("Field kind not accepted from clients");
+            }
+        }
+        if (!reader.done()) {
+            throw std::invalid_argument("Trailing bytes after binary message");
+        }
+        return msg;
+    }
+    throw std::invalid_argument("Unknown binary message type " + std::to_string(id));
+}
+
+int BinaryCodec::card_code(const Card& card) {
+    for (size_t rank = 0; rank < VALUES.size(); ++rank) {
+        if (VALUES[rank] != card.value) continue;
+        for (size_t suit = 0; suit < SUITS.size(); ++suit) {
+            if (SUITS[suit] == card.suit) {
+                return static_cast<int>(rank * SUITS.size() + suit);
+            }
+        }
+    }
+    throw std::invalid_argument("Unknown card: " + card.to_string());
+}
+
+Card BinaryCodec::card_from_code(int code) {
+    if (code < 0 || code >= static_cast<int>(VALUES.size() * SUITS.size())) {
+        throw std::invalid_argument("Invalid card code " + std::to_string(code));
+    }
+    return Card(SUITS[code % SUITS.size()], VALUES[code / SUITS.size()]);
+}
@@ -0,0 +1,37 @@
+#ifndef BINARY_CODEC_H
+#define BINARY_CODEC_H
+
+#include <cstddef>
+#include <string>
+#include "card.h"
+#include "json.h"
+
+// Compact fixed-layout wire format, the counterpart of client/codec.py.
+//
+// A message is its type id (one byte), presence flags (one byte per 8 fields of the
+// type's layout, bit i set if field i follows) and the present fields in layout
+// order. Integers are little endian, a card is one byte (rank index * 4 + suit index),
+// names are UTF-8 with a one byte and texts with a two byte length prefix. A hand
+// that is not included in a message has the count 0xFF. JSON messages start with
+// '{' and binary ones with their type id, so both can arrive on the same socket.
+//
+// Messages are converted from and to SimpleJSON holding the same strings that the JSON
+// parser and the assign_* methods produce, so the game logic does not depend on the
+// codec a player negotiated.
+class BinaryCodec {
+public:
+    // True if a datagram is a binary message rather than JSON
+    static bool is_binary(const char* data, size_t size);
+
+    // Binary form of a message, or an empty string if it has no layout or does not fit it
+    static std::string encode(const SimpleJSON& msg);
+
+    // Parse a binary message sent by a client; throws std::invalid_argument if it is malformed
+    static SimpleJSON decode(const char* data, size_t size);
+
+    // The 0-31 code of a card; throws std::invalid_argument for an unknown card
+    static int card_code(const Card& card);
+    static Card card_from_code(int code);
+};
+
+#endif // BINARY_CODEC_H
@@ -0,0 +1,134 @@
+#include "framing.h"
+
+#include <stdexcept>
+
+namespace {
+
+uint32_t read_u32(const char* data) {
+    uint32_t value = 0;
+    for (int i = 0; i < 4; ++i) {
+        value |= static_cast<uint32_t>(static_cast<unsigned char>(data[i])) << (8 * i);
+    }
+    return value;
+}
+
+}  // namespace
+
+bool is_fragment(const char* data, size_t size) {
+    return size >= FRAGMENT_HEADER_SIZE && static_cast<unsigned char>(data[0]) == FRAGMENT_MAGIC;
+}
+
+std::vector<std::string> split_message(const std::string& data, uint32_t message_id) {
+    if (data.size() <= MAX_DATAGRAM_SIZE) {
+        return {data};
+    }
+    size_t chunk = MAX_DATAGRAM_SIZE - FRAGMENT_HEADER_SIZE;
+    size_t count = (data.size() + chunk - 1) / chunk;
+    if (count > MAX_FRAGMENTS) {
+        throw std::length_error("Message too large to send");
+    }
+
+    std::vector<std::string> datagrams;
+    datagrams.reserve(count);
+    for (size_t index = 0; index < count; ++index) {
+        std::string datagram;
+        datagram.reserve(MAX_DATAGRAM_SIZE);
+        datagram.push_back(static_cast<char>(FRAGMENT_MAGIC));
+        for (int i = 0; i < 4; ++i) {
+            datagram.push_back(static_cast<char>((message_id >> (8 * i)) & 0xFF));
+        }
+        datagram.push_back(static_cast<char>(index));
+        datagram.push_back(static_cast<char>(count));
+        datagram.append(data, index * chunk, chunk);
+        datagrams.push_back(std::move(datagram));
+    }
+    return datagrams;
+}
+
+Reassembler::Reassembler(std::chrono::milliseconds timeout, size_t max_bytes)
+    : timeout_(timeout), max_bytes_(max_bytes) {}
+
+bool Reassembler::add(const sockaddr_in& source, const char* data, size_t size, std::string& message) {
+    if (!is_fragment(data, size)) {
+        return false;
+    }
+    uint32_t message_id = read_u32(data + 1);
+    size_t index = static_cast<unsigned char>(data[5]);
+    size_t count = static_cast<unsigned char>(data[6]);
+    if (index >= count) {
+        return false;
+    }
+
+    auto now = std::chrono::steady_clock::now();
+    expire(now);
+
+    Key key{(static_cast<uint64_t>(source.sin_addr.s_addr) << 16) | source.sin_port, message_id};
+    auto it = partials_.find(key);
+    if (it == partials_.end()) {
+        Partial partial;
+        partial.fragments.resize(count);
+        partial.received.resize(count, false);
+        partial.missing = count;
+        partial.started = now;
+        it = partials_.emplace(key, std::move(partial)).first;
+    } else if (it->second.fragments.size() != count || it->second.received[index]) {
+        return false;  // Inconsistent header or duplicate
+    }
+
+    size_t payload = size - FRAGMENT_HEADER_SIZE;
+    while (buffered_ + payload > max_bytes_) {
+        if (!evict_oldest(key)) {
+            discard(partials_.find(key));
+            return false;  // The message alone exceeds the cap
+        }
+    }
+
+    Partial& partial = it->second;
+    partial.fragments[index].assign(data + FRAGMENT_HEADER_SIZE, payload);
+    partial.received[index] = true;
+    partial.missing--;
+    partial.size += payload;
+    buffered_ += payload;
+    if (partial.missing > 0) {
+        return false;
+    }
+
+    message.clear();
+    message.reserve(partial.size);
+    for (const std::string& fragment : partial.fragments) {
+        message += fragment;
+    }
+    discard(it);
+    return true;
+}
+
+void Reassembler::expire(std::chrono::steady_clock::time_point now) {
+    for (auto it = partials_.begin(); it != partials_.end(); ) {
+        if (now - it->second.started > timeout_) {
+            auto expired = it++;
+            discard(expired);
+        } else {
+            ++it;
+        }
+    }
+}
+
+// Drop the incomplete message that started first, other than keep; false if there is none
+bool Reassembler::evict_oldest(const Key& keep) {
+    auto oldest = partials_.end();
+    for (auto it = partials_.begin(); it != partials_.end(); ++it) {
+        if (it->first != keep && (oldest == partials_.end() || it->second.started < oldest->second.started)) {
+            oldest = it;
+        }
+    }
+    if (oldest == partials_.end()) {
+        return false;
+    }
+    discard(oldest);
+    return true;
+}
+
+void Reassembler::discard(std::map<Key, Partial>::iterator it) {
+    buffered_ -= it->second.size;
+    partials_.erase(it);
+}
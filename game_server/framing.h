@@ -0,0 +1,65 @@
+#ifndef FRAMING_H
+#define FRAMING_H
+
+#include <chrono>
+#include <cstddef>
+#include <cstdint>
+#include <map>
+#include <string>
+#include <utility>
+#include <vector>
+
+#ifdef _WIN32
+    #include <winsock2.h>
+#else
+    #include <netinet/in.h>
+#endif
+
+// Fragmentation of messages larger than one datagram, the counterpart of client/framing.py.
+//
+// Each fragment is a datagram of its own: FRAGMENT_MAGIC, the sender's u32 message id,
+// the u8 fragment index and the u8 fragment count (little endian), then a slice of the
+// message. Messages that fit into MAX_DATAGRAM_SIZE bytes are sent unchanged.
+constexpr unsigned char FRAGMENT_MAGIC = 0xFE;
+constexpr size_t FRAGMENT_HEADER_SIZE = 7;
+constexpr size_t MAX_DATAGRAM_SIZE = 1200;  // Below the usual path MTU, so IP never fragments
+constexpr size_t MAX_FRAGMENTS = 255;
+constexpr size_t RECEIVE_BUFFER_SIZE = 65536;  // Any UDP datagram fits
+
+bool is_fragment(const char* data, size_t size);
+
+// Datagrams to send for a message; throws std::length_error if it needs too many fragments
+std::vector<std::string> split_message(const std::string& data, uint32_t message_id);
+
+// Collects fragments per sender until their message is complete. Incomplete messages are
+// dropped after a timeout, and the oldest ones are evicted when the buffered fragments
+// would exceed a memory cap. Not thread-safe.
+class Reassembler {
+public:
+    Reassembler(std::chrono::milliseconds timeout, size_t max_bytes);
+
+    // Store a fragment; returns true and fills message once its last fragment arrived
+    bool add(const sockaddr_in& source, const char* data, size_t size, std::string& message);
+
+private:
+    using Key = std::pair<uint64_t, uint32_t>;  // Sender address and port, message id
+
+    struct Partial {
+        std::vector<std::string> fragments;
+        std::vector<bool> received;
+        size_t missing;
+        size_t size = 0;
+        std::chrono::steady_clock::time_point started;
+    };
+
+    void expire(std::chrono::steady_clock::time_point now);
+    bool evict_oldest(const Key& keep);
+    void discard(std::map<Key, Partial>::iterator it);
+
+    std::chrono::milliseconds timeout_;
+    size_t max_bytes_;
+    size_t buffered_ = 0;
+    std::map<Key, Partial> partials_;
+};
+
+#endif // FRAMING_H
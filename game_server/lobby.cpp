@@ -35,4 +35,14 @@ void Lobby::initialize_game() {
     current_player_hand[player2->name] = SimpleJSON::convert_hand_to_nested(player2->hand);
 
     game_state.assign_nested_object("current_player_hand", current_player_hand);
+}
+
+SimpleJSON::JSONObject Lobby::hand_sizes() const {
+    SimpleJSON::JSONObject sizes;
+    for (const Player* player : {player1, player2}) {
+        if (player) {
+            sizes[player->name] = std::to_string(player->hand.size());
+        }
+    }
+    return sizes;
 }
\ No newline at end of file
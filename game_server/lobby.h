@@ -1,6 +1,8 @@
 #ifndef LOBBY_H
 #define LOBBY_H
 
+#include <map>
+#include <string>
 #include <vector>
 #include "player.h"  // Include Player structure
 #include "deck.h"    // Include Deck structure
@@ -13,9 +15,15 @@ struct Lobby {
     Deck deck;  // The deck of cards
     SimpleJSON game_state;  // Use SimpleJSON for game state
     bool paused;
+    int version = 0;  // Bumped on every game state sent to the players
+    // What the last broadcast told the players, the base of the next state_delta
+    SimpleJSON sent_state;
+    std::map<std::string, std::vector<Card>> sent_hands;
 
     bool is_full() const { return player1 != nullptr && player2 != nullptr; }
     void initialize_game();
+    // Number of cards in each player's hand, the only part of a hand the others may see
+    SimpleJSON::JSONObject hand_sizes() const;
 };
 
 #endif // LOBBY_H
@@ -4,6 +4,7 @@
 #include <string>
 #include <vector>
 #include <chrono>
+#include <cstdint>
 #include "card.h"
 #include "deck.h"
 
@@ -27,6 +28,11 @@ struct Player {
     std::vector<Card> hand;      // Cards in hand
     bool disconnected;
     std::chrono::steady_clock::time_point disconnect_time; // New field to track when disconnect happened
+    unsigned long last_seq = 0;  // Highest move sequence number acknowledged
+    uint64_t seq_window = 0;     // Bit i set if move last_seq - i was received
+    int rtt_ms = 0;              // Round-trip time reported in the player's heartbeats
+    bool wants_delta = false;    // Asked for state_delta messages instead of full states
+    bool binary = false;         // Negotiated the binary codec, see binary_codec.h
 };
 
 #endif // PLAYER_H
@@ -96,7 +96,7 @@ void game_server::notify_reconnection(Player* player, Lobby* lobby) {
         notify_msg.assign_string("type", "player_reconnected");
         notify_msg.assign_string("player", player->name);
         notify_msg.assign_string("message", "Player " + player->name + " has reconnected.");
-        send_to_client(notify_msg, other_player->address);
+        send_to_player(notify_msg, other_player);
     }
 }
 
@@ -109,7 +109,7 @@ void game_server::notify_disconnection(Player* player, Lobby* lobby) {
         disconnect_msg.assign_string("type", "player_disconnected");
         disconnect_msg.assign_string("player", player->name);
         disconnect_msg.assign_string("message", "Player " + player->name + " has disconnected.");
-        send_to_client(disconnect_msg, other_player->address);
+        send_to_player(disconnect_msg, other_player);
     }
 }
 
@@ -128,11 +128,11 @@ void game_server::check_disconnections() {
 
             // Check player1 disconnection
             if (lobby->player1) {
-                auto time_since_seen = std::chrono::duration_cast<std::chrono::seconds>(
+                auto time_since_seen = std::chrono::duration_cast<std::chrono::milliseconds>(
                     now - lobby->player1->last_seen).count();
 
                 // If player is waiting alone and disconnects, remove after short threshold
-                if (time_since_seen > SHORT_DISCONNECT_THRESHOLD && !lobby->player1->disconnected) {
+                if (time_since_seen > disconnect_threshold_ms(lobby->player1) && !lobby->player1->disconnected) {
                     std::cout << "Player " + lobby->player1->name + " has disconnected." << std::endl;
                     lobby->player1->disconnected = true;
                     notify_disconnection(lobby->player1, lobby);
@@ -147,9 +147,9 @@ void game_server::check_disconnections() {
 
             // Check player2 disconnection
             if (lobby->player2) {
-                auto time_since_seen = std::chrono::duration_cast<std::chrono::seconds>(
+                auto time_since_seen = std::chrono::duration_cast<std::chrono::milliseconds>(
                     now - lobby->player2->last_seen).count();
-                if (time_since_seen > SHORT_DISCONNECT_THRESHOLD && !lobby->player2->disconnected) {
+                if (time_since_seen > disconnect_threshold_ms(lobby->player2) && !lobby->player2->disconnected) {
                     std::cout << "Player " + lobby->player2->name + " has disconnected." << std::endl;
                     lobby->player2->disconnected = true;
                     notify_disconnection(lobby->player2, lobby);
@@ -185,7 +185,7 @@ void game_server::check_disconnections() {
                     game_over_msg.assign_string("type", "game_over");
                     game_over_msg.assign_string("winner", other_player->name);
                     game_over_msg.assign_string("message", "Game Over! Opponent was disconnected for too long");
-                    send_to_client(game_over_msg, other_player->address);
+                    send_to_player(game_over_msg, other_player);
                 }
 
                 if (disconnected_player) {
@@ -206,6 +206,32 @@ void game_server::check_disconnections() {
     }
 }
 
+// A player is disconnected after SHORT_DISCONNECT_THRESHOLD seconds of silence, plus
+// a few round trips so that a slow link is not mistaken for a dead one.
+long long game_server::disconnect_threshold_ms(const Player* player) const {
+    return SHORT_DISCONNECT_THRESHOLD * 1000LL + 4LL * player->rtt_ms;
+}
+
+// Any message from a player's current address proves they are alive, not only heartbeats.
+void game_server::touch_player(const SimpleJSON& msg, const sockaddr_in& client_addr) {
+    const auto& data = msg.get_data();
+    auto name_it = data.find("player_name");
+    if (name_it == data.end()) {
+        name_it = data.find("name");
+    }
+    if (name_it == data.end()) {
+        return;
+    }
+    auto it = players.find(name_it->second);
+    if (it == players.end() || it->second->disconnected) {
+        return;  // Disconnected players come back through handle_reconnection
+    }
+    const sockaddr_in& address = it->second->address;
+    if (address.sin_addr.s_addr == client_addr.sin_addr.s_addr && address.sin_port == client_addr.sin_port) {
+        it->second->last_seen = std::chrono::steady_clock::now();
+    }
+}
+
 void game_server::handle_reconnection(const std::string& player_name, const sockaddr_in& new_addr) {
     auto it = players.find(player_name);
     if (it == players.end() || !it->second->disconnected) {
@@ -235,35 +261,71 @@ void game_server::handle_reconnection(const std::string& player_name, const sock
     }
 
     // Send the current game state to the reconnected player
-    SimpleJSON state_msg;
-    state_msg.assign_string("type", "game_state_update");
-    state_msg.assign_array("players", {lobby->player1->name, lobby->player2->name});
-    state_msg.assign_string("current_player", remove_quotes(lobby->game_state["current_player"]));
-    state_msg.assign_int("deck_size", lobby->deck.size());
-    state_msg.assign_int("discard_pile", lobby->discard_pile.size());
-    state_msg.assign_card("top_card", lobby->discard_pile.back());
-
-    std::map<std::string, std::vector<Card>> hands;
-    hands[lobby->player1->name] = lobby->player1->hand;
-    hands[lobby->player2->name] = lobby->player2->hand;
-    state_msg.assign_multiple_hands(hands);
-
-    send_to_client(state_msg, new_addr);
+    if (lobby->is_full()) {
+        SimpleJSON state_msg = build_game_state(lobby, player);
+        send_to_player(state_msg, player);
+    }
 
     notify_reconnection(player, lobby);
 
     std::cout << "Player " << player_name << " reconnected successfully.\n";
 }
 
+// A client that lost contact resumes its session without a new connect handshake.
+// If its "version" is still the lobby's current one a short resume_ack is enough,
+// otherwise the full game state is sent.
+void game_server::handle_resume(const SimpleJSON& msg, const sockaddr_in& client_addr) {
+    const auto& data = msg.get_data();
+    auto name_it = data.find("name");
+    auto it = name_it != data.end() ? players.find(name_it->second) : players.end();
+    Lobby* lobby = it != players.end() ? find_player_lobby(it->first) : nullptr;
+    if (!lobby) {
+        SimpleJSON rejected;
+        rejected.assign_string("type", "resume_rejected");
+        rejected.assign_string("message", "Your game is no longer available.");
+        send_to_client(rejected, client_addr);
+        return;
+    }
+
+    Player* player = it->second;
+    if (player->disconnected) {
+        // The opponent was told about the disconnection, so go through the full reconnection
+        handle_reconnection(player->name, client_addr);
+        return;
+    }
+    player->address = client_addr;
+    player->last_seen = std::chrono::steady_clock::now();
+
+    auto version_it = data.find("version");
+    if (lobby->is_full() && (version_it == data.end() || version_it->second != std::to_string(lobby->version))) {
+        SimpleJSON state_msg = build_game_state(lobby, player);
+        send_to_player(state_msg, player);
+        return;
+    }
+
+    SimpleJSON ack;
+    ack.assign_string("type", "resume_ack");
+    ack.assign_int("version", lobby->version);
+    send_to_player(ack, player);
+}
+
 void game_server::handle_message(const SimpleJSON& msg, const sockaddr_in& client_addr) {
     std::lock_guard<std::mutex> lock(mtx);
+    touch_player(msg, client_addr);
     if (msg["type"] == "connect") {
         std::string player_name = msg["name"];
         std::cout << "\nReceived connection request from: " << player_name << std::endl;
+        const auto& data = msg.get_data();
+        auto codec_it = data.find("codec");
+        bool binary = codec_it != data.end() && codec_it->second == "binary";
 
         // Check if this is a reconnection attempt
         auto it = players.find(player_name);
         if (it != players.end() && it->second->disconnected) {
+            it->second->binary = binary;
+            // A new connection numbers its moves from 1 again
+            it->second->last_seq = 0;
+            it->second->seq_window = 0;
             handle_reconnection(player_name, client_addr);
             return;
         }
@@ -278,6 +340,9 @@ void game_server::handle_message(const SimpleJSON& msg, const sockaddr_in& clien
         player_name = remove_quotes(player_name);
         // Create new player
         Player* new_player = new Player{player_name, client_addr, std::chrono::steady_clock::now()};
+        new_player->binary = binary;
+        auto delta_it = data.find("delta");
+        new_player->wants_delta = delta_it != data.end() && delta_it->second == "true";
         players[player_name] = new_player;
 
         // Find or create lobby
@@ -287,6 +352,10 @@ void game_server::handle_message(const SimpleJSON& msg, const sockaddr_in& clien
         ack.assign_string("type","connect_ack");
         ack.assign_string("player_id",player_name);
         ack.assign_bool("waiting_for_player",!lobby->is_full());
+        if (binary) {
+            // The handshake stays JSON, everything after it is binary
+            ack.assign_string("codec", "binary");
+        }
 
         if (lobby->is_full()) {
             std::cout << "Lobby is full. Starting game with players: "
@@ -299,12 +368,9 @@ void game_server::handle_message(const SimpleJSON& msg, const sockaddr_in& clien
             ack.assign_int("discard_pile", lobby->discard_pile.size());
             ack.assign_card("top_card", lobby->discard_pile.back());
 
-            // Create and assign the player hands
-            std::map<std::string, std::vector<Card>> hands;
-            hands[lobby->player1->name] = lobby->player1->hand;
-            hands[lobby->player2->name] = lobby->player2->hand;
-
-            ack.assign_multiple_hands(hands);
+            // The new player's own hand, and only the size of the opponent's
+            ack.assign_cards(new_player->name, new_player->hand);
+            ack["hand_sizes"] = SimpleJSON::serialize_object(lobby->hand_sizes());
         } else {
             std::cout << "Waiting for another player to join lobby" << std::endl;
         }
@@ -316,9 +382,19 @@ void game_server::handle_message(const SimpleJSON& msg, const sockaddr_in& clien
     } else if (msg["type"] == "heartbeat") {
         std::string player_name = msg["name"];
         auto it = players.find(player_name);
+        const auto& data = msg.get_data();
         if (it != players.end()) {
             Player* player = it->second;
             player->last_seen = std::chrono::steady_clock::now();
+
+            auto rtt_it = data.find("rtt");
+            if (rtt_it != data.end()) {
+                try {
+                    player->rtt_ms = std::clamp(std::stoi(rtt_it->second), 0, MAX_REPORTED_RTT_MS);
+                } catch (const std::exception&) {
+                    // Keep the previous estimate
+                }
+            }
             
             // If player was disconnected, handle reconnection
             if (player->disconnected) {
@@ -327,17 +403,45 @@ void game_server::handle_message(const SimpleJSON& msg, const sockaddr_in& clien
                 // Update player's address in case it changed
                 player->address = client_addr;
             }
+
+            // Echo the client's timestamp so it can measure the round trip. Unknown players
+            // get no answer, so their heartbeats time out and the client tries to resume.
+            // The state version lets an idle client notice that it missed the last update.
+            auto ts_it = data.find("ts");
+            if (ts_it != data.end() && !ts_it->second.empty() &&
+                ts_it->second.find_first_not_of("0123456789") == std::string::npos) {
+                SimpleJSON ack;
+                ack.assign_string("type", "heartbeat_ack");
+                ack["ts"] = ts_it->second;
+                Lobby* lobby = find_player_lobby(player->name);
+                if (lobby && lobby->is_full()) {
+                    ack.assign_int("version", lobby->version);
+                }
+                send_to_player(ack, player);
+            }
         }
+    } else if (msg["type"] == "resume") {
+        handle_resume(msg, client_addr);
+    } else if (msg["type"] == "snapshot_request") {
+        handle_snapshot_request(msg, client_addr);
     } else if (msg["type"] == "play_card" || msg["type"] == "draw_card") {
         std::string player_name = msg["player_name"];
+        if (!acknowledge_move(msg, client_addr)) {
+            return;  // Retransmission of a move that was already applied
+        }
         auto lobby = find_player_lobby(player_name);
+        // Errors go back in the codec the player negotiated
+        auto sender_it = players.find(player_name);
+        bool binary = sender_it != players.end() && sender_it->second->binary;
 
         if (lobby && lobby->is_full()) {
             if (remove_quotes(lobby->game_state["current_player"]) != player_name) {
                 SimpleJSON error_msg;
                 error_msg.assign_string("type","error");
                 error_msg.assign_string("message","Not your turn yet.");
-                send_to_client(error_msg, client_addr);
+                // A rejected move usually means the client missed an update
+                error_msg.assign_int("version", lobby->version);
+                send_to_client(error_msg, client_addr, binary);
                 return;
             }
 
@@ -360,7 +464,8 @@ void game_server::handle_message(const SimpleJSON& msg, const sockaddr_in& clien
                     SimpleJSON error_msg;
                     error_msg.assign_string("type","error");
                     error_msg.assign_string("message","You do not have this card in your hand.");
-                    send_to_client(error_msg, client_addr);
+                    error_msg.assign_int("version", lobby->version);
+                    send_to_client(error_msg, client_addr, binary);
                     return;
                 }
 
@@ -372,7 +477,8 @@ void game_server::handle_message(const SimpleJSON& msg, const sockaddr_in& clien
                     SimpleJSON error_msg;
                     error_msg.assign_string("type","error");
                     error_msg.assign_string("message","Invalid move. Card must match suit or value of the top card.");
-                    send_to_client(error_msg, client_addr);
+                    error_msg.assign_int("version", lobby->version);
+                    send_to_client(error_msg, client_addr, binary);
                     return;
                 }
 
@@ -424,8 +530,8 @@ void game_server::handle_message(const SimpleJSON& msg, const sockaddr_in& clien
                     win_msg.assign_string("type", "game_over");
                     win_msg.assign_string("winner", remove_quotes(lobby->game_state["current_player"]));
                     win_msg.assign_string("message", "Game Over! winner: "+remove_quotes(lobby->game_state["current_player"]));
-                    send_to_client(win_msg, lobby->player1->address);
-                    send_to_client(win_msg, lobby->player2->address);
+                    send_to_player(win_msg, lobby->player1);
+                    send_to_player(win_msg, lobby->player2);
 
                     // Clean up the players from the players map
                     players.erase(lobby->player1->name);
@@ -458,7 +564,7 @@ void game_server::handle_message(const SimpleJSON& msg, const sockaddr_in& clien
                 play_card_msg.assign_string("type", "player_played_card");
                 play_card_msg.assign_string("player_name", current_player->name);
                 play_card_msg.assign_string("message", message);
-                send_to_client(play_card_msg, other_player->address);
+                send_to_player(play_card_msg, other_player);
 
 
 
@@ -487,7 +593,7 @@ void game_server::handle_message(const SimpleJSON& msg, const sockaddr_in& clien
                         SimpleJSON error_msg;
                         error_msg.assign_string("type","error");
                         error_msg.assign_string("message","Not enough cards in discard pile to refill deck.");
-                        send_to_client(error_msg, client_addr);
+                        send_to_client(error_msg, client_addr, binary);
                         return;
                     }
                 }
@@ -515,14 +621,14 @@ void game_server::handle_message(const SimpleJSON& msg, const sockaddr_in& clien
                     draw_card_msg.assign_string("type", "player_drawn_card");
                     draw_card_msg.assign_string("player_name", current_player->name);
                     draw_card_msg.assign_string("message", "Player "+player_name+" draw a card.");
-                    send_to_client(draw_card_msg, other_player->address);
+                    send_to_player(draw_card_msg, other_player);
             }
             catch (const std::runtime_error& e) {
                 // If the deck is empty and discard pile couldn't refill it, send an error message
                 SimpleJSON error_msg;
                 error_msg.assign_string("type","error");
                 error_msg.assign_string("message",e.what());
-                send_to_client(error_msg, client_addr);
+                send_to_client(error_msg, client_addr, binary);
                 return;
             }
         }
@@ -533,9 +639,149 @@ void game_server::handle_message(const SimpleJSON& msg, const sockaddr_in& clien
     }
 }
 
+// Moves sent with a sequence number are acknowledged before they are applied.
+// Returns false for a duplicate, which is acknowledged again but must not be applied.
+// Moves are remembered in a window of the last SEQ_WINDOW sequence numbers, so a move
+// that arrives after a newer one is still applied; older ones count as duplicates.
+bool game_server::acknowledge_move(const SimpleJSON& msg, const sockaddr_in& client_addr) {
+    const auto& data = msg.get_data();
+    auto seq_it = data.find("seq");
+    auto name_it = data.find("player_name");
+    if (seq_it == data.end() || name_it == data.end()) {
+        return true;  // Client without reliable delivery
+    }
+    auto player_it = players.find(name_it->second);
+    if (player_it == players.end()) {
+        return true;
+    }
+
+    unsigned long seq;
+    try {
+        seq = std::stoul(seq_it->second);
+    } catch (const std::exception&) {
+        return true;
+    }
+
+    SimpleJSON ack;
+    ack.assign_string("type", "ack");
+    ack.assign_int("seq", static_cast<int>(seq));
+    send_to_client(ack, client_addr, player_it->second->binary);
+
+    Player* player = player_it->second;
+    if (seq > player->last_seq) {
+        unsigned long shift = seq - player->last_seq;
+        player->seq_window = shift < SEQ_WINDOW ? (player->seq_window << shift) | 1 : 1;
+        player->last_seq = seq;
+        return true;
+    }
+    unsigned long age = player->last_seq - seq;
+    if (age >= SEQ_WINDOW || (player->seq_window >> age) & 1) {
+        return false;
+    }
+    player->seq_window |= uint64_t{1} << age;
+    return true;
+}
+
 void game_server::broadcast_game_state(Lobby* lobby) {
     if (!lobby || !lobby->is_full()) return;
 
+    lobby->version++;
+
+    // Every player gets the state as they may see it. Players that asked for deltas get
+    // only what changed since the previous broadcast.
+    bool has_base = !lobby->sent_hands.empty();
+    SimpleJSON state_update;
+    for (Player* player : {lobby->player1, lobby->player2}) {
+        state_update = build_game_state(lobby, player);
+        if (has_base && player->wants_delta) {
+            SimpleJSON delta = build_state_delta(lobby, state_update, player);
+            send_to_player(delta, player);
+        } else {
+            send_to_player(state_update, player);
+        }
+    }
+
+    // Only the fields shared by all players are compared against
+    lobby->sent_state = state_update;
+    lobby->sent_hands[lobby->player1->name] = lobby->player1->hand;
+    lobby->sent_hands[lobby->player2->name] = lobby->player2->hand;
+}
+
+// Difference between the last broadcast and the new state: the fields that changed, the
+// cards that left and joined the recipient's hand (in hand order) and the new sizes of
+// the hands that changed. "base" is the version the delta applies to; a client holding
+// another version asks for a snapshot instead.
+SimpleJSON game_server::build_state_delta(Lobby* lobby, const SimpleJSON& state, const Player* recipient) {
+    SimpleJSON delta;
+    delta.assign_string("type", "state_delta");
+    delta.assign_int("version", lobby->version);
+    delta.assign_int("base", lobby->version - 1);
+
+    const auto& previous = lobby->sent_state.get_data();
+    for (const char* key : {"current_player", "deck_size", "discard_pile", "top_card"}) {
+        auto it = previous.find(key);
+        if (it == previous.end() || it->second != state[key]) {
+            delta[key] = state[key];
+        }
+    }
+
+    const std::vector<Card>& before = lobby->sent_hands[recipient->name];
+    std::set<std::string> before_cards;
+    std::set<std::string> after_cards;
+    for (const Card& card : before) before_cards.insert(card.to_string());
+    for (const Card& card : recipient->hand) after_cards.insert(card.to_string());
+
+    std::vector<Card> left;
+    std::vector<Card> joined;
+    for (const Card& card : before) {
+        if (!after_cards.count(card.to_string())) left.push_back(card);
+    }
+    for (const Card& card : recipient->hand) {
+        if (!before_cards.count(card.to_string())) joined.push_back(card);
+    }
+    SimpleJSON::NestedObject removed;
+    SimpleJSON::NestedObject added;
+    if (!left.empty()) removed[recipient->name] = SimpleJSON::convert_hand_to_nested(left);
+    if (!joined.empty()) added[recipient->name] = SimpleJSON::convert_hand_to_nested(joined);
+    if (!removed.empty()) delta.assign_nested_object("removed", removed);
+    if (!added.empty()) delta.assign_nested_object("added", added);
+
+    SimpleJSON::JSONObject sizes;
+    for (Player* player : {lobby->player1, lobby->player2}) {
+        if (lobby->sent_hands[player->name].size() != player->hand.size()) {
+            sizes[player->name] = std::to_string(player->hand.size());
+        }
+    }
+    if (!sizes.empty()) delta["hand_sizes"] = SimpleJSON::serialize_object(sizes);
+    return delta;
+}
+
+// A client that missed a state_delta asks for the full state of its lobby.
+void game_server::handle_snapshot_request(const SimpleJSON& msg, const sockaddr_in& client_addr) {
+    const auto& data = msg.get_data();
+    auto name_it = data.find("name");
+    if (name_it == data.end()) {
+        return;
+    }
+    auto it = players.find(name_it->second);
+    if (it == players.end() || it->second->disconnected) {
+        return;
+    }
+    // The state carries the player's hand, so only the player's own address gets it
+    const sockaddr_in& address = it->second->address;
+    if (address.sin_addr.s_addr != client_addr.sin_addr.s_addr || address.sin_port != client_addr.sin_port) {
+        return;
+    }
+    Lobby* lobby = find_player_lobby(it->first);
+    if (lobby && lobby->is_full()) {
+        SimpleJSON state_msg = build_game_state(lobby, it->second);
+        send_to_player(state_msg, it->second);
+    }
+}
+
+// The game state as the recipient may see it: their own hand and the size of every
+// hand, never the cards of the opponent.
+SimpleJSON game_server::build_game_state(Lobby* lobby, const Player* recipient) {
     SimpleJSON state_update;
     state_update.assign_string("type", "game_state_update");
 
@@ -547,29 +793,40 @@ void game_server::broadcast_game_state(Lobby* lobby) {
     state_update.assign_int("discard_pile", lobby->discard_pile.size());
     state_update.assign_card("top_card", lobby->discard_pile.back());
 
-    // Create and assign the player hands
-    std::map<std::string, std::vector<Card>> hands;
-    hands[lobby->player1->name] = lobby->player1->hand;
-    hands[lobby->player2->name] = lobby->player2->hand;
-
-    state_update.assign_multiple_hands(hands);  // Assuming assign_multiple_hands can handle this
-
+    state_update.assign_cards(recipient->name, recipient->hand);
+    state_update["hand_sizes"] = SimpleJSON::serialize_object(lobby->hand_sizes());
+    state_update.assign_int("version", lobby->version);
 
-    // Send the updated game state to both players
-    send_to_client(state_update, lobby->player1->address);
-    send_to_client(state_update, lobby->player2->address);
+    return state_update;
 }
 
 
-    void game_server::send_to_client(SimpleJSON& msg, const sockaddr_in& client_addr) {
-        // Serialize the SimpleJSON object to a string
-        std::string data = msg.serialize();
+    void game_server::send_to_client(SimpleJSON& msg, const sockaddr_in& client_addr, bool binary) {
+        // Serialize the SimpleJSON object, as JSON unless the binary codec was negotiated
+        // and the message has a binary layout
+        std::string data = binary ? BinaryCodec::encode(msg) : "";
+        if (data.empty()) {
+            data = msg.serialize();
+        }
 
-        // Send the serialized string over the socket
-        sendto(server_socket, data.c_str(), data.length(), 0,
-               (struct sockaddr*)&client_addr, sizeof(client_addr));
+        // Send the serialized string over the socket, in fragments if it does not fit one datagram
+        std::vector<std::string> datagrams;
+        try {
+            datagrams = split_message(data, next_message_id++);
+        } catch (const std::length_error& e) {
+            std::cerr << "Message not sent: " << e.what() << std::endl;
+            return;
+        }
+        for (const std::string& datagram : datagrams) {
+            sendto(server_socket, datagram.data(), datagram.size(), 0,
+                   (struct sockaddr*)&client_addr, sizeof(client_addr));
+        }
     }
 
+void game_server::send_to_player(SimpleJSON& msg, const Player* player) {
+    send_to_client(msg, player->address, player->binary);
+}
+
 void game_server::start() {
     std::cout << "UDP Server started. Waiting for players..." << std::endl;
 
@@ -577,24 +834,38 @@ void game_server::start() {
     std::thread checker_thread(&game_server::check_disconnections, this);
     checker_thread.detach();
 
-    char buffer[4096];
+    // Datagrams are received into the preallocated receive_buffer, large enough for any of them
+    char* buffer = receive_buffer.data();
     sockaddr_in client_addr{};
     int client_len = sizeof(client_addr);
+    std::string reassembled;
 
     while (running) {
-        memset(buffer, 0, sizeof(buffer));
         #ifdef _WIN32
-            int bytesRead = recvfrom(server_socket, buffer, sizeof(buffer), 0,
+            int bytesRead = recvfrom(server_socket, buffer, static_cast<int>(receive_buffer.size()), 0,
                                    (struct sockaddr*)&client_addr, &client_len);
         #else
-            ssize_t bytesRead = recvfrom(server_socket, buffer, sizeof(buffer), 0,
+            ssize_t bytesRead = recvfrom(server_socket, buffer, receive_buffer.size(), 0,
                                        (struct sockaddr*)&client_addr, (socklen_t*)&client_len);
         #endif
 
         if (bytesRead > 0) {
+            const char* data = buffer;
+            size_t size = static_cast<size_t>(bytesRead);
+            if (is_fragment(data, size)) {
+                if (!reassembler.add(client_addr, data, size, reassembled)) {
+                    continue;  // Wait for the remaining fragments
+                }
+                data = reassembled.data();
+                size = reassembled.size();
+            }
             try {
                 SimpleJSON msg;
-                msg.deserialize_object(std::string(buffer, bytesRead)); // Deserialize buffer to SimpleJSON
+                if (BinaryCodec::is_binary(data, size)) {
+                    msg = BinaryCodec::decode(data, size);
+                } else {
+                    msg.deserialize_object(std::string(data, size)); // Deserialize buffer to SimpleJSON
+                }
                 handle_message(msg, client_addr);
             } catch (const std::exception& e) {
                 std::cerr << "Error parsing message: " << e.what() << std::endl;
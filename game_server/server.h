@@ -3,6 +3,7 @@
 
 #include <iostream>
 #include <thread>
+#include <atomic>
 #include <algorithm>
 #include <random>
 #include <stdexcept>
@@ -12,8 +13,11 @@
 #include "card.h"
 #include <mutex>
 #include <map>
+#include <set>
 #include <chrono>
 #include "json.h"
+#include "binary_codec.h"
+#include "framing.h"
 #include  <cstring>
 #include "player.h"
 #include "lobby.h"
@@ -45,15 +49,31 @@ private:
     bool running;
     static const int SHORT_DISCONNECT_THRESHOLD = 10; // 30 seconds for short disconnection
     static const int LONG_DISCONNECT_THRESHOLD = 60; // 2 minutes for long disconnection
+    static constexpr int MAX_REPORTED_RTT_MS = 5000; // Cap on the RTT a client can claim
+    static constexpr unsigned long SEQ_WINDOW = 64; // Move sequence numbers remembered per player, see Player::seq_window
+    static constexpr int REASSEMBLY_TIMEOUT_MS = 2000; // Incomplete fragmented messages are dropped after this
+    static constexpr size_t REASSEMBLY_MAX_BYTES = 1024 * 1024; // Cap on buffered fragments of all clients
+
+    std::vector<char> receive_buffer = std::vector<char>(RECEIVE_BUFFER_SIZE);
+    Reassembler reassembler{std::chrono::milliseconds(REASSEMBLY_TIMEOUT_MS), REASSEMBLY_MAX_BYTES};
+    std::atomic<uint32_t> next_message_id{0}; // Id of the next fragmented message sent
 
     void handle_message(const SimpleJSON& msg, const sockaddr_in& client_addr);
-    void send_to_client(SimpleJSON& msg, const sockaddr_in& client_addr);
+    void send_to_client(SimpleJSON& msg, const sockaddr_in& client_addr, bool binary = false);
+    void send_to_player(SimpleJSON& msg, const Player* player);
+    bool acknowledge_move(const SimpleJSON& msg, const sockaddr_in& client_addr);
+    void touch_player(const SimpleJSON& msg, const sockaddr_in& client_addr);
+    long long disconnect_threshold_ms(const Player* player) const;
     void broadcast_game_state(Lobby* lobby);
+    SimpleJSON build_game_state(Lobby* lobby, const Player* recipient);
+    SimpleJSON build_state_delta(Lobby* lobby, const SimpleJSON& state, const Player* recipient);
+    void handle_snapshot_request(const SimpleJSON& msg, const sockaddr_in& client_addr);
     void check_disconnections();
     Lobby* find_or_create_lobby(Player* player);
     Lobby* find_player_lobby(const std::string& player_name);
     std::string remove_quotes(const std::string& str);
     void handle_reconnection(const std::string& player_name, const sockaddr_in& new_addr);
+    void handle_resume(const SimpleJSON& msg, const sockaddr_in& client_addr);
     bool is_reconnection_valid(const std::string& player_name, const sockaddr_in& new_addr);
     void notify_reconnection(Player* player, Lobby* lobby);
     void notify_disconnection(Player* player, Lobby* lobby);